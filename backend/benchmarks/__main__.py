@@ -0,0 +1,154 @@
+"""
+性能基准: 生成合成语料, 分别对 testPostRepo / SQLite PostRepo / ASGI 应用测量 p50/p99,
+结果写入 JSON, 可以与上一次的结果对比
+
+PYTHONPATH=. python -m benchmarks -n 2000 --output bench.json
+PYTHONPATH=. python -m benchmarks -n 2000 --compare bench.json --fail-on-regression
+"""
+import argparse
+import atexit
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# 必须在导入 infra.db 之前指定数据库
+_tmp_dir = tempfile.mkdtemp(prefix="blog-bench-")
+os.environ["SQLITE_URL"] = f"sqlite:///{_tmp_dir}/bench.db"
+atexit.register(shutil.rmtree, _tmp_dir, ignore_errors=True)
+
+import sqlalchemy
+from fastapi.testclient import TestClient
+
+from benchmarks.corpus import CorpusGenerator
+from benchmarks.suite import OPERATIONS, AsgiTarget, ServiceTarget, run_target
+from infra.db import engine
+from infra.migrations import migrate
+from infra.posts import PostRepo, testPostRepo
+from services.blog_service import BlogService
+
+TARGETS = ("memory", "sqlite", "asgi")
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=Path(__file__).resolve().parent,
+                capture_output=True,
+                text=True,
+                check=True,
+                ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> dict:
+    corpus = list(CorpusGenerator(seed=args.seed).posts(args.n))
+    results = {}
+
+    if "memory" in args.targets:
+        target = ServiceTarget(BlogService(testPostRepo()))
+        t = time.perf_counter()
+        slugs = target.populate(corpus)
+        print(f"memory: populated {len(slugs)} posts in {time.perf_counter() - t:.1f}s")
+        results["memory"] = run_target(target, slugs, CorpusGenerator(seed=args.seed + 1), args.iterations, args.seed)
+
+    if "sqlite" in args.targets or "asgi" in args.targets:
+        # sqlite 和 asgi 共用同一个数据库文件
+        migrate(engine)
+        target = ServiceTarget(BlogService(PostRepo()))
+        t = time.perf_counter()
+        slugs = target.populate(corpus)
+        print(f"sqlite: populated {len(slugs)} posts in {time.perf_counter() - t:.1f}s")
+        if "sqlite" in args.targets:
+            results["sqlite"] = run_target(target, slugs, CorpusGenerator(seed=args.seed + 2), args.iterations, args.seed)
+        if "asgi" in args.targets:
+            from main import app
+
+            with TestClient(app) as client:
+                results["asgi"] = run_target(AsgiTarget(client), slugs, CorpusGenerator(seed=args.seed + 3), args.iterations, args.seed)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "posts": args.n,
+            "iterations": args.iterations,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def print_results(report: dict) -> None:
+    print(f"{'target':<8} {'operation':<12} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9}")
+    for target, operations in report["results"].items():
+        for op in OPERATIONS:
+            r = operations[op]
+            print(f"{target:<8} {op:<12} {r['p50_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['mean_ms']:>9.3f}")
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    与基线对比 p50/p99, 返回变慢超过 threshold 的项
+    """
+    regressions = []
+    print(f"\ncompared with {baseline['meta'].get('revision') or '?'} ({baseline['meta'].get('timestamp')})")
+    if baseline["meta"].get("posts") != report["meta"]["posts"]:
+        print(f"warning: baseline used {baseline['meta'].get('posts')} posts, this run used {report['meta']['posts']}")
+    print(f"{'target':<8} {'operation':<12} {'p50':>8} {'p99':>8}")
+    for target, operations in report["results"].items():
+        for op, current in operations.items():
+            previous = baseline["results"].get(target, {}).get(op)
+            if previous is None:
+                continue
+            ratios = {}
+            for key in ("p50_ms", "p99_ms"):
+                ratios[key] = current[key] / previous[key] if previous[key] else 1.0
+                if ratios[key] > 1 + threshold:
+                    regressions.append(f"{target}.{op}.{key}: {previous[key]:.3f} -> {current[key]:.3f} ms")
+            print(f"{target:<8} {op:<12} {ratios['p50_ms']:>7.2f}x {ratios['p99_ms']:>7.2f}x")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark the blog service on a synthetic corpus.")
+    parser.add_argument("-n", type=int, default=2000, help="Synthetic posts to populate.")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed calls per operation.")
+    parser.add_argument("--seed", type=int, default=42, help="Corpus and access pattern seed.")
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS))
+    parser.add_argument("--output", type=Path, help="Write results to this JSON file.")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON from a previous run.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown ratio before a regression is reported.")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 when a regression is found.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    report = run(args)
+    print_results(report)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"\nwrote {args.output}")
+
+    if args.compare:
+        regressions = compare(report, json.loads(args.compare.read_text(encoding="utf-8")), args.threshold)
+        for line in regressions:
+            print(f"regression: {line}")
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+合成语料: 给定 seed 生成可复现的中文技术博客
+ - 正文是 markdown: 标题、段落、列表、代码块、链接, 中英文混排
+ - 篇幅服从对数正态分布, 少数长文
+ - 标签按 Zipf 分布抽取, 少数热门标签覆盖大部分文章
+"""
+import random
+from dataclasses import dataclass
+from typing import Iterator, List
+
+TAGS = [
+    "python", "fastapi", "数据库", "性能", "架构", "前端", "svelte", "sqlite", "mysql", "缓存",
+    "异步", "测试", "部署", "docker", "linux", "网络", "安全", "算法", "llm", "rag",
+    "读书笔记", "随笔", "工具", "git", "日志", "监控", "redis", "消息队列", "设计模式", "重构",
+]
+
+WORDS = [
+    "我们", "系统", "数据", "接口", "请求", "响应", "缓存", "数据库", "索引", "查询", "事务", "连接",
+    "并发", "线程", "协程", "异步", "同步", "性能", "延迟", "吞吐", "瓶颈", "优化", "部署", "容器",
+    "服务", "模块", "函数", "参数", "返回值", "异常", "日志", "监控", "指标", "告警", "测试", "用例",
+    "前端", "后端", "页面", "组件", "状态", "渲染", "路由", "中间件", "配置", "环境", "版本", "依赖",
+    "文章", "标题", "正文", "标签", "作者", "发布", "草稿", "归档", "分页", "游标", "搜索", "排序",
+    "FastAPI", "SQLAlchemy", "SQLite", "MySQL", "Redis", "Python", "Svelte", "Docker", "Nginx", "HTTP",
+]
+PUNCTUATION = ["，", "，", "，", "、", "。", "；", "："]
+
+CODE_SNIPPETS = [
+    "def handler(request):\n    return {\"ok\": True}",
+    "SELECT id, slug FROM posts WHERE status = 'published' ORDER BY published_at DESC LIMIT 10;",
+    "async with session.begin():\n    await session.execute(stmt)",
+    "docker compose up -d --build",
+]
+
+
+@dataclass
+class SyntheticPost:
+    author_id: int
+    title: str
+    content: str
+    tags: List[str]
+
+
+def _zipf_weights(n: int, s: float = 1.1) -> List[float]:
+    return [1 / (rank ** s) for rank in range(1, n + 1)]
+
+
+class CorpusGenerator:
+    def __init__(self, seed: int = 42, authors: int = 5, mean_paragraphs: float = 6.0):
+        self.rng = random.Random(seed)
+        self.authors = authors
+        self.mean_paragraphs = mean_paragraphs
+        self._tag_weights = _zipf_weights(len(TAGS))
+
+    def sentence(self, min_words: int = 6, max_words: int = 18) -> str:
+        words = self.rng.choices(WORDS, k=self.rng.randint(min_words, max_words))
+        parts = []
+        for word in words:
+            parts.append(word)
+            if self.rng.random() < 0.15:
+                parts.append(self.rng.choice(PUNCTUATION))
+        return "".join(parts).rstrip("，、；：") + "。"
+
+    def paragraph(self) -> str:
+        return "".join(self.sentence() for _ in range(self.rng.randint(2, 6)))
+
+    def title(self) -> str:
+        return "".join(self.rng.choices(WORDS, k=self.rng.randint(3, 7)))
+
+    def tags(self) -> List[str]:
+        k = self.rng.choice([0, 1, 2, 2, 3, 3, 4])
+        return list(dict.fromkeys(self.rng.choices(TAGS, weights=self._tag_weights, k=k)))
+
+    def body(self, title: str) -> str:
+        # 对数正态: 大多数文章几段, 少数长文几十段
+        paragraphs = max(1, int(self.rng.lognormvariate(0, 0.8) * self.mean_paragraphs))
+        blocks = [f"# {title}"]
+        for i in range(paragraphs):
+            if i and i % 4 == 0:
+                blocks.append(f"## {self.title()}")
+            roll = self.rng.random()
+            if roll < 0.1:
+                blocks.append("\n".join(f"- {self.sentence(3, 8)}" for _ in range(self.rng.randint(2, 5))))
+            elif roll < 0.15:
+                blocks.append(f"```python\n{self.rng.choice(CODE_SNIPPETS)}\n```")
+            elif roll < 0.2:
+                blocks.append(f"参考 [{self.title()}](https://example.com/{self.rng.randint(1, 9999)}) 和 **{self.rng.choice(WORDS)}**。")
+            else:
+                blocks.append(self.paragraph())
+        return "\n\n".join(blocks) + "\n"
+
+    def post(self) -> SyntheticPost:
+        title = self.title()
+        return SyntheticPost(
+            author_id=self.rng.randint(1, self.authors),
+            title=title,
+            content=self.body(title),
+            tags=self.tags(),
+        )
+
+    def posts(self, n: int) -> Iterator[SyntheticPost]:
+        for _ in range(n):
+            yield self.post()
@@ -0,0 +1,119 @@
+"""
+列表响应的序列化开销: 每个列表请求把 limit 篇摘要转换为 JSON 字节
+ - pydantic: 逐篇构造 PostSummaryResponse, 再由 response_model 校验并 dump_json (改动前路由的做法)
+ - pydantic_core / orjson: services.serialization 直接从 dataclass 生成 dict 再编码
+
+PYTHONPATH=. python -m benchmarks.serialization --limit 10 100
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+from pydantic import TypeAdapter
+
+from benchmarks.corpus import CorpusGenerator
+from domains.posts import Post, PostStatus, PostSummary
+from routers.schemas.posts import PostResponse, PostSummaryResponse
+from services import serialization
+from services.serialization import post_document, summary_document
+
+_summary_list = TypeAdapter(List[PostSummaryResponse])
+_post = TypeAdapter(PostResponse)
+
+
+def make_posts(n: int, seed: int) -> List[Post]:
+    now = datetime(2025, 1, 1, 12, 0, 0, 123456)
+    posts = []
+    for i, item in enumerate(CorpusGenerator(seed=seed).posts(n), start=1):
+        posts.append(Post(
+                id=i,
+                author_id=item.author_id,
+                title=item.title,
+                content=item.content,
+                content_html=f"<p>{item.content}</p>",
+                slug=f"post-{i}",
+                tags=item.tags,
+                status=PostStatus.PUBLISHED,
+                created_at=now - timedelta(days=i),
+                updated_at=now - timedelta(hours=i),
+                published_at=now - timedelta(days=i, minutes=-5),
+                ))
+    return posts
+
+
+def pydantic_list(summaries: List[PostSummary]) -> bytes:
+    models = [
+        PostSummaryResponse(
+            id=p.id,
+            author_id=p.author_id,
+            title=p.title,
+            slug=p.slug,
+            status=p.status.value,
+            tags=p.tags,
+            excerpt=p.excerpt,
+            created_at=p.created_at,
+            updated_at=p.updated_at,
+            published_at=p.published_at,
+        )
+        for p in summaries
+    ]
+    # FastAPI 对返回值按 response_model 再校验一次然后序列化
+    return _summary_list.dump_json(_summary_list.validate_python(models))
+
+
+def pydantic_post(post: Post) -> bytes:
+    model = PostResponse(**post_document(post))
+    return _post.dump_json(_post.validate_python(model))
+
+
+def timed(fn: Callable[[], bytes], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t) * 1_000_000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark list/post response serialization.")
+    parser.add_argument("--limit", type=int, nargs="+", default=[10, 100], help="Summaries per list response.")
+    parser.add_argument("--repeat", type=int, default=2000, help="Serializations per case.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    posts = make_posts(max(args.limit), args.seed)
+    summaries = [PostSummary.from_post(p) for p in posts]
+    encoders = {"to_json": serialization._dumps_pydantic}
+    if serialization.orjson is not None:
+        encoders["orjson"] = serialization._dumps_orjson
+    else:
+        print("orjson is not installed, skipping it")
+
+    # 新旧路径输出的字节必须相同
+    for encode in encoders.values():
+        assert encode([summary_document(s) for s in summaries]) == pydantic_list(summaries)
+        assert encode(post_document(posts[0])) == pydantic_post(posts[0])
+
+    print(f"{'case':<14} {'path':<10} {'p50 us':>9} {'p99 us':>9} {'speedup':>8}")
+    cases = [(f"list x{limit}", summaries[:limit], pydantic_list, summary_document, True) for limit in args.limit]
+    cases.append(("post", posts[0], pydantic_post, post_document, False))
+    for name, data, baseline, convert, many in cases:
+        results = {"pydantic": timed(lambda: baseline(data), args.repeat)}
+        for label, encode in encoders.items():
+            if many:
+                results[label] = timed(lambda: encode([convert(item) for item in data]), args.repeat)
+            else:
+                results[label] = timed(lambda: encode(convert(data)), args.repeat)
+        base_p50 = statistics.median(results["pydantic"])
+        for label, samples in results.items():
+            samples.sort()
+            p50 = statistics.median(samples)
+            p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+            print(f"{name:<14} {label:<10} {p50:>9.1f} {p99:>9.1f} {base_p50 / p50:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+基准场景: 同一份合成语料分别跑在三个目标上
+ - memory: BlogService + testPostRepo
+ - sqlite: BlogService + PostRepo (临时 SQLite 文件)
+ - asgi:   FastAPI 应用, 通过 TestClient 在进程内请求, 包含路由/校验/缓存/中间件开销
+
+每个目标测 list / list_tag / get_by_slug / create / publish 的单次耗时
+"""
+import random
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.corpus import TAGS, CorpusGenerator, SyntheticPost
+
+# 预热次数, 不计入结果
+WARMUP = 20
+# 填充语料时每批的文章数
+POPULATE_BATCH = 500
+
+OPERATIONS = ("list", "list_tag", "get_by_slug", "create", "publish")
+
+
+def percentile(samples: List[float], p: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "ops": len(samples),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "p50_ms": round(statistics.median(samples), 4),
+        "p99_ms": round(percentile(samples, 0.99), 4),
+    }
+
+
+def measure(fn: Callable[[int], None], iterations: int) -> List[float]:
+    for i in range(min(WARMUP, iterations)):
+        fn(i)
+    samples = []
+    for i in range(iterations):
+        t = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - t) * 1000)
+    return samples
+
+
+def populate(service, posts: List[SyntheticPost]) -> List[str]:
+    """
+    批量创建并发布语料, 返回所有 slug
+    """
+    slugs = []
+    for start in range(0, len(posts), POPULATE_BATCH):
+        batch = posts[start:start + POPULATE_BATCH]
+        created = service.create_drafts([(p.author_id, p.title, p.content, p.tags) for p in batch])
+        by_author: Dict[int, List[int]] = {}
+        for result in created:
+            by_author.setdefault(result.post.author_id, []).append(result.post.id)
+        for author_id, post_ids in by_author.items():
+            service.publish_many(post_ids=post_ids, author_id=author_id)
+        slugs.extend(result.post.slug for result in created)
+    return slugs
+
+
+class ServiceTarget:
+    """
+    直接调用 BlogService, 对应 memory / sqlite 目标
+    """
+    def __init__(self, service):
+        self.service = service
+
+    def populate(self, posts: List[SyntheticPost]) -> List[str]:
+        return populate(self.service, posts)
+
+    def list(self, offset: int) -> None:
+        self.service.list_published_summaries(limit=10, offset=offset)
+
+    def list_tag(self, tag: str) -> None:
+        self.service.list_published_summaries(limit=10, tag=tag)
+
+    def get_by_slug(self, slug: str) -> None:
+        if self.service.get_post_by_slug_for_reader(slug) is None:
+            raise LookupError(slug)
+
+    def create(self, post: SyntheticPost) -> int:
+        return self.service.create_draft(
+                author_id=post.author_id,
+                title=post.title,
+                content=post.content,
+                tags=post.tags,
+                ).id
+
+    def publish(self, post_id: int, author_id: int) -> None:
+        self.service.publish_post(post_id=post_id, author_id=author_id)
+
+
+class AsgiTarget:
+    """
+    通过 TestClient 请求 main.app, 与 sqlite 目标共用同一个数据库
+    """
+    def __init__(self, client):
+        self.client = client
+
+    def _check(self, response) -> dict:
+        if response.status_code != 200:
+            raise RuntimeError(f"{response.request.method} {response.request.url} -> {response.status_code}: {response.text[:200]}")
+        return response.json()
+
+    def list(self, offset: int) -> None:
+        self._check(self.client.get("/posts", params={"limit": 10, "offset": offset}))
+
+    def list_tag(self, tag: str) -> None:
+        self._check(self.client.get("/posts", params={"limit": 10, "tag": tag}))
+
+    def get_by_slug(self, slug: str) -> None:
+        self._check(self.client.get(f"/posts/{slug}"))
+
+    def create(self, post: SyntheticPost) -> int:
+        body = {"author_id": post.author_id, "title": post.title, "content": post.content, "tags": post.tags}
+        return self._check(self.client.post("/posts", json=body))["id"]
+
+    def publish(self, post_id: int, author_id: int) -> None:
+        self._check(self.client.post(f"/posts/{post_id}/publish", json={"author_id": author_id}))
+
+
+def run_target(target, slugs: List[str], generator: CorpusGenerator, iterations: int, seed: int) -> Dict[str, Dict[str, float]]:
+    """
+    读操作随机访问已有语料; create 新建草稿, publish 再发布这些草稿
+    """
+    rng = random.Random(seed)
+    pages = max(1, len(slugs) // 10)
+    offsets = [rng.randrange(min(pages, 50)) * 10 for _ in range(iterations)]
+    tags = rng.choices(TAGS[:10], k=iterations)
+    lookups = rng.choices(slugs, k=iterations)
+    # 预热也会创建草稿, 多生成一些
+    new_posts = list(generator.posts(iterations + WARMUP))
+    drafts: List[tuple[int, int]] = []
+
+    def create(i: int) -> None:
+        post = new_posts[len(drafts)]
+        drafts.append((target.create(post), post.author_id))
+
+    # 预热和计时的 i 都从0开始, 用迭代器保证每篇草稿只发布一次
+    published = iter(drafts)
+
+    def publish(i: int) -> None:
+        post_id, author_id = next(published)
+        target.publish(post_id, author_id)
+
+    results = {
+        "list": measure(lambda i: target.list(offsets[i]), iterations),
+        "list_tag": measure(lambda i: target.list_tag(tags[i]), iterations),
+        "get_by_slug": measure(lambda i: target.get_by_slug(lookups[i]), iterations),
+        "create": measure(create, iterations),
+        "publish": measure(publish, iterations),
+    }
+    return {op: summarize(samples) for op, samples in results.items()}
@@ -1,35 +1,166 @@
 # cli.py
 
 import argparse
-from typing import List
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, List, Optional
 from pathlib import Path
 
-from infra.posts import testPostRepo
-from services.blog_service import BlogService
+from config import (
+    DATA_PATH,
+    LOG_LEVEL,
+    REDIS_CACHE_TTL,
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_MAX_RETRY_COUNT,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+)
+
+logger = logging.getLogger(__name__)
+
+# 各命令用到的模块在命令函数中导入, python cli.py --help 不需要加载 sqlalchemy
+if TYPE_CHECKING:
+    from infra.posts import BasePostRepo
+
+
+def require_schema() -> None:
+    """
+    写入数据库的命令先检查表是否已经创建, 建表和升级只在 migrate 命令中执行
+    """
+    from infra.db import engine
+    from infra.migrations import missing_tables
+
+    missing = missing_tables(engine)
+    if missing:
+        sys.exit(f"Missing tables {', '.join(missing)}; run `python cli.py migrate` first.")
+
+
+def make_repo() -> "BasePostRepo":
+    """
+    配置了 REDIS_URL 时, 写入后删除共享缓存并通知 web worker
+    """
+    from infra.posts import PostRepo
+
+    repo = PostRepo()
+    if not REDIS_URL:
+        return repo
+    from infra.redis_cache import RedisCachedPostRepo, create_redis_client
+
+    client = create_redis_client(
+            REDIS_URL,
+            use_async=False,
+            cluster=REDIS_CLUSTER,
+            sentinel_hosts=REDIS_SENTINEL_HOSTS,
+            sentinel_port=REDIS_SENTINEL_PORT,
+            sentinel_max_retry=REDIS_SENTINEL_MAX_RETRY_COUNT,
+            )
+    return RedisCachedPostRepo(repo, client, prefix=REDIS_KEY_PREFIX, ttl=REDIS_CACHE_TTL)
+
 
 def parse_tags(tags_str: str | None) -> List[str]:
     if not tags_str:
         return []
     return [t.strip() for t in tags_str.split(",") if t.strip()]
 
-def main():
-    parser = argparse.ArgumentParser(description="Import a markdown file as a blog post.")
-    parser.add_argument("--file", "-f", required=True,  help="Path to the markdown file.")
-    parser.add_argument("--author-id", "-aid", type=int, required=True, help="Author ID.")
-    parser.add_argument(
-            "--default-title", 
-            type=str, 
-            default=None, 
-            help="Default title if markdown parsing fails."
-            )
-    parser.add_argument(
-            "--default-tags",
-            type=str,
-            default=None,
-            help="comman-separated tags if markdown parsing fails",
-            )
 
-    args = parser.parse_args()
+def load_markdown_file(path: str, default_tags: List[str]) -> tuple[str, Optional[tuple[str, str, List[str]]], Optional[str]]:
+    """
+    读取并解析单个markdown文件, 在子进程中执行
+    返回 (path, (markdown_content, title, tags), None); 失败时返回 (path, None, 错误信息), 不影响其他文件
+    """
+    from services.blog_service import check_tags, prepare_markdown
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            markdown_content = f.read()
+        title, tags = prepare_markdown(
+                markdown_content,
+                default_title=Path(path).stem,
+                default_tags=default_tags,
+                )
+        check_tags(tags)
+    except Exception as e:
+        # 异常对象不一定能在进程间传递, 只返回错误信息
+        return path, None, f"{type(e).__name__}: {e}"
+    return path, (markdown_content, title, tags), None
+
+
+def import_dir(
+        directory: str,
+        *,
+        author_id: int,
+        default_tags: List[str],
+        workers: int | None = None,
+        batch_size: int = 200,
+        ) -> None:
+    """
+    批量导入目录下所有markdown文件(content/YYYY/Mon/DD/*.md):
+     1. 遍历目录收集文件
+     2. 进程池中读取并解析
+     3. 按批次写入PostRepo, 每批一个事务
+    """
+    # 数据库还没有迁移时, 在读取解析整个目录之前就退出
+    require_schema()
+    timings = {}
+
+    # 1. 遍历目录
+    start = time.perf_counter()
+    paths = sorted(str(p) for p in Path(directory).rglob("*.md"))
+    timings["discover"] = time.perf_counter() - start
+
+    # 2. 读取+解析
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(paths) // ((workers or os.cpu_count() or 1) * 4))
+        results = list(pool.map(
+            load_markdown_file,
+            paths,
+            [default_tags] * len(paths),
+            chunksize=chunksize,
+            ))
+    items = [item for _, item, _ in results if item is not None]
+    failed = [(path, error) for path, _, error in results if error is not None]
+    for path, error in failed:
+        logger.warning("skip %s: %s", path, error)
+    timings["parse"] = time.perf_counter() - start
+
+    # 3. 批量写入
+    from services.blog_service import BlogService
+
+    start = time.perf_counter()
+    service = BlogService(make_repo())
+    imported = 0
+    for i in range(0, len(items), batch_size):
+        posts = service.create_many_from_markdown(
+                author_id=author_id,
+                items=items[i:i + batch_size],
+                )
+        imported += len(posts)
+    timings["write"] = time.perf_counter() - start
+
+    total = sum(timings.values())
+    print(f"Imported {imported} posts from {len(paths)} files in {total:.3f}s, {len(failed)} failed")
+    for stage, seconds in timings.items():
+        print(f"  {stage:<8} {seconds:.3f}s")
+    if total > 0:
+        print(f"  {len(paths) / total:.1f} files/sec")
+
+
+def run_import(args) -> None:
+    if args.dir:
+        import_dir(
+                args.dir,
+                author_id=args.author_id,
+                default_tags=parse_tags(args.default_tags),
+                workers=args.workers,
+                batch_size=args.batch_size,
+                )
+        return
 
     # 1. Read markdown file
     with open(args.file, "r", encoding="utf-8") as f:
@@ -38,8 +169,11 @@ def main():
     file_stem = Path(args.file).stem
     effective_default_title = args.default_title or file_stem
 
-    repo = testPostRepo()
-    service = BlogService(repo)
+    # 2. 与 --dir 一样写入数据库
+    from services.blog_service import BlogService
+
+    require_schema()
+    service = BlogService(make_repo())
 
     # 3.调用核心逻辑
     post = service.create_from_markdown(
@@ -58,5 +192,188 @@ def main():
     print(f"  tags: {post.tags}")
 
 
+def run_sync(args) -> None:
+    from services.blog_service import BlogService
+    from services.content_sync import ContentManifest, sync_content_dir
+
+    directory = Path(args.dir)
+    # manifest 里记录的是数据库中的post id, 默认和数据库放在一起
+    manifest = ContentManifest(args.manifest or DATA_PATH / "content-manifest.json").load()
+
+    require_schema()
+    report = sync_content_dir(
+            BlogService(make_repo()),
+            directory,
+            manifest,
+            author_id=args.author_id,
+            default_tags=parse_tags(args.default_tags),
+            archive_missing=args.archive_missing,
+            )
+
+    print(
+        f"Synced {directory} in {report.elapsed * 1000:.1f}ms: "
+        f"{len(report.created)} created, {len(report.matched)} matched, {len(report.updated)} updated, "
+        f"{len(report.archived)} archived, {report.unchanged} unchanged"
+    )
+    for label, keys in (
+            ("created", report.created),
+            ("matched", report.matched),
+            ("updated", report.updated),
+            ("archived", report.archived),
+            ):
+        for key in keys:
+            print(f"  {label}: {key}")
+    for key in report.missing:
+        print(f"  missing (use --archive-missing to archive): {key}")
+    for error in report.errors:
+        print(f"  error: {error}")
+
+
+def run_export(args) -> None:
+    from services.blog_service import BlogService
+    from services.static_export import export_site
+
+    out_dir = Path(args.out)
+    require_schema()
+    report = export_site(BlogService(make_repo()), out_dir, page_size=args.page_size, force=args.force)
+
+    print(
+        f"Exported to {out_dir} in {report.elapsed * 1000:.1f}ms: "
+        f"{len(report.written)} written, {len(report.removed)} removed, "
+        f"{report.unchanged} unchanged, {report.posts_rendered} posts rendered"
+    )
+    if report.skipped:
+        print(f"Skipped {len(report.skipped)} posts whose slug cannot be used as a file name: {', '.join(report.skipped)}")
+    if args.verbose:
+        for label, keys in (("written", report.written), ("removed", report.removed)):
+            for key in keys:
+                print(f"  {label}: {key}")
+
+
+def run_migrate(args) -> None:
+    from infra.db import engine
+    from infra.migrations import backfill_rendered_html, migrate
+    from services.rendering import content_hash, render_markdown
+
+    migrate(engine)
+    rendered = backfill_rendered_html(render_markdown, content_hash)
+    print(f"Database schema is up to date, rendered {rendered} posts.")
+
+
+def run_reconcile_counts(args) -> None:
+    from infra.migrations import reconcile_counts
+
+    require_schema()
+    tag_diff, month_diff = reconcile_counts()
+    print(f"Reconciled counts: {len(tag_diff)} tags and {len(month_diff)} months corrected.")
+    for tag, (old, new) in sorted(tag_diff.items()):
+        print(f"  tag {tag}: {old} -> {new}")
+    for (year, month), (old, new) in sorted(month_diff.items()):
+        print(f"  archive {year}-{month:02d}: {old} -> {new}")
+
+
+def run_search_rebuild(args) -> None:
+    from infra import search
+    from infra.db import get_db
+
+    start = time.perf_counter()
+    with get_db() as db:
+        if not search.is_supported(db):
+            print("Full-text index is only available on SQLite.")
+            return
+        total = search.rebuild(db)
+    print(f"Indexed {total} published posts in {time.perf_counter() - start:.3f}s")
+
+
+def main(argv: List[str] | None = None):
+    logging.basicConfig(level=LOG_LEVEL, format="%(levelname)s %(name)s: %(message)s")
+    parser = argparse.ArgumentParser(description="Blog content management commands.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Import a markdown file as a blog post.")
+    source = import_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", "-f", help="Path to the markdown file.")
+    source.add_argument("--dir", "-d", help="Import every markdown file under this directory.")
+    import_parser.add_argument("--author-id", "-aid", type=int, required=True, help="Author ID.")
+    import_parser.add_argument(
+            "--default-title",
+            type=str,
+            default=None,
+            help="Default title if markdown parsing fails."
+            )
+    import_parser.add_argument(
+            "--default-tags",
+            type=str,
+            default=None,
+            help="comman-separated tags if markdown parsing fails",
+            )
+    import_parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Number of parser processes for --dir (default: cpu count).",
+            )
+    import_parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Posts written per transaction for --dir.",
+            )
+    import_parser.set_defaults(handler=run_import)
+
+    sync_parser = subparsers.add_parser("sync", help="Incrementally sync a content directory.")
+    sync_parser.add_argument("--dir", "-d", required=True, help="Content directory, e.g. ../content.")
+    sync_parser.add_argument("--author-id", "-aid", type=int, required=True, help="Author ID.")
+    sync_parser.add_argument(
+            "--manifest",
+            type=str,
+            default=None,
+            help="Manifest path (default: data/content-manifest.json).",
+            )
+    sync_parser.add_argument(
+            "--default-tags",
+            type=str,
+            default=None,
+            help="comman-separated tags if markdown parsing fails",
+            )
+    sync_parser.add_argument(
+            "--archive-missing",
+            action="store_true",
+            help="Archive posts whose source file has been removed.",
+            )
+    sync_parser.set_defaults(handler=run_sync)
+
+    export_parser = subparsers.add_parser("export", help="Pre-render published posts into static JSON/HTML files.")
+    export_parser.add_argument("--out", "-o", required=True, help="Output directory, e.g. ../blog-frontend/static/api.")
+    export_parser.add_argument("--page-size", type=int, default=10, help="Posts per listing page.")
+    export_parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Rewrite every file even if its inputs have not changed.",
+            )
+    export_parser.add_argument("--verbose", "-v", action="store_true", help="List written and removed files.")
+    export_parser.set_defaults(handler=run_export)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Create tables and backfill derived data.")
+    migrate_parser.set_defaults(handler=run_migrate)
+
+    reconcile_parser = subparsers.add_parser(
+            "reconcile-counts",
+            help="Recount tag and archive counters from the published posts.",
+            )
+    reconcile_parser.set_defaults(handler=run_reconcile_counts)
+
+    rebuild_parser = subparsers.add_parser("search-rebuild", help="Rebuild the full-text search index.")
+    rebuild_parser.set_defaults(handler=run_search_rebuild)
+
+    argv = sys.argv[1:] if argv is None else argv
+    # 兼容旧用法: python cli.py --file xxx.md -aid 1
+    if argv and argv[0].startswith("-") and argv[0] not in ("-h", "--help"):
+        argv = ["import", *argv]
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
 if __name__ == "__main__":
     main()
@@ -1,7 +1,10 @@
+import logging
 import os
 from pathlib import Path
 from dotenv import load_dotenv
 
+log = logging.getLogger(__name__)
+
 #############################
 # ROOT APPLICATION PATH
 ###############################
@@ -28,9 +31,46 @@ OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL", "https://api.chatanywhere.te
 DB_TYPE = os.getenv("DB_TYPE")
 
 if DB_TYPE:
-    print(f"环境变量加载成功，数据库类型为{DB_TYPE}, 项目根目录为{ROOT_PATH}")
+    log.info("环境变量加载成功，数据库类型为%s, 项目根目录为%s", DB_TYPE, ROOT_PATH)
 else:
-    print("环境变量加载失败, DB_TYPE没有设置或文件加载失败")
+    log.info("环境变量加载失败, DB_TYPE没有设置或文件加载失败")
+
+
+####################################
+# LOGGING
+####################################
+
+# 日志级别: DEBUG / INFO / WARNING / ERROR
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+
+
+####################################
+# DATABASE ENGINE
+####################################
+
+# 连接池: 并发请求超过 pool_size + max_overflow 时等待 pool_timeout 秒
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+# MySQL 会断开长时间空闲的连接(wait_timeout), 超过 recycle 秒的连接重新建立, 取出前先 ping
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "True").lower() == "true"
+
+# SQLite: 每个新连接上执行的 PRAGMA
+SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+# 写锁被占用时最多等待的毫秒数, 0 表示立即报 database is locked
+SQLITE_BUSY_TIMEOUT = int(os.environ.get("SQLITE_BUSY_TIMEOUT", "5000"))
+# 负数单位为 KiB: 默认 64MB 页缓存
+SQLITE_CACHE_SIZE = int(os.environ.get("SQLITE_CACHE_SIZE", "-65536"))
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# 读写分离: DATABASE_URL 指定写库(不设置时按 DB_TYPE / SQLITE_URL),
+# DATABASE_READ_URLS 为逗号分隔的只读副本, 不设置时读写都走写库
+DATABASE_URL = os.environ.get("DATABASE_URL", "")
+DATABASE_READ_URLS = [url.strip() for url in os.environ.get("DATABASE_READ_URLS", "").split(",") if url.strip()]
+# 副本连接失败后暂停使用的秒数, 期间读请求直接走写库
+DB_REPLICA_RETRY_SECONDS = float(os.environ.get("DB_REPLICA_RETRY_SECONDS", "30"))
 
 
 ########################################
@@ -40,6 +80,42 @@ DATA_PATH = ROOT_PATH / "data"
 
 
 
+####################################
+# UPLOAD
+####################################
+
+# 单个 markdown 上传的最大字节数, 超过时返回 413
+UPLOAD_MAX_BYTES = int(os.environ.get("UPLOAD_MAX_BYTES", str(2 * 1024 * 1024)))
+# 流式读取上传文件时每次读取的字节数
+UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+
+
+
+####################################
+# POST CACHE
+####################################
+
+# 进程内文章缓存的最大条目数, 0 表示关闭缓存
+POST_CACHE_SIZE = int(os.environ.get("POST_CACHE_SIZE", "1024"))
+# 缓存过期时间(秒)
+POST_CACHE_TTL = float(os.environ.get("POST_CACHE_TTL", "60"))
+
+
+
+####################################
+# FEEDS
+####################################
+
+# 前端站点地址和名称, 用于 RSS/Atom/sitemap 中的文章链接
+SITE_URL = os.environ.get("SITE_URL", "http://localhost:5173").rstrip("/")
+SITE_TITLE = os.environ.get("SITE_TITLE", "日志系统")
+# RSS/Atom 中的文章数
+FEED_ITEMS = int(os.environ.get("FEED_ITEMS", "20"))
+# 收不到失效消息的写入(例如没有配置 Redis 时其他进程的写入)最多这么多秒后重新生成
+FEED_CACHE_TTL = float(os.environ.get("FEED_CACHE_TTL", "300"))
+
+
+
 ####################################
 # REDIS
 ####################################
@@ -61,6 +137,9 @@ try:
 except ValueError:
     REDIS_SENTINEL_MAX_RETRY_COUNT = 2
 
+# 多个 worker 共享的文章缓存(REDIS_URL 为空时不使用), 过期时间(秒)
+REDIS_CACHE_TTL = int(os.environ.get("REDIS_CACHE_TTL", "300"))
+
 
 
 ####################################
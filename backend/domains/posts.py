@@ -1,10 +1,11 @@
 """
 业务模型,用于对文章对象做操作
 """
-from dataclasses import dataclass, field
+import re
+from dataclasses import dataclass, field, fields, replace
 from datetime import date, datetime
 from enum import Enum
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 class PostStatus(str, Enum):
     DRAFT = "draft"
@@ -23,6 +24,45 @@ class Post:
     created_at: datetime = field(default_factory=datetime.utcnow)
     updated_at: datetime = field(default_factory=datetime.utcnow)
     published_at: Optional[datetime] = None
+    # 保存时渲染好的HTML, 以及渲染时正文的hash, 正文变化后才需要重新渲染
+    content_html: str = ""
+    content_hash: str = ""
+    # 从存储中加载/保存后的字段快照, repo 据此只写入变化的字段
+    _snapshot: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
+
+    def mark_clean(self) -> None:
+        """
+        repo 加载或保存之后调用, 记录当前字段值
+        """
+        self._snapshot = self._field_values()
+
+    def dirty_fields(self) -> Optional[Dict[str, Any]]:
+        """
+        与快照相比发生变化的字段; None 表示没有快照(新建的文章), 需要写入全部字段
+        """
+        if self._snapshot is None:
+            return None
+        return {
+            name: value
+            for name, value in self._field_values().items()
+            if self._snapshot[name] != value
+        }
+
+    def snapshot_value(self, name: str) -> Any:
+        return None if self._snapshot is None else self._snapshot[name]
+
+    def clone(self) -> "Post":
+        """
+        副本(包括快照), 修改副本不会影响原对象
+        """
+        copy = replace(self, tags=list(self.tags))
+        copy._snapshot = self._snapshot
+        return copy
+
+    def _field_values(self) -> Dict[str, Any]:
+        values = {f.name: getattr(self, f.name) for f in fields(self) if f.init and f.name != "id"}
+        values["tags"] = list(self.tags)
+        return values
 
     def publish(self, now: Optional[datetime] = None):
         """
@@ -39,7 +79,6 @@ class Post:
         self.updated_at = now or datetime.utcnow()
 
     def update_content(self, title: str, content: str, tags: List[str], slug: Optional[str] = None, now: Optional[datetime] = None):
-        print(f"[domains]: 正在更新内容title: {title}, content: {content}")
         if title is not None:
             self.title = title
         if content is not None:
@@ -49,3 +88,125 @@ class Post:
         if slug is not None:
             self.slug = slug
         self.updated_at = now or datetime.utcnow()
+
+
+# 摘要长度(字符数)
+EXCERPT_LENGTH = 160
+
+# 单个标签的最大字符数, 与 post_tags.tag / tag_counts.tag 列的长度一致
+MAX_TAG_LENGTH = 64
+
+_MARKDOWN_LINK = re.compile(r"!?\[([^\]]*)\]\([^)]*\)")
+_MARKDOWN_NOISE = re.compile(r"[#>*_`~|-]+")
+
+def make_excerpt(content: str, length: int = EXCERPT_LENGTH) -> str:
+    """
+    去掉常见的markdown符号并压缩空白, 截取前 length 个字符作为摘要
+    """
+    text = _MARKDOWN_NOISE.sub(" ", _MARKDOWN_LINK.sub(r"\1", content))
+    text = " ".join(text.split())
+    if len(text) <= length:
+        return text
+    return text[:length].rstrip() + "…"
+
+
+@dataclass
+class PostSummary:
+    """
+    列表页使用的文章摘要, 不包含正文
+    """
+    id: int
+    author_id: int
+    title: str
+    slug: str
+    status: PostStatus
+    tags: List[str]
+    excerpt: str
+    created_at: datetime
+    updated_at: datetime
+    published_at: Optional[datetime] = None
+
+    @classmethod
+    def from_post(cls, post: Post) -> "PostSummary":
+        return cls(
+            id=post.id,
+            author_id=post.author_id,
+            title=post.title,
+            slug=post.slug,
+            status=post.status,
+            tags=post.tags,
+            excerpt=make_excerpt(post.content),
+            created_at=post.created_at,
+            updated_at=post.updated_at,
+            published_at=post.published_at,
+        )
+
+
+@dataclass
+class SearchHit:
+    """
+    全文检索的一条结果, snippet 是带 <mark> 高亮的片段(已转义)
+    """
+    id: int
+    author_id: int
+    title: str
+    slug: str
+    tags: List[str]
+    snippet: str
+    score: float
+    updated_at: datetime
+    published_at: Optional[datetime] = None
+
+
+@dataclass
+class PostMeta:
+    """
+    文章的元信息, 用于判断缓存是否新鲜, 不需要加载正文
+    """
+    id: int
+    slug: str
+    status: PostStatus
+    updated_at: datetime
+    published_at: Optional[datetime] = None
+
+    @classmethod
+    def from_post(cls, post: "Post | PostSummary") -> "PostMeta":
+        return cls(
+            id=post.id,
+            slug=post.slug,
+            status=post.status,
+            updated_at=post.updated_at,
+            published_at=post.published_at,
+        )
+
+
+@dataclass
+class TagCount:
+    """
+    标签及其已发布文章数(标签云), 从计数表直接读取
+    """
+    tag: str
+    count: int
+
+
+@dataclass
+class ArchiveMonth:
+    """
+    按发布时间(年/月)归档的已发布文章数
+    """
+    year: int
+    month: int
+    count: int
+
+
+@dataclass
+class BatchItemResult:
+    """
+    批量操作中一项的结果:
+     - status: created / published / unchanged / not_found / forbidden / invalid
+     - post 在成功时为保存后的文章, error 在失败时说明原因
+    """
+    index: int
+    status: str
+    post: Optional[Post] = None
+    error: Optional[str] = None
@@ -0,0 +1,136 @@
+"""
+标签和归档的计数表: 标签云和按年/月归档直接读取, 不需要遍历文章
+ - 只统计已发布的文章, 草稿和已归档(archived)的不计入
+ - 保存文章时根据保存前后的 (状态, 标签, 发布时间) 计算增量, 与文章在同一事务中写入
+ - 计数出现偏差时用 python cli.py reconcile-counts 按文章重新统计
+"""
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import Integer, String, delete, select, update
+from sqlalchemy.orm import Mapped, Session, mapped_column
+
+from domains.posts import MAX_TAG_LENGTH, ArchiveMonth, PostStatus, TagCount
+from infra.db import Base
+
+# 一篇文章在计数表中的位置: (标签, (年, 月)); 未发布的文章为 None
+PublishedState = Optional[Tuple[Tuple[str, ...], Optional[Tuple[int, int]]]]
+
+
+class TagCountORM(Base):
+    __tablename__ = "tag_counts"
+
+    tag: Mapped[str] = mapped_column(String(MAX_TAG_LENGTH), primary_key=True)
+    post_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<TagCountORM tag={self.tag!r} post_count={self.post_count}>"
+
+
+class ArchiveCountORM(Base):
+    __tablename__ = "archive_counts"
+
+    year: Mapped[int] = mapped_column(Integer, primary_key=True)
+    month: Mapped[int] = mapped_column(Integer, primary_key=True)
+    post_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<ArchiveCountORM {self.year}-{self.month:02d} post_count={self.post_count}>"
+
+
+def published_state(status, tags: Iterable[str], published_at: Optional[datetime]) -> PublishedState:
+    """
+    tags 需要已经去重和去掉空白(与 post_tags 一致)
+    """
+    if PostStatus(status) != PostStatus.PUBLISHED:
+        return None
+    month = (published_at.year, published_at.month) if published_at is not None else None
+    return tuple(tags), month
+
+
+def count_changes(changes: Iterable[Tuple[PublishedState, PublishedState]]) -> Tuple[Counter, Counter]:
+    """
+    (保存前, 保存后) -> 每个标签和每个月的增量, 已经抵消为 0 的不返回
+    """
+    tags: Counter = Counter()
+    months: Counter = Counter()
+    for before, after in changes:
+        for sign, state in ((-1, before), (1, after)):
+            if state is None:
+                continue
+            state_tags, month = state
+            for tag in state_tags:
+                tags[tag] += sign
+            if month is not None:
+                months[month] += sign
+    return (
+        Counter({tag: delta for tag, delta in tags.items() if delta}),
+        Counter({month: delta for month, delta in months.items() if delta}),
+    )
+
+
+def apply_changes(db: Session, changes: Iterable[Tuple[PublishedState, PublishedState]]) -> None:
+    """
+    在调用方的事务中更新计数, 由调用方提交
+    """
+    tags, months = count_changes(changes)
+    if tags:
+        _add_counts(db, TagCountORM, ("tag",), [{"tag": tag, "post_count": delta} for tag, delta in tags.items()])
+    if months:
+        _add_counts(
+                db,
+                ArchiveCountORM,
+                ("year", "month"),
+                [{"year": year, "month": month, "post_count": delta} for (year, month), delta in months.items()],
+                )
+    # 计数降到 0 的行删除, 读取时不用再过滤; 两个表的行数都只和标签/月份数有关
+    if any(delta < 0 for delta in tags.values()):
+        db.execute(delete(TagCountORM).where(TagCountORM.post_count <= 0))
+    if any(delta < 0 for delta in months.values()):
+        db.execute(delete(ArchiveCountORM).where(ArchiveCountORM.post_count <= 0))
+
+
+def _add_counts(db: Session, orm, keys: Tuple[str, ...], rows: List[dict]) -> None:
+    """
+    post_count += delta, 行不存在时插入; SQLite/MySQL 用一条 upsert 语句
+    """
+    table = orm.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(
+                index_elements=list(keys),
+                set_={"post_count": table.c.post_count + stmt.excluded.post_count},
+                )
+        db.execute(stmt, rows)
+        return
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        stmt = mysql_insert(table)
+        stmt = stmt.on_duplicate_key_update(post_count=table.c.post_count + stmt.inserted.post_count)
+        db.execute(stmt, rows)
+        return
+    for row in rows:
+        condition = [table.c[key] == row[key] for key in keys]
+        result = db.execute(update(table).where(*condition).values(post_count=table.c.post_count + row["post_count"]))
+        if result.rowcount == 0:
+            db.execute(table.insert().values(**row))
+
+
+def list_tag_counts(db: Session, *, limit: Optional[int] = None) -> List[TagCount]:
+    stmt = select(TagCountORM.tag, TagCountORM.post_count).order_by(TagCountORM.post_count.desc(), TagCountORM.tag)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return [TagCount(tag=tag, count=count) for tag, count in db.execute(stmt)]
+
+
+def list_archive_months(db: Session) -> List[ArchiveMonth]:
+    stmt = (
+        select(ArchiveCountORM.year, ArchiveCountORM.month, ArchiveCountORM.post_count)
+        .order_by(ArchiveCountORM.year.desc(), ArchiveCountORM.month.desc())
+    )
+    return [ArchiveMonth(year=year, month=month, count=count) for year, month, count in db.execute(stmt)]
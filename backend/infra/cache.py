@@ -0,0 +1,352 @@
+"""
+进程内缓存: 带过期时间的LRU, 以及包在 BasePostRepo 外面的读缓存
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional
+
+from domains.posts import ArchiveMonth, Post, PostMeta, PostStatus, PostSummary, SearchHit, TagCount
+from infra.posts import AsyncBasePostRepo, BasePostRepo
+
+_MISSING = object()
+
+class LRUCache:
+    """
+    容量有限的LRU, 每个条目在 ttl 秒后过期; 线程安全
+    on_remove(key, value) 在条目被淘汰、过期或 pop 时调用(clear 不调用), 调用时不持有锁
+    """
+    def __init__(
+            self,
+            maxsize: int,
+            ttl: float,
+            clock: Callable[[], float] = time.monotonic,
+            on_remove: Optional[Callable[[Hashable, Any], None]] = None,
+            ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._on_remove = on_remove
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return _MISSING
+            expires_at, value = item
+            if expires_at > self._clock():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+            self.misses += 1
+        self._removed([(key, value)])
+        return _MISSING
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        evicted = []
+        with self._lock:
+            self._data[key] = (self._clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                old_key, (_, old_value) = self._data.popitem(last=False)
+                evicted.append((old_key, old_value))
+                self.evictions += 1
+        self._removed(evicted)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            item = self._data.pop(key, None)
+        if item is not None:
+            self._removed([(key, item[1])])
+
+    def _removed(self, items: List[tuple[Hashable, Any]]) -> None:
+        if self._on_remove is not None:
+            for key, value in items:
+                self._on_remove(key, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class _PostCache:
+    """
+    CachedPostRepo / AsyncCachedPostRepo 共用的缓存状态和失效逻辑
+    """
+    def __init__(self, *, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self._posts = LRUCache(maxsize, ttl, clock, on_remove=self._forget_slug)
+        self._lists = LRUCache(maxsize, ttl, clock)
+        # 只记录仍在 _posts 中的文章, 条目被淘汰/过期时一起删除
+        self._slug_by_id: Dict[int, str] = {}
+        # 每次失效加一; 读数据库之前记下, 读完后变了说明期间有写入, 读到的可能是旧数据, 不写入缓存
+        self._generation = 0
+        # 每次清空列表缓存时加一; 由已发布文章生成的内容(RSS/sitemap)据此判断是否需要重新生成
+        self.published_version = 0
+
+    def _invalidate(self, post: Post) -> None:
+        self._generation += 1
+        old_slug = self._slug_by_id.pop(post.id, None)
+        if old_slug is not None:
+            self._posts.pop(old_slug)
+        self._posts.pop(post.slug)
+        if post.status != PostStatus.DRAFT:
+            self._clear_lists()
+
+    def _clear_lists(self) -> None:
+        self._lists.clear()
+        self.published_version += 1
+
+    def invalidate_all(self) -> None:
+        self._generation += 1
+        self._posts.clear()
+        self._clear_lists()
+        self._slug_by_id.clear()
+
+    def apply_invalidation(self, slugs: Optional[List[str]], lists: bool) -> None:
+        """
+        其他进程写入后广播的失效消息, slugs 为 None 时全部清空
+        """
+        if slugs is None:
+            self.invalidate_all()
+            return
+        self._generation += 1
+        for slug in slugs:
+            self._posts.pop(slug)
+        if lists:
+            self._clear_lists()
+
+    def _remember_post(self, slug: str, post: Post, generation: int) -> None:
+        if generation != self._generation:
+            return
+        self._slug_by_id[post.id] = slug
+        self._posts.set(slug, post)
+
+    def _remember_list(self, key: Hashable, result: tuple, generation: int) -> None:
+        if generation == self._generation:
+            self._lists.set(key, result)
+
+    def _forget_slug(self, slug: str, post: Post) -> None:
+        if self._slug_by_id.get(post.id) == slug:
+            del self._slug_by_id[post.id]
+
+    @staticmethod
+    def _copy(post: Post) -> Post:
+        # 返回副本, 调用方修改不会污染缓存
+        return post.clone()
+
+    @classmethod
+    def _copy_list(cls, items: tuple) -> list:
+        """
+        列表中的对象同样返回副本: Post 用 clone, 摘要等 dataclass 复制一层(包括 tags 列表)
+        """
+        copies = []
+        for item in items:
+            if isinstance(item, Post):
+                copies.append(cls._copy(item))
+            elif hasattr(item, "tags"):
+                copies.append(replace(item, tags=list(item.tags)))
+            else:
+                copies.append(replace(item))
+        return copies
+
+    @staticmethod
+    def _list_key(kind: str, kwargs: Dict[str, Any]) -> Hashable:
+        return (kind, tuple(sorted(kwargs.items())))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {"posts": self._posts.stats(), "lists": self._lists.stats()}
+
+
+class CachedPostRepo(_PostCache, BasePostRepo):
+    """
+    读缓存: slug -> Post, 列表查询 -> 结果
+    写操作(save/save_many)透传给内部repo, 然后只失效受影响的条目:
+     - 文章本身新旧两个slug
+     - 已发布/归档的文章变化时清空列表缓存(包括标签和归档计数), 草稿不会出现在列表中
+    get_post_by_id / get_post_by_content_hash 供写路径使用, 不走缓存
+    """
+    def __init__(self, repo: BasePostRepo, *, maxsize: int = 1024, ttl: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        super().__init__(maxsize=maxsize, ttl=ttl, clock=clock)
+        self.repo = repo
+
+    ########################
+    # 写
+    ########################
+    def save(self, post: Post) -> Post:
+        saved = self.repo.save(post)
+        self._invalidate(saved)
+        return saved
+
+    def save_many(self, posts: List[Post]) -> List[Post]:
+        saved = self.repo.save_many(posts)
+        for post in saved:
+            self._invalidate(post)
+        return saved
+
+    ########################
+    # 读
+    ########################
+    def get_post_by_id(self, post_id: int) -> Optional[Post]:
+        return self.repo.get_post_by_id(post_id)
+
+    def get_posts_by_ids(self, post_ids: Iterable[int]) -> List[Post]:
+        return self.repo.get_posts_by_ids(post_ids)
+
+    def get_post_by_content_hash(self, author_id: int, content_hash: str) -> Optional[Post]:
+        return self.repo.get_post_by_content_hash(author_id, content_hash)
+
+    def find_slugs_with_prefix(self, base: str) -> set[str]:
+        return self.repo.find_slugs_with_prefix(base)
+
+    def find_slugs_with_prefixes(self, bases: Iterable[str]) -> set[str]:
+        return self.repo.find_slugs_with_prefixes(bases)
+
+    def get_post_by_slug(self, slug: str) -> Optional[Post]:
+        post = self._posts.get(slug)
+        if post is _MISSING:
+            generation = self._generation
+            post = self.repo.get_post_by_slug(slug)
+            if post is None:
+                return None
+            self._remember_post(slug, post, generation)
+        return self._copy(post)
+
+    def get_post_meta_by_slug(self, slug: str) -> Optional[PostMeta]:
+        # 已缓存的文章直接用来判断新鲜度, 不用访问数据库
+        post = self._posts.get(slug)
+        if post is not _MISSING:
+            return PostMeta.from_post(post)
+        return self.repo.get_post_meta_by_slug(slug)
+
+    def list_published_meta(self, **kwargs) -> List[PostMeta]:
+        return self._cached_list("meta", self.repo.list_published_meta, kwargs)
+
+    def search(self, query: str, **kwargs) -> List[SearchHit]:
+        return self.repo.search(query, **kwargs)
+
+    def list_published(self, **kwargs) -> List[Post]:
+        return self._cached_list("posts", self.repo.list_published, kwargs)
+
+    def list_published_summaries(self, **kwargs) -> List[PostSummary]:
+        return self._cached_list("summaries", self.repo.list_published_summaries, kwargs)
+
+    def list_tag_counts(self, **kwargs) -> List[TagCount]:
+        return self._cached_list("tags", self.repo.list_tag_counts, kwargs)
+
+    def list_archive_months(self) -> List[ArchiveMonth]:
+        return self._cached_list("archive", self.repo.list_archive_months, {})
+
+    def _cached_list(self, kind: str, load: Callable[..., list], kwargs: Dict[str, Any]) -> list:
+        key = self._list_key(kind, kwargs)
+        result = self._lists.get(key)
+        if result is _MISSING:
+            generation = self._generation
+            result = tuple(load(**kwargs))
+            self._remember_list(key, result, generation)
+        return self._copy_list(result)
+
+
+class AsyncCachedPostRepo(_PostCache, AsyncBasePostRepo):
+    """
+    CachedPostRepo 的异步版本, 包在 AsyncBasePostRepo 外面
+    缓存命中时不访问数据库也不需要 await
+    """
+    def __init__(self, repo: AsyncBasePostRepo, *, maxsize: int = 1024, ttl: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        super().__init__(maxsize=maxsize, ttl=ttl, clock=clock)
+        self.repo = repo
+
+    ########################
+    # 写
+    ########################
+    async def save(self, post: Post) -> Post:
+        saved = await self.repo.save(post)
+        self._invalidate(saved)
+        return saved
+
+    async def save_many(self, posts: List[Post]) -> List[Post]:
+        saved = await self.repo.save_many(posts)
+        for post in saved:
+            self._invalidate(post)
+        return saved
+
+    ########################
+    # 读
+    ########################
+    async def get_post_by_id(self, post_id: int) -> Optional[Post]:
+        return await self.repo.get_post_by_id(post_id)
+
+    async def get_posts_by_ids(self, post_ids: Iterable[int]) -> List[Post]:
+        return await self.repo.get_posts_by_ids(post_ids)
+
+    async def get_post_by_content_hash(self, author_id: int, content_hash: str) -> Optional[Post]:
+        return await self.repo.get_post_by_content_hash(author_id, content_hash)
+
+    async def find_slugs_with_prefix(self, base: str) -> set[str]:
+        return await self.repo.find_slugs_with_prefix(base)
+
+    async def find_slugs_with_prefixes(self, bases: Iterable[str]) -> set[str]:
+        return await self.repo.find_slugs_with_prefixes(bases)
+
+    async def get_post_by_slug(self, slug: str) -> Optional[Post]:
+        post = self._posts.get(slug)
+        if post is _MISSING:
+            generation = self._generation
+            post = await self.repo.get_post_by_slug(slug)
+            if post is None:
+                return None
+            self._remember_post(slug, post, generation)
+        return self._copy(post)
+
+    async def get_post_meta_by_slug(self, slug: str) -> Optional[PostMeta]:
+        post = self._posts.get(slug)
+        if post is not _MISSING:
+            return PostMeta.from_post(post)
+        return await self.repo.get_post_meta_by_slug(slug)
+
+    async def list_published_meta(self, **kwargs) -> List[PostMeta]:
+        return await self._cached_list("meta", self.repo.list_published_meta, kwargs)
+
+    async def search(self, query: str, **kwargs) -> List[SearchHit]:
+        return await self.repo.search(query, **kwargs)
+
+    async def list_published(self, **kwargs) -> List[Post]:
+        return await self._cached_list("posts", self.repo.list_published, kwargs)
+
+    async def list_published_summaries(self, **kwargs) -> List[PostSummary]:
+        return await self._cached_list("summaries", self.repo.list_published_summaries, kwargs)
+
+    async def list_tag_counts(self, **kwargs) -> List[TagCount]:
+        return await self._cached_list("tags", self.repo.list_tag_counts, kwargs)
+
+    async def list_archive_months(self) -> List[ArchiveMonth]:
+        return await self._cached_list("archive", self.repo.list_archive_months, {})
+
+    async def _cached_list(self, kind: str, load: Callable[..., Awaitable[list]], kwargs: Dict[str, Any]) -> list:
+        key = self._list_key(kind, kwargs)
+        result = self._lists.get(key)
+        if result is _MISSING:
+            generation = self._generation
+            result = tuple(await load(**kwargs))
+            self._remember_list(key, result, generation)
+        return self._copy_list(result)
@@ -4,14 +4,37 @@
 import os
 import json
 import logging
-from contextlib import contextmanager
-from typing import Any, Optional
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from itertools import count
+from typing import Any, Iterator, List, Optional
 
-from sqlalchemy import Dialect, create_engine, types
-from sqlalchemy.orm import scoped_session, sessionmaker, declarative_base
+from sqlalchemy import Dialect, Engine, URL, create_engine, event, make_url, types
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session as OrmSession, sessionmaker, declarative_base
 from sqlalchemy.sql.type_api import _T
 
-from config import DATA_PATH, DB_TYPE
+from config import (
+    DATA_PATH,
+    DATABASE_READ_URLS,
+    DATABASE_URL as CONFIGURED_DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_REPLICA_RETRY_SECONDS,
+    DB_TYPE,
+    SQLITE_BUSY_TIMEOUT,
+    SQLITE_CACHE_SIZE,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_MMAP_SIZE,
+    SQLITE_SYNCHRONOUS,
+)
 
 log = logging.getLogger(__name__)
 
@@ -28,34 +51,324 @@ class JSONField(types.TypeDecorator):
         if value is not None:
             return json.loads(value)
 
-if DB_TYPE == "mysql":
-    # 数据库连接初始化
-    print("使用mysql作为数据库")
-    username = "utcssc"
-    password = "UTCsoft_1234"
-    host="localhost:33060"
-    database="tender_data"
-    
-    DATABASE_URL = f"mysql+pymysql://{username}:{password}@{host}/{database}"
-else:
-    print("使用sqlite作为数据库")
-    DATABASE_URL = os.getenv("SQLITE_URL", f"sqlite:///{str(DATA_PATH)}/test.db")
+def async_url(url: str | URL) -> URL:
+    """
+    同一个数据库的异步驱动地址
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    if backend == "mysql":
+        return url.set(drivername="mysql+aiomysql")
+    return url
 
 
-engine = create_engine(DATABASE_URL, json_serializer=lambda obj: json.dumps(obj,ensure_ascii=False))
+def resolve_database_url() -> str:
+    """
+    写库地址: DATABASE_URL, 否则按 DB_TYPE 选择 mysql 或 SQLITE_URL
+    """
+    if CONFIGURED_DATABASE_URL:
+        log.info("使用 DATABASE_URL 作为写库")
+        return CONFIGURED_DATABASE_URL
+    if DB_TYPE == "mysql":
+        # 数据库连接初始化
+        log.info("使用mysql作为数据库")
+        username = "utcssc"
+        password = "UTCsoft_1234"
+        host="localhost:33060"
+        database="tender_data"
+
+        return f"mysql+pymysql://{username}:{password}@{host}/{database}"
+    log.info("使用sqlite作为数据库")
+    return os.getenv("SQLITE_URL", f"sqlite:///{str(DATA_PATH)}/test.db")
+
+
+def engine_options(url: URL) -> dict:
+    """
+    连接池参数; 内存数据库使用单连接池, 不能设置池大小
+    """
+    options = {"json_serializer": lambda obj: json.dumps(obj, ensure_ascii=False)}
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return options
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+    if url.get_backend_name() == "mysql":
+        options.update(pool_recycle=DB_POOL_RECYCLE, pool_pre_ping=DB_POOL_PRE_PING)
+    return options
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """
+    connect 事件: 每个新建的 SQLite 连接上设置 WAL、同步级别、缓存和忙等待
+    WAL 模式下读不阻塞写, busy_timeout 让并发写入排队等锁而不是直接报 database is locked
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout = {int(SQLITE_BUSY_TIMEOUT)}")
+        cursor.execute(f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA cache_size = {int(SQLITE_CACHE_SIZE)}")
+        cursor.execute(f"PRAGMA mmap_size = {int(SQLITE_MMAP_SIZE)}")
+    finally:
+        cursor.close()
+
+
+########################
+# 读写分离
+########################
+@dataclass
+class RoutingScope:
+    """
+    一次请求(或一个命令行进程)内的路由状态: 写入过之后, 后续读取都走写库
+    """
+    wrote: bool = False
+
+
+# 中间件在请求开始时放入新的 RoutingScope; 没有请求时(命令行)使用进程级的 scope
+_routing_scope: ContextVar[Optional[RoutingScope]] = ContextVar("routing_scope", default=None)
+_process_scope = RoutingScope()
+
+
+def start_routing_scope() -> RoutingScope:
+    scope = RoutingScope()
+    _routing_scope.set(scope)
+    return scope
+
+
+def current_routing_scope() -> RoutingScope:
+    return _routing_scope.get() or _process_scope
+
+
+class WriterSession(OrmSession):
+    """
+    写库的 Session, 提交后把当前 scope 标记为已写入(read-your-writes)
+    """
+
+
+@event.listens_for(WriterSession, "after_commit")
+def _mark_written(session) -> None:
+    current_routing_scope().wrote = True
+
+
+class ReplicaSet:
+    """
+    轮询选择副本; 连接失败的副本在 retry_seconds 内跳过
+    """
+    def __init__(self, size: int, retry_seconds: float):
+        self.size = size
+        self.retry_seconds = retry_seconds
+        self._counter = count()
+        self._down_until = [0.0] * size
+        self._lock = threading.Lock()
+
+    def order(self) -> Iterator[int]:
+        with self._lock:
+            start = next(self._counter) % self.size if self.size else 0
+        now = time.monotonic()
+        for offset in range(self.size):
+            index = (start + offset) % self.size
+            if self._down_until[index] <= now:
+                yield index
+
+    def mark_down(self, index: int) -> None:
+        self._down_until[index] = time.monotonic() + self.retry_seconds
+
+
+@dataclass
+class Database:
+    """
+    engine 和 sessionmaker; 第一次使用时才创建, 导入模块不会连接数据库
+    """
+    url: str
+    # 同步engine: 命令行工具和迁移使用
+    engine: Engine
+    # 异步engine: web 请求使用, 等待数据库时不占用线程
+    async_engine: AsyncEngine
+    # 只读副本, 与写库使用相同的连接池参数
+    read_engines: List[Engine]
+    async_read_engines: List[AsyncEngine]
+    SessionLocal: sessionmaker
+    AsyncSessionLocal: async_sessionmaker
+    ReadSessionLocals: List[sessionmaker]
+    AsyncReadSessionLocals: List[async_sessionmaker]
+    replicas: ReplicaSet
+
+    def sync_engines(self) -> List[Engine]:
+        """
+        所有 engine 的同步版本, 用于挂事件钩子
+        """
+        return [self.engine, self.async_engine.sync_engine, *self.read_engines, *(e.sync_engine for e in self.async_read_engines)]
+
+
+def create_database(url: Optional[str] = None) -> Database:
+    url = url or resolve_database_url()
+    engine = create_engine(url, **engine_options(make_url(url)))
+    async_engine = create_async_engine(async_url(url), **engine_options(async_url(url)))
+    read_engines = [create_engine(u, **engine_options(make_url(u))) for u in DATABASE_READ_URLS]
+    async_read_engines = [create_async_engine(async_url(u), **engine_options(async_url(u))) for u in DATABASE_READ_URLS]
+    if read_engines:
+        log.info("读请求分配到 %d 个只读副本", len(read_engines))
+
+    database = Database(
+            url=url,
+            engine=engine,
+            async_engine=async_engine,
+            read_engines=read_engines,
+            async_read_engines=async_read_engines,
+            SessionLocal=sessionmaker(
+                autocommit=False, autoflush=False, bind=engine, expire_on_commit=False, class_=WriterSession
+                ),
+            AsyncSessionLocal=async_sessionmaker(
+                async_engine, autoflush=False, expire_on_commit=False, sync_session_class=WriterSession
+                ),
+            ReadSessionLocals=[
+                sessionmaker(autocommit=False, autoflush=False, bind=e, expire_on_commit=False)
+                for e in read_engines
+                ],
+            AsyncReadSessionLocals=[
+                async_sessionmaker(e, autoflush=False, expire_on_commit=False)
+                for e in async_read_engines
+                ],
+            replicas=ReplicaSet(len(read_engines), DB_REPLICA_RETRY_SECONDS),
+            )
+    for sync_engine in database.sync_engines():
+        if sync_engine.dialect.name == "sqlite":
+            event.listen(sync_engine, "connect", set_sqlite_pragmas)
+    return database
+
+
+_database: Optional[Database] = None
+_database_lock = threading.Lock()
+
+
+def get_database() -> Database:
+    """
+    进程内共用的 Database, 第一次调用时创建
+    """
+    global _database
+    if _database is None:
+        with _database_lock:
+            if _database is None:
+                _database = create_database()
+    return _database
+
+
+async def dispose_database() -> None:
+    """
+    关闭连接池(应用退出时调用), 之后再使用会重新创建
+    """
+    global _database
+    database, _database = _database, None
+    if database is None:
+        return
+    for e in database.read_engines:
+        e.dispose()
+    database.engine.dispose()
+    for e in [database.async_engine, *database.async_read_engines]:
+        await e.dispose()
+
+
+# 兼容旧的模块属性: from infra.db import engine 时才创建 engine
+_DATABASE_ATTRIBUTES = {
+    "engine",
+    "async_engine",
+    "read_engines",
+    "async_read_engines",
+    "SessionLocal",
+    "AsyncSessionLocal",
+    "ReadSessionLocals",
+    "AsyncReadSessionLocals",
+    "replicas",
+}
+
+
+def __getattr__(name: str):
+    if name in _DATABASE_ATTRIBUTES:
+        return getattr(get_database(), name)
+    if name == "DATABASE_URL":
+        return get_database().url
+    if name == "ASYNC_DATABASE_URL":
+        return async_url(get_database().url)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-SessionLocal = sessionmaker(
-        autocommit=False, autoflush=False, bind=engine, expire_on_commit=False
-        )
 
 Base = declarative_base()
-Session = scoped_session(SessionLocal)
 
 def get_session():
-    db = SessionLocal()
+    db = get_database().SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
 get_db = contextmanager(get_session)
+
+
+async def get_async_session():
+    db = get_database().AsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+get_async_db = asynccontextmanager(get_async_session)
+
+
+def _use_writer(database: Database) -> bool:
+    return not database.replicas.size or current_routing_scope().wrote
+
+
+@contextmanager
+def get_read_db():
+    """
+    只读查询使用的 Session: 轮询副本, 副本不可用或当前 scope 已写入时使用写库
+    """
+    database = get_database()
+    replicas = database.replicas
+    if not _use_writer(database):
+        for index in replicas.order():
+            db = database.ReadSessionLocals[index]()
+            try:
+                db.connection()
+            except DBAPIError as e:
+                log.warning("只读副本 %d 连接失败, %.0f 秒内改用写库: %s", index, replicas.retry_seconds, e.orig)
+                replicas.mark_down(index)
+                db.close()
+                continue
+            try:
+                yield db
+            finally:
+                db.close()
+            return
+    with get_db() as db:
+        yield db
+
+
+@asynccontextmanager
+async def get_async_read_db():
+    """
+    get_read_db 的异步版本
+    """
+    database = get_database()
+    replicas = database.replicas
+    if not _use_writer(database):
+        for index in replicas.order():
+            db = database.AsyncReadSessionLocals[index]()
+            try:
+                await db.connection()
+            except DBAPIError as e:
+                log.warning("只读副本 %d 连接失败, %.0f 秒内改用写库: %s", index, replicas.retry_seconds, e.orig)
+                replicas.mark_down(index)
+                await db.close()
+                continue
+            try:
+                yield db
+            finally:
+                await db.close()
+            return
+    async with get_async_db() as db:
+        yield db
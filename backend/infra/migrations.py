@@ -0,0 +1,191 @@
+"""
+数据库迁移: 建表以及已有数据的回填, 所有步骤都可以重复执行
+"""
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import Engine, delete, extract, func, inspect, insert, select, text, update
+
+from domains.posts import PostStatus
+from infra.aggregates import ArchiveCountORM, TagCountORM
+from infra.db import Base, get_db
+from infra.posts import PostORM, PostTagORM, _tags_str_to_list
+
+log = logging.getLogger(__name__)
+
+def add_missing_columns(engine: Engine) -> None:
+    """
+    create_all 不会修改已有的表, 新增的(可为空的)列在这里用 ALTER TABLE 补上
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                log.info("adding column %s.%s", table.name, column.name)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
+
+def ensure_indexes(engine: Engine) -> None:
+    """
+    create_all 只会给新建的表建索引, 已有的表在这里补上新增的索引
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def backfill_post_tags() -> int:
+    """
+    把 posts.tags 中逗号分隔的标签迁移到 post_tags 关联表
+    只处理还没有关联记录的文章, 返回写入的行数
+    """
+    with get_db() as db:
+        has_rows = select(PostTagORM.post_id).where(PostTagORM.post_id == PostORM.id).exists()
+        stmt = (
+            select(PostORM.id, PostORM.tags, PostORM.published_at)
+            .where(PostORM.tags != "")
+            .where(~has_rows)
+        )
+        rows = [
+            {"post_id": post_id, "tag": tag, "published_at": published_at}
+            for post_id, tags, published_at in db.execute(stmt)
+            for tag in dict.fromkeys(_tags_str_to_list(tags))
+        ]
+        if rows:
+            db.execute(insert(PostTagORM), rows)
+            db.commit()
+        log.info("backfilled %s post_tags rows", len(rows))
+        return len(rows)
+
+
+def backfill_rendered_html(
+        render: Callable[[str], str],
+        hash_content: Callable[[str], str],
+        batch_size: int = 200,
+        ) -> int:
+    """
+    为还没有渲染过(或正文已经变化)的文章生成 content_html, 返回处理的文章数
+    渲染函数由调用方传入, infra 不依赖 services
+    """
+    done = 0
+    last_id = 0
+    with get_db() as db:
+        while True:
+            stmt = (
+                select(PostORM.id, PostORM.content, PostORM.content_hash)
+                .where(PostORM.id > last_id)
+                .order_by(PostORM.id)
+                .limit(batch_size)
+            )
+            rows = db.execute(stmt).all()
+            if not rows:
+                break
+            for post_id, content, old_hash in rows:
+                new_hash = hash_content(content)
+                if new_hash == old_hash:
+                    continue
+                db.execute(
+                    update(PostORM)
+                    .where(PostORM.id == post_id)
+                    .values(content_html=render(content), content_hash=new_hash)
+                )
+                done += 1
+            db.commit()
+            last_id = rows[-1].id
+    log.info("rendered %s posts", done)
+    return done
+
+
+def reconcile_counts() -> Tuple[Dict[str, Tuple[int, int]], Dict[Tuple[int, int], Tuple[int, int]]]:
+    """
+    按 posts / post_tags 重新统计标签和归档计数, 覆盖计数表
+    返回有偏差的 标签 -> (原计数, 正确计数) 和 (年, 月) -> (原计数, 正确计数)
+    """
+    published = PostORM.status == PostStatus.PUBLISHED.value
+    year = extract("year", PostORM.published_at)
+    month = extract("month", PostORM.published_at)
+    with get_db() as db:
+        tags = dict(db.execute(
+            select(PostTagORM.tag, func.count())
+            .join(PostORM, PostORM.id == PostTagORM.post_id)
+            .where(published)
+            .group_by(PostTagORM.tag)
+        ).all())
+        months = {
+            (int(y), int(m)): count
+            for y, m, count in db.execute(
+                select(year, month, func.count())
+                .where(published, PostORM.published_at.is_not(None))
+                .group_by(year, month)
+            )
+        }
+        old_tags = dict(db.execute(select(TagCountORM.tag, TagCountORM.post_count)).all())
+        old_months = {
+            (y, m): count
+            for y, m, count in db.execute(select(ArchiveCountORM.year, ArchiveCountORM.month, ArchiveCountORM.post_count))
+        }
+
+        tag_diff = {
+            tag: (old_tags.get(tag, 0), tags.get(tag, 0))
+            for tag in old_tags.keys() | tags.keys()
+            if old_tags.get(tag, 0) != tags.get(tag, 0)
+        }
+        month_diff = {
+            key: (old_months.get(key, 0), months.get(key, 0))
+            for key in old_months.keys() | months.keys()
+            if old_months.get(key, 0) != months.get(key, 0)
+        }
+        if tag_diff or month_diff:
+            db.execute(delete(TagCountORM))
+            db.execute(delete(ArchiveCountORM))
+            if tags:
+                db.execute(insert(TagCountORM), [{"tag": t, "post_count": c} for t, c in tags.items()])
+            if months:
+                db.execute(
+                    insert(ArchiveCountORM),
+                    [{"year": y, "month": m, "post_count": c} for (y, m), c in months.items()],
+                )
+            db.commit()
+        log.info("reconciled counts: %s tags and %s months corrected", len(tag_diff), len(month_diff))
+        return tag_diff, month_diff
+
+
+def missing_tables(engine: Engine) -> List[str]:
+    """
+    还没有创建的表; 不为空时需要先执行 python cli.py migrate
+    """
+    existing = set(inspect(engine).get_table_names())
+    return [table.name for table in Base.metadata.sorted_tables if table.name not in existing]
+
+
+def rebuild_search_index_if_needed() -> Optional[str]:
+    """
+    全文索引缺失、不完整或者是旧格式时重建, 返回重建的原因(没有重建时为 None)
+    """
+    from infra import search
+
+    with get_db() as db:
+        if not search.is_supported(db):
+            return None
+        reason = search.rebuild_reason(db)
+        if reason is None:
+            return None
+        total = search.rebuild(db)
+        log.info("rebuilt search index (%s): %s posts", reason, total)
+        return reason
+
+
+def migrate(engine: Engine) -> None:
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
+    ensure_indexes(engine)
+    backfill_post_tags()
+    reconcile_counts()
+    rebuild_search_index_if_needed()
@@ -1,18 +1,35 @@
-from typing import Dict, Protocol, List, Optional
+import logging
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+from itertools import islice
+from typing import Any, Dict, Iterable, Protocol, List, Optional
 from datetime import datetime
 
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Mapped, Session, mapped_column, relationship, selectinload
 from sqlalchemy import (
+    ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     DateTime,
+    delete,
+    insert,
+    or_,
     select,
-    func
+    func,
+    update,
 )
 
-from infra.db import get_db, Base
-from domains.posts import PostStatus, Post
+from infra import aggregates, search as fts
+from infra.db import get_async_db, get_async_read_db, get_db, get_read_db, Base
+from domains.posts import EXCERPT_LENGTH, MAX_TAG_LENGTH, ArchiveMonth, PostStatus, Post, PostMeta, PostSummary, SearchHit, TagCount, make_excerpt
+
+logger = logging.getLogger(__name__)
+
+# 列表分页游标: 上一页最后一篇文章的 (published_at, id)
+Cursor = tuple[datetime, int]
 
 ########################################
 #  ORM 模型
@@ -33,10 +50,51 @@ class PostORM(Base):
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     published_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
+    content_html: Mapped[str | None] = mapped_column(Text, nullable=True)
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+
+    # 标签的规范化存储, 用于按标签筛选; tags 字段保留用于直接读取
+    tag_rows: Mapped[List["PostTagORM"]] = relationship(
+            back_populates="post",
+            cascade="all, delete-orphan",
+            )
+
+    __table_args__ = (
+        # 列表页按 (published_at, id) 倒序, 游标分页直接在索引上定位
+        Index("ix_posts_status_published_at_id", "status", "published_at", "id"),
+        # 上传去重: 按作者和正文hash查找已有文章
+        Index("ix_posts_author_id_content_hash", "author_id", "content_hash"),
+    )
+
     def __repr__(self) -> str:
         return f"<PostORM id={self.id} title={self.title!r}>"
 
 
+class PostTagORM(Base):
+    """
+    文章-标签关联表, published_at 冗余一份, 让 (tag, published_at) 索引可以直接完成标签页的筛选和排序
+    """
+    __tablename__ = "post_tags"
+    __table_args__ = (
+        Index("ix_post_tags_tag_published_at", "tag", "published_at"),
+    )
+
+    post_id: Mapped[int] = mapped_column(ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    tag: Mapped[str] = mapped_column(String(MAX_TAG_LENGTH), primary_key=True)
+    published_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    post: Mapped[PostORM] = relationship(back_populates="tag_rows")
+
+    def __repr__(self) -> str:
+        return f"<PostTagORM post_id={self.post_id} tag={self.tag!r}>"
+
+
+class SlugConflictError(Exception):
+    """
+    保存时slug与已有文章冲突(并发创建同名文章时会出现)
+    """
+
+
 #######################################
 #  操作方法
 ###################################
@@ -45,12 +103,40 @@ class BasePostRepo(Protocol):
         """
         保存 新建文章
         """
+    def save_many(self, posts: List[Post]) -> List[Post]:
+        """
+        批量保存, 在同一个事务中提交
+        """
     def get_post_by_id(self, post_id: int) -> Optional[Post]:
         ...
 
+    def get_posts_by_ids(self, post_ids: Iterable[int]) -> List[Post]:
+        """
+        一次查询取出多篇文章, 不存在的id直接忽略, 不保证顺序
+        """
+        ...
+
     def get_post_by_slug(self, slug: str) -> Optional[Post]:
         ...
 
+    def get_post_by_content_hash(self, author_id: int, content_hash: str) -> Optional[Post]:
+        """
+        该作者正文hash相同的文章(任意状态), 用于上传去重
+        """
+        ...
+
+    def find_slugs_with_prefix(self, base: str) -> set[str]:
+        """
+        一次查询返回 base 本身以及所有 base-xxx 形式的slug
+        """
+        ...
+
+    def find_slugs_with_prefixes(self, bases: Iterable[str]) -> set[str]:
+        """
+        find_slugs_with_prefix 的批量版本, 批量创建时一起分配slug
+        """
+        ...
+
     def list_published(
             self,
             *,
@@ -59,13 +145,125 @@ class BasePostRepo(Protocol):
             tag: Optional[str] = None,
             author_id: Optional[int] = None,
             published_before: Optional[datetime] = None,
+            cursor: Optional[Cursor] = None,
             ) -> List[Post]:
+        """
+        按 (published_at, id) 倒序返回已发布文章, cursor 不为空时从该位置之后开始
+        """
+        ...
+
+    def list_published_summaries(
+            self,
+            *,
+            limit: int=10,
+            offset: int = 0,
+            tag: Optional[str] = None,
+            author_id: Optional[int] = None,
+            published_before: Optional[datetime] = None,
+            cursor: Optional[Cursor] = None,
+            ) -> List[PostSummary]:
+        """
+        与 list_published 相同的筛选, 但不加载正文
+        """
+        ...
+
+    def get_post_meta_by_slug(self, slug: str) -> Optional[PostMeta]:
+        """
+        只查询元信息(id/status/updated_at), 用于条件请求
+        """
+        ...
+
+    def list_published_meta(self, **filters) -> List[PostMeta]:
+        """
+        与 list_published 相同的筛选, 只返回元信息
+        """
+        ...
+
+    def search(self, query: str, *, limit: int = 10, offset: int = 0) -> List[SearchHit]:
+        """
+        在已发布文章的标题和正文中全文检索, 按相关度排序
+        """
+        ...
+
+    def list_tag_counts(self, *, limit: Optional[int] = None) -> List[TagCount]:
+        """
+        每个标签的已发布文章数, 按文章数倒序; 从计数表读取, 与文章数无关
+        """
+        ...
+
+    def list_archive_months(self) -> List[ArchiveMonth]:
+        """
+        每个月的已发布文章数, 按年月倒序
+        """
+        ...
+
+class AsyncBasePostRepo(Protocol):
+    """
+    BasePostRepo 的异步版本, 方法和语义相同
+    """
+    async def save(self, post: Post) -> Post:
+        ...
+
+    async def save_many(self, posts: List[Post]) -> List[Post]:
+        ...
+
+    async def get_post_by_id(self, post_id: int) -> Optional[Post]:
+        ...
+
+    async def get_posts_by_ids(self, post_ids: Iterable[int]) -> List[Post]:
+        ...
+
+    async def get_post_by_slug(self, slug: str) -> Optional[Post]:
+        ...
+
+    async def get_post_by_content_hash(self, author_id: int, content_hash: str) -> Optional[Post]:
+        ...
+
+    async def find_slugs_with_prefix(self, base: str) -> set[str]:
+        ...
+
+    async def find_slugs_with_prefixes(self, bases: Iterable[str]) -> set[str]:
+        ...
+
+    async def list_published(self, **filters) -> List[Post]:
+        ...
+
+    async def list_published_summaries(self, **filters) -> List[PostSummary]:
+        ...
+
+    async def get_post_meta_by_slug(self, slug: str) -> Optional[PostMeta]:
+        ...
+
+    async def list_published_meta(self, **filters) -> List[PostMeta]:
+        ...
+
+    async def search(self, query: str, *, limit: int = 10, offset: int = 0) -> List[SearchHit]:
+        ...
+
+    async def list_tag_counts(self, *, limit: Optional[int] = None) -> List[TagCount]:
+        ...
+
+    async def list_archive_months(self) -> List[ArchiveMonth]:
         ...
 
 class testPostRepo(BasePostRepo):
+    """
+    内存实现, 用于测试/预览/边缘缓存
+     - 保存和读取都是副本, 与数据库一样修改返回的对象不会影响已保存的数据
+     - save 时维护索引: slug / (作者, 内容hash) 字典, 有序的 slug 列表,
+       以及全部/每个标签/每个作者的已发布文章列表, 按 (发布时间, id) 升序由 bisect 维护
+     - 按slug查找 O(1), 列表 O(log n + k)
+    """
     def __init__(self):
         self._posts: Dict[int, Post] = {}
         self._next_id: int = 1
+        self._by_slug: Dict[str, int] = {}
+        self._by_content_hash: Dict[tuple[int, str], int] = {}
+        self._sorted_slugs: List[str] = []
+        self._published: List[Cursor] = []
+        self._published_by_tag: Dict[str, List[Cursor]] = {}
+        self._published_by_author: Dict[int, List[Cursor]] = {}
+        self._archive_counts: Dict[tuple[int, int], int] = {}
 
     def next_id(self) -> int:
         nid = self._next_id
@@ -73,108 +271,792 @@ class testPostRepo(BasePostRepo):
         return nid
 
     def save(self, post: Post) -> Post:
-        if post.id is None:
-            post.id = self.next_id()
-        self._posts[post.id] = post
+        owner = self._by_slug.get(post.slug)
+        if owner is not None and owner != post.id:
+            raise SlugConflictError(post.slug)
+        self._store(post)
         return post
 
+    def save_many(self, posts: List[Post]) -> List[Post]:
+        # 先检查整批, 有冲突时一篇也不写入, 与数据库事务一致
+        slugs = [post.slug for post in posts]
+        if len(set(slugs)) != len(slugs):
+            raise SlugConflictError(",".join(slugs))
+        for post in posts:
+            owner = self._by_slug.get(post.slug)
+            if owner is not None and owner != post.id:
+                raise SlugConflictError(post.slug)
+        for post in posts:
+            self._store(post)
+        return posts
+
     def get_post_by_id(self, post_id: int) -> Optional[Post]:
-        return self._posts.get(post_id)
+        post = self._posts.get(post_id)
+        return post.clone() if post else None
+
+    def get_posts_by_ids(self, post_ids: Iterable[int]) -> List[Post]:
+        return [self._posts[i].clone() for i in dict.fromkeys(post_ids) if i in self._posts]
 
     def get_post_by_slug(self, slug: str) -> Optional[Post]:
-        print(f"[repo] 正在通过slug: {slug} 查询记录")
-        for post in self._posts.values():
-            print(f"post.sulg: {post.slug}, slug: {slug}")
-            if post.slug == slug:
-                print("查询成功")
-                return post
-        print("查询失败")
-        return None
+        post_id = self._by_slug.get(slug)
+        if post_id is None:
+            logger.debug("post with slug %s not found", slug)
+            return None
+        return self._posts[post_id].clone()
+
+    def get_post_by_content_hash(self, author_id: int, content_hash: str) -> Optional[Post]:
+        post_id = self._by_content_hash.get((author_id, content_hash))
+        return self._posts[post_id].clone() if post_id is not None else None
+
+    def find_slugs_with_prefix(self, base: str) -> set[str]:
+        # "base-xxx" 在有序列表中是连续的一段
+        prefix = f"{base}-"
+        taken = {base} if base in self._by_slug else set()
+        for slug in islice(self._sorted_slugs, bisect_left(self._sorted_slugs, prefix), None):
+            if not slug.startswith(prefix):
+                break
+            taken.add(slug)
+        return taken
+
+    def find_slugs_with_prefixes(self, bases: Iterable[str]) -> set[str]:
+        taken: set[str] = set()
+        for base in set(bases):
+            taken |= self.find_slugs_with_prefix(base)
+        return taken
+
+    def list_published(self, *, limit: int = 10, offset: int = 0, tag: Optional[str] = None, author_id: Optional[int] = None, published_before: Optional[datetime] = None, cursor: Optional[Cursor] = None) -> List[Post]:
+        return [self._posts[key[1]].clone() for key in self._published_keys(
+                limit=limit,
+                offset=offset,
+                tag=tag,
+                author_id=author_id,
+                published_before=published_before,
+                cursor=cursor,
+                )]
+
+    def list_published_summaries(self, **kwargs) -> List[PostSummary]:
+        return [PostSummary.from_post(self._posts[key[1]]) for key in self._published_keys(**kwargs)]
+
+    def get_post_meta_by_slug(self, slug: str) -> Optional[PostMeta]:
+        post_id = self._by_slug.get(slug)
+        return PostMeta.from_post(self._posts[post_id]) if post_id is not None else None
 
-    def list_published(self, *, limit: int = 10, offset: int = 0, tag: Optional[str] = None, author_id: Optional[int] = None, published_before: Optional[datetime] = None) -> List[Post]:
-        posts = [
-                p for p in self._posts.values() if p.status == PostStatus.PUBLISHED
-                 ]
-        print(f"[repo] 查询到列表为 {posts}")
+    def list_published_meta(self, **kwargs) -> List[PostMeta]:
+        return [PostMeta.from_post(self._posts[key[1]]) for key in self._published_keys(**kwargs)]
 
-        if tag is not None:
-            posts = [p for p in posts if tag in p.tags]
+    def search(self, query: str, *, limit: int = 10, offset: int = 0) -> List[SearchHit]:
+        words = query.lower().split()
+        hits = []
+        for _, post_id in self._published:
+            p = self._posts[post_id]
+            text = f"{p.title}\n{p.content}".lower()
+            if words and all(w in text for w in words):
+                hits.append(_hit(p, make_excerpt(p.content), float(sum(text.count(w) for w in words))))
+        hits.sort(key=lambda h: h.score, reverse=True)
+        return hits[offset:offset+limit]
 
-        if author_id is not None:
-            posts = [p for p in posts if p.author_id == author_id]
+    def list_tag_counts(self, *, limit: Optional[int] = None) -> List[TagCount]:
+        counts = sorted(((-len(keys), tag) for tag, keys in self._published_by_tag.items()))
+        return [TagCount(tag=tag, count=-count) for count, tag in counts[:limit]]
 
+    def list_archive_months(self) -> List[ArchiveMonth]:
+        return [
+            ArchiveMonth(year=year, month=month, count=count)
+            for (year, month), count in sorted(self._archive_counts.items(), reverse=True)
+        ]
+
+    def _store(self, post: Post) -> None:
+        if post.id is None:
+            post.id = self.next_id()
+        previous = self._posts.get(post.id)
+        if previous is not None:
+            self._unindex(previous)
+        stored = post.clone()
+        self._posts[post.id] = stored
+        self._index(stored)
+        post.mark_clean()
+        stored.mark_clean()
+
+    @staticmethod
+    def _order_key(post: Post) -> Cursor:
+        return (post.published_at or post.created_at, post.id)
+
+    def _index(self, post: Post) -> None:
+        self._by_slug[post.slug] = post.id
+        insort(self._sorted_slugs, post.slug)
+        if post.content_hash:
+            self._by_content_hash[(post.author_id, post.content_hash)] = post.id
+        if post.status == PostStatus.PUBLISHED:
+            key = self._order_key(post)
+            insort(self._published, key)
+            for tag in dict.fromkeys(post.tags):
+                insort(self._published_by_tag.setdefault(tag, []), key)
+            insort(self._published_by_author.setdefault(post.author_id, []), key)
+            if post.published_at is not None:
+                month = (post.published_at.year, post.published_at.month)
+                self._archive_counts[month] = self._archive_counts.get(month, 0) + 1
+
+    def _unindex(self, post: Post) -> None:
+        del self._by_slug[post.slug]
+        del self._sorted_slugs[bisect_left(self._sorted_slugs, post.slug)]
+        if self._by_content_hash.get((post.author_id, post.content_hash)) == post.id:
+            del self._by_content_hash[(post.author_id, post.content_hash)]
+        if post.status == PostStatus.PUBLISHED:
+            key = self._order_key(post)
+            _remove_sorted(self._published, key)
+            for tag in dict.fromkeys(post.tags):
+                _remove_sorted(self._published_by_tag[tag], key)
+                if not self._published_by_tag[tag]:
+                    del self._published_by_tag[tag]
+            _remove_sorted(self._published_by_author[post.author_id], key)
+            if post.published_at is not None:
+                month = (post.published_at.year, post.published_at.month)
+                self._archive_counts[month] -= 1
+                if not self._archive_counts[month]:
+                    del self._archive_counts[month]
+
+    def _published_keys(self, *, limit: int = 10, offset: int = 0, tag: Optional[str] = None, author_id: Optional[int] = None, published_before: Optional[datetime] = None, cursor: Optional[Cursor] = None) -> List[Cursor]:
+        """
+        按 (发布时间, id) 倒序返回一页文章的排序键
+        同时按标签和作者筛选时遍历较短的列表, 逐篇检查另一个条件
+        """
+        if tag is not None and author_id is not None:
+            by_tag = self._published_by_tag.get(tag, [])
+            by_author = self._published_by_author.get(author_id, [])
+            keys = by_tag if len(by_tag) <= len(by_author) else by_author
+
+            def matches(key: Cursor) -> bool:
+                post = self._posts[key[1]]
+                return tag in post.tags and post.author_id == author_id
+        elif tag is not None:
+            keys, matches = self._published_by_tag.get(tag, []), None
+        elif author_id is not None:
+            keys, matches = self._published_by_author.get(author_id, []), None
+        else:
+            keys, matches = self._published, None
+
+        # 只看 cursor 之前、published_before 及之前的部分
+        end = len(keys)
+        if cursor is not None:
+            end = bisect_left(keys, cursor, hi=end)
         if published_before is not None:
-            posts = [
-                    p for p in posts
-                    if p.published_at and p.published_at <= published_before
-                    ]
+            end = bisect_right(keys, published_before, hi=end, key=lambda key: key[0])
+
+        if matches is None:
+            stop = max(end - offset, 0)
+            return keys[max(stop - limit, 0):stop][::-1]
 
-        posts.sort(
-                key=lambda p: p.published_at or p.created_at,
-                reverse=True,
-                )
-        print(f"[repo] 筛选后的列表为 {posts}, Result: {posts[offset:offset+limit]}")
+        page = []
+        skipped = 0
+        for i in range(end - 1, -1, -1):
+            if not matches(keys[i]):
+                continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            page.append(keys[i])
+            if len(page) == limit:
+                break
+        return page
 
-        return posts[offset:offset+limit]
+
+def _remove_sorted(keys: List[Cursor], key: Cursor) -> None:
+    del keys[bisect_left(keys, key)]
 
 
 class PostRepo(BasePostRepo):
     """
     使用sqlalchemy
+    读者侧的只读查询(列表/按slug读取/搜索)走 get_read_db, 可以分配到只读副本;
+    按id读取、查重、查slug占用都是写流程的一部分, 与写入一样走写库, 避免读到副本上的旧数据
     """
     def save(self, post: Post) -> Post:
         with get_db() as db:
-            if post.id is not None:
-                orm = db.get(PostORM, post.id)
-            else:
-                orm = None
+            return _save(db, post)
 
-            orm = domain_to_orm(post, orm)
-            db.add(orm)
-            db.commit()
-            db.refresh(orm)
-
-            post.id = orm.id
-            return orm_to_domain(orm)
+    def save_many(self, posts: List[Post]) -> List[Post]:
+        with get_db() as db:
+            return _save_many(db, posts)
 
     def get_post_by_slug(self, slug: str) -> Optional[Post]:
+        with get_read_db() as db:
+            return _get_post_by_slug(db, slug)
+
+    def get_post_by_content_hash(self, author_id: int, content_hash: str) -> Optional[Post]:
         with get_db() as db:
-            stmt = select(PostORM).where(PostORM.slug == slug)
-            orm = db.execute(stmt).scalar_one_or_none()
-            if orm is None:
-                return None
-            return orm_to_domain(orm)
+            return _get_post_by_content_hash(db, author_id, content_hash)
+
+    def find_slugs_with_prefix(self, base: str) -> set[str]:
+        with get_db() as db:
+            return _find_slugs_with_prefix(db, base)
+
+    def find_slugs_with_prefixes(self, bases: Iterable[str]) -> set[str]:
+        with get_db() as db:
+            return _find_slugs_with_prefixes(db, bases)
 
     def get_post_by_id(self, post_id: int) -> Optional[Post]:
         with get_db() as db:
-            orm = db.get(PostORM, post_id)
-            if orm is None:
-                return None
-            return orm_to_domain(orm)
+            return _get_post_by_id(db, post_id)
 
-    def list_published(self, *, limit: int = 10, offset: int = 0, tag: Optional[str] = None, author_id: Optional[int] = None, published_before: Optional[datetime] = None) -> List[Post]:
+    def get_posts_by_ids(self, post_ids: Iterable[int]) -> List[Post]:
         with get_db() as db:
-            stmt = select(PostORM).where(PostORM.status == PostStatus.PUBLISHED.value)
+            return _get_posts_by_ids(db, post_ids)
+
+    def list_published(self, **filters) -> List[Post]:
+        with get_read_db() as db:
+            return _list_published(db, **filters)
 
-            if tag is not None:
-                stmt = stmt.where(PostORM.tags.like(f"%{tag}%"))
-            if author_id is not None:
-                stmt = stmt.where(PostORM.author_id == author_id)
+    def list_published_summaries(self, **filters) -> List[PostSummary]:
+        with get_read_db() as db:
+            return _list_published_summaries(db, **filters)
 
-            if published_before is not None:
-                stmt = stmt.where(PostORM.published_at <= published_before)
+    def get_post_meta_by_slug(self, slug: str) -> Optional[PostMeta]:
+        with get_read_db() as db:
+            return _get_post_meta_by_slug(db, slug)
 
-            stmt = stmt.order_by(
-                    PostORM.published_at.desc().nullslast(),
-                    PostORM.created_at.desc(),
-                    ).offset(offset).limit(limit)
+    def list_published_meta(self, **filters) -> List[PostMeta]:
+        with get_read_db() as db:
+            return _list_published_meta(db, **filters)
 
-            result = db.execute(stmt).scalars().all()
-            return [orm_to_domain(orm) for orm in result]
+    def search(self, query: str, *, limit: int = 10, offset: int = 0) -> List[SearchHit]:
+        with get_read_db() as db:
+            return _search(db, query, limit=limit, offset=offset)
+
+    def list_tag_counts(self, *, limit: Optional[int] = None) -> List[TagCount]:
+        with get_read_db() as db:
+            return aggregates.list_tag_counts(db, limit=limit)
+
+    def list_archive_months(self) -> List[ArchiveMonth]:
+        with get_read_db() as db:
+            return aggregates.list_archive_months(db)
+
+
+class AsyncPostRepo(AsyncBasePostRepo):
+    """
+    使用sqlalchemy的 AsyncSession
+    查询逻辑与 PostRepo 共用, 通过 run_sync 在异步驱动(aiosqlite/aiomysql)上执行,
+    等待数据库时让出事件循环, 不占用线程
+    """
+    async def save(self, post: Post) -> Post:
+        async with get_async_db() as db:
+            return await db.run_sync(_save, post)
+
+    async def save_many(self, posts: List[Post]) -> List[Post]:
+        async with get_async_db() as db:
+            return await db.run_sync(_save_many, posts)
+
+    async def get_post_by_slug(self, slug: str) -> Optional[Post]:
+        async with get_async_read_db() as db:
+            return await db.run_sync(_get_post_by_slug, slug)
+
+    async def get_post_by_content_hash(self, author_id: int, content_hash: str) -> Optional[Post]:
+        async with get_async_db() as db:
+            return await db.run_sync(_get_post_by_content_hash, author_id, content_hash)
+
+    async def find_slugs_with_prefix(self, base: str) -> set[str]:
+        async with get_async_db() as db:
+            return await db.run_sync(_find_slugs_with_prefix, base)
+
+    async def find_slugs_with_prefixes(self, bases: Iterable[str]) -> set[str]:
+        async with get_async_db() as db:
+            return await db.run_sync(_find_slugs_with_prefixes, bases)
+
+    async def get_post_by_id(self, post_id: int) -> Optional[Post]:
+        async with get_async_db() as db:
+            return await db.run_sync(_get_post_by_id, post_id)
+
+    async def get_posts_by_ids(self, post_ids: Iterable[int]) -> List[Post]:
+        async with get_async_db() as db:
+            return await db.run_sync(_get_posts_by_ids, post_ids)
+
+    async def list_published(self, **filters) -> List[Post]:
+        async with get_async_read_db() as db:
+            return await db.run_sync(_list_published, **filters)
+
+    async def list_published_summaries(self, **filters) -> List[PostSummary]:
+        async with get_async_read_db() as db:
+            return await db.run_sync(_list_published_summaries, **filters)
+
+    async def get_post_meta_by_slug(self, slug: str) -> Optional[PostMeta]:
+        async with get_async_read_db() as db:
+            return await db.run_sync(_get_post_meta_by_slug, slug)
+
+    async def list_published_meta(self, **filters) -> List[PostMeta]:
+        async with get_async_read_db() as db:
+            return await db.run_sync(_list_published_meta, **filters)
+
+    async def search(self, query: str, *, limit: int = 10, offset: int = 0) -> List[SearchHit]:
+        async with get_async_read_db() as db:
+            return await db.run_sync(_search, query, limit=limit, offset=offset)
+
+    async def list_tag_counts(self, *, limit: Optional[int] = None) -> List[TagCount]:
+        async with get_async_read_db() as db:
+            return await db.run_sync(aggregates.list_tag_counts, limit=limit)
+
+    async def list_archive_months(self) -> List[ArchiveMonth]:
+        async with get_async_read_db() as db:
+            return await db.run_sync(aggregates.list_archive_months)
+
+#####################################
+# 查询: 同步和异步repo共用, db 为同步 Session
+#################################
+def _save(db: Session, post: Post) -> Post:
+    if _supports_returning(db):
+        return _save_returning(db, post)
+    return _save_orm(db, post)
+
+
+def _supports_returning(db: Session) -> bool:
+    dialect = db.get_bind().dialect
+    return dialect.insert_returning and dialect.update_returning
+
+
+def _save_returning(db: Session, post: Post) -> Post:
+    """
+    只写入变化的字段, 不先查询再回写:
+     - 新文章: 一条 INSERT ... RETURNING id
+     - 已有文章: 一条只包含变化字段的 UPDATE ... RETURNING id, 没有变化时不访问数据库
+     - post_tags 和全文索引只在相关字段变化时更新
+     - 状态/标签/发布时间变化时, 先在事务中锁住并读取当前行, 计数的增量按当前行计算
+    """
+    dirty = post.dirty_fields()
+    if dirty is not None and not dirty:
+        return post
+
+    counted = dirty is None or bool(dirty.keys() & _COUNTED_FIELDS)
+    with _slug_conflicts(db):
+        # 计数和 post_tags 的增量按事务中锁住的当前行计算, 不用加载时的快照(可能已经被其他写入改过)
+        current = _lock_current_row(db, post.id) if counted and post.id is not None else None
+        if post.id is None:
+            stmt = insert(PostORM).values(**_column_values(post, _POST_COLUMNS)).returning(PostORM.id)
+            post.id = db.execute(stmt).scalar_one()
+        else:
+            names = _POST_COLUMNS if dirty is None else dirty.keys()
+            stmt = (
+                update(PostORM)
+                .where(PostORM.id == post.id)
+                .values(**_column_values(post, names))
+                .returning(PostORM.id)
+            )
+            if db.execute(stmt).scalar_one_or_none() is None:
+                raise ValueError("Post not found")
+
+        after = _counted_values_after_save(post, dirty, current)
+        if dirty is None or "tags" in dirty or "published_at" in dirty:
+            if current is None:
+                # 新文章没有旧标签
+                old_tags, old_published_at = [], None
+            elif dirty is None:
+                # 整行写入时 post_tags 全部重写
+                old_tags, old_published_at = None, current.published_at
+            else:
+                old_tags, old_published_at = _tags_str_to_list(current.tags), current.published_at
+            _write_tag_rows(db, post.id, old_tags, old_published_at, after["tags"], after["published_at"])
+        if dirty is None or dirty.keys() & {"status", "title", "content"}:
+            fts.sync_posts(db, [post])
+        if counted:
+            before = _row_published_state(current) if current is not None else None
+            after_state = aggregates.published_state(after["status"], _normalize_tags(after["tags"]), after["published_at"])
+            aggregates.apply_changes(db, [(before, after_state)])
+        db.commit()
+
+    post.mark_clean()
+    return post
+
+
+# 影响标签/归档计数的字段
+_COUNTED_FIELDS = {"status", "tags", "published_at"}
+
+
+def _published_state(post: Post) -> aggregates.PublishedState:
+    return aggregates.published_state(post.status, _normalize_tags(post.tags), post.published_at)
+
+
+def _orm_published_state(orm: PostORM) -> aggregates.PublishedState:
+    return aggregates.published_state(orm.status, _normalize_tags(_tags_str_to_list(orm.tags)), orm.published_at)
+
+
+def _row_published_state(row) -> aggregates.PublishedState:
+    return aggregates.published_state(row.status, _normalize_tags(_tags_str_to_list(row.tags)), row.published_at)
+
+
+def _lock_rows(db: Session, post_ids: List[int]) -> None:
+    """
+    SQLite 不支持 SELECT ... FOR UPDATE: 先做一次不改变数据的 UPDATE 拿到写锁,
+    之后在同一事务中读到的就是最新提交的数据, 其他写入要等本事务提交
+    其他数据库在查询上用 with_for_update() 锁行
+    """
+    if post_ids and db.get_bind().dialect.name == "sqlite":
+        db.execute(update(PostORM).where(PostORM.id.in_(post_ids)).values(id=PostORM.id))
+
+
+def _lock_current_row(db: Session, post_id: int):
+    """
+    事务中锁住并读取文章当前的 (status, tags, published_at), 文章不存在时返回 None
+    """
+    _lock_rows(db, [post_id])
+    stmt = (
+        select(PostORM.status, PostORM.tags, PostORM.published_at)
+        .where(PostORM.id == post_id)
+        .with_for_update()
+    )
+    return db.execute(stmt).one_or_none()
+
+
+def _counted_values_after_save(post: Post, dirty: Optional[Dict[str, Any]], current) -> Dict[str, Any]:
+    """
+    保存后这一行的 status/tags/published_at: 只写入变化的字段时, 其余字段保持数据库中的当前值
+    """
+    values = {}
+    for name in _COUNTED_FIELDS:
+        if current is None or dirty is None or name in dirty:
+            values[name] = getattr(post, name)
+        elif name == "tags":
+            values[name] = _tags_str_to_list(current.tags)
+        else:
+            values[name] = getattr(current, name)
+    return values
+
+
+def _write_tag_rows(
+        db: Session,
+        post_id: int,
+        old_tags: Optional[List[str]],
+        old_published_at: Optional[datetime],
+        new_tags: List[str],
+        new_published_at: Optional[datetime],
+        ) -> None:
+    """
+    _sync_tag_rows 的语句版本: old_tags 为 None 时删除后全部重新写入
+    """
+    wanted = _normalize_tags(new_tags)
+    if old_tags is None:
+        db.execute(delete(PostTagORM).where(PostTagORM.post_id == post_id))
+        old = []
+    else:
+        old = _normalize_tags(old_tags)
+
+    removed = set(old) - set(wanted)
+    if removed:
+        db.execute(delete(PostTagORM).where(PostTagORM.post_id == post_id, PostTagORM.tag.in_(removed)))
+    kept = set(old) & set(wanted)
+    if kept and old_published_at != new_published_at:
+        db.execute(
+            update(PostTagORM)
+            .where(PostTagORM.post_id == post_id)
+            .values(published_at=new_published_at)
+        )
+    added = [tag for tag in wanted if tag not in old]
+    if added:
+        db.execute(
+            insert(PostTagORM),
+            [{"post_id": post_id, "tag": tag, "published_at": new_published_at} for tag in added],
+        )
+
+
+def _save_orm(db: Session, post: Post) -> Post:
+    """
+    不支持 RETURNING 的数据库(MySQL): 通过 ORM 加载后整行回写
+    """
+    if post.id is not None:
+        # 计数的增量按锁住的当前行计算
+        _lock_rows(db, [post.id])
+        orm = db.get(PostORM, post.id, with_for_update=True, populate_existing=True)
+    else:
+        orm = None
+
+    before = _orm_published_state(orm) if orm is not None else None
+    orm = domain_to_orm(post, orm)
+    db.add(orm)
+    aggregates.apply_changes(db, [(before, _published_state(post))])
+    _commit(db, [orm])
+    db.refresh(orm)
+
+    post.id = orm.id
+    return orm_to_domain(orm)
+
+
+def _save_many(db: Session, posts: List[Post]) -> List[Post]:
+    ids = [post.id for post in posts if post.id is not None]
+    existing = {}
+    if ids:
+        _lock_rows(db, ids)
+        stmt = (
+            select(PostORM)
+            .where(PostORM.id.in_(ids))
+            .options(selectinload(PostORM.tag_rows))
+            .with_for_update(of=PostORM)
+        )
+        existing = {orm.id: orm for orm in db.execute(stmt).scalars()}
+
+    befores = [_orm_published_state(existing[post.id]) if post.id in existing else None for post in posts]
+    orms = [domain_to_orm(post, existing.get(post.id)) for post in posts]
+    db.add_all(orms)
+    aggregates.apply_changes(db, [(before, _published_state(post)) for before, post in zip(befores, posts)])
+    _commit(db, orms)
+
+    for post, orm in zip(posts, orms):
+        post.id = orm.id
+    return [orm_to_domain(orm) for orm in orms]
+
+
+def _get_post_by_slug(db: Session, slug: str) -> Optional[Post]:
+    stmt = select(PostORM).where(PostORM.slug == slug)
+    orm = db.execute(stmt).scalar_one_or_none()
+    if orm is None:
+        return None
+    return orm_to_domain(orm)
+
+
+def _get_post_by_content_hash(db: Session, author_id: int, content_hash: str) -> Optional[Post]:
+    stmt = (
+        select(PostORM)
+        .where(PostORM.author_id == author_id, PostORM.content_hash == content_hash)
+        .order_by(PostORM.id)
+        .limit(1)
+    )
+    orm = db.execute(stmt).scalar_one_or_none()
+    if orm is None:
+        return None
+    return orm_to_domain(orm)
+
+
+def _slug_prefix_condition(base: str):
+    # slug 有唯一索引, 用范围条件代替 LIKE 才能走索引: '-' 的下一个字符是 '.'
+    return or_(
+        PostORM.slug == base,
+        (PostORM.slug >= f"{base}-") & (PostORM.slug < f"{base}."),
+        )
+
+
+def _find_slugs_with_prefix(db: Session, base: str) -> set[str]:
+    stmt = select(PostORM.slug).where(_slug_prefix_condition(base))
+    return set(db.execute(stmt).scalars())
+
+
+# 每条语句中OR的前缀个数, 避免超过 SQLite 的表达式深度限制
+_PREFIX_CHUNK = 100
+
+def _find_slugs_with_prefixes(db: Session, bases: Iterable[str]) -> set[str]:
+    bases = sorted(set(bases))
+    taken: set[str] = set()
+    for start in range(0, len(bases), _PREFIX_CHUNK):
+        chunk = bases[start:start + _PREFIX_CHUNK]
+        stmt = select(PostORM.slug).where(or_(*(_slug_prefix_condition(base) for base in chunk)))
+        taken.update(db.execute(stmt).scalars())
+    return taken
+
+
+def _get_post_by_id(db: Session, post_id: int) -> Optional[Post]:
+    orm = db.get(PostORM, post_id)
+    if orm is None:
+        return None
+    return orm_to_domain(orm)
+
+
+def _get_posts_by_ids(db: Session, post_ids: Iterable[int]) -> List[Post]:
+    post_ids = list(dict.fromkeys(post_ids))
+    if not post_ids:
+        return []
+    stmt = select(PostORM).where(PostORM.id.in_(post_ids))
+    return [orm_to_domain(orm) for orm in db.execute(stmt).scalars()]
+
+
+def _list_published(db: Session, *, limit: int = 10, offset: int = 0, tag: Optional[str] = None, author_id: Optional[int] = None, published_before: Optional[datetime] = None, cursor: Optional[Cursor] = None) -> List[Post]:
+    stmt = _published_query(
+            select(PostORM),
+            limit=limit,
+            offset=offset,
+            tag=tag,
+            author_id=author_id,
+            published_before=published_before,
+            cursor=cursor,
+            )
+    result = db.execute(stmt).scalars().all()
+    return [orm_to_domain(orm) for orm in result]
+
+
+def _list_published_summaries(db: Session, *, limit: int = 10, offset: int = 0, tag: Optional[str] = None, author_id: Optional[int] = None, published_before: Optional[datetime] = None, cursor: Optional[Cursor] = None) -> List[PostSummary]:
+    # 只查询列表需要的列, 正文只取开头一段用来生成摘要
+    stmt = _published_query(
+            select(*_SUMMARY_COLUMNS, func.substr(PostORM.content, 1, EXCERPT_LENGTH * 2).label("content_head")),
+            limit=limit,
+            offset=offset,
+            tag=tag,
+            author_id=author_id,
+            published_before=published_before,
+            cursor=cursor,
+            )
+    return [row_to_summary(row) for row in db.execute(stmt)]
+
+
+def _get_post_meta_by_slug(db: Session, slug: str) -> Optional[PostMeta]:
+    stmt = select(*_META_COLUMNS).where(PostORM.slug == slug)
+    row = db.execute(stmt).one_or_none()
+    return row_to_meta(row) if row else None
+
+
+def _list_published_meta(db: Session, *, limit: int = 10, offset: int = 0, tag: Optional[str] = None, author_id: Optional[int] = None, published_before: Optional[datetime] = None, cursor: Optional[Cursor] = None) -> List[PostMeta]:
+    stmt = _published_query(
+            select(*_META_COLUMNS),
+            limit=limit,
+            offset=offset,
+            tag=tag,
+            author_id=author_id,
+            published_before=published_before,
+            cursor=cursor,
+            )
+    return [row_to_meta(row) for row in db.execute(stmt)]
+
+
+def _search(db: Session, query: str, *, limit: int = 10, offset: int = 0) -> List[SearchHit]:
+    if fts.is_supported(db):
+        return [
+            SearchHit(
+                id=row["id"],
+                author_id=row["author_id"],
+                title=row["title"],
+                slug=row["slug"],
+                tags=_tags_str_to_list(row["tags"]),
+                snippet=fts.clean_snippet(row["snippet"] or ""),
+                score=-row["rank"],
+                updated_at=row["updated_at"],
+                published_at=row["published_at"],
+            )
+            for row in fts.search(db, query, limit=limit, offset=offset)
+        ]
+
+    # 其他数据库没有FTS5, 退化为 LIKE 匹配, 按发布时间排序
+    stmt = select(PostORM)
+    for word in query.split():
+        stmt = stmt.where(or_(PostORM.title.contains(word), PostORM.content.contains(word)))
+    stmt = _published_query(
+            stmt,
+            limit=limit,
+            offset=offset,
+            tag=None,
+            author_id=None,
+            published_before=None,
+            cursor=None,
+            )
+    return [_hit(orm_to_domain(orm), make_excerpt(orm.content), 0.0) for orm in db.execute(stmt).scalars()]
 
 #####################################
 # 操作方法
 #################################
+_SUMMARY_COLUMNS = (
+    PostORM.id,
+    PostORM.author_id,
+    PostORM.title,
+    PostORM.slug,
+    PostORM.status,
+    PostORM.tags,
+    PostORM.created_at,
+    PostORM.updated_at,
+    PostORM.published_at,
+)
+
+_META_COLUMNS = (
+    PostORM.id,
+    PostORM.slug,
+    PostORM.status,
+    PostORM.updated_at,
+    PostORM.published_at,
+)
+
+
+def _published_query(
+        stmt,
+        *,
+        limit: int,
+        offset: int,
+        tag: Optional[str],
+        author_id: Optional[int],
+        published_before: Optional[datetime],
+        cursor: Optional[Cursor],
+        ):
+    """
+    已发布文章列表的公共筛选/排序/分页条件
+    """
+    stmt = stmt.where(PostORM.status == PostStatus.PUBLISHED.value)
+    published_at = PostORM.published_at
+    post_id = PostORM.id
+
+    if tag is not None:
+        # 通过关联表精确匹配, 走 (tag, published_at) 索引
+        stmt = stmt.join(PostTagORM, PostTagORM.post_id == PostORM.id).where(PostTagORM.tag == tag)
+        published_at = PostTagORM.published_at
+        post_id = PostTagORM.post_id
+    if author_id is not None:
+        stmt = stmt.where(PostORM.author_id == author_id)
+
+    if published_before is not None:
+        stmt = stmt.where(published_at <= published_before)
+
+    if cursor is not None:
+        cursor_published_at, cursor_id = cursor
+        stmt = stmt.where(or_(
+            published_at < cursor_published_at,
+            (published_at == cursor_published_at) & (post_id < cursor_id),
+            ))
+
+    return stmt.order_by(
+            published_at.desc(),
+            post_id.desc(),
+            ).offset(offset).limit(limit)
+
+
+def _commit(db, orms: List[PostORM]) -> None:
+    """
+    提交事务, 提交前在同一事务中同步全文索引
+    """
+    with _slug_conflicts(db):
+        db.flush()
+        fts.sync_posts(db, orms)
+        db.commit()
+
+
+@contextmanager
+def _slug_conflicts(db: Session):
+    """
+    slug唯一索引冲突时回滚并转换为 SlugConflictError
+    """
+    try:
+        yield
+    except IntegrityError as e:
+        db.rollback()
+        if "slug" in str(e.orig):
+            raise SlugConflictError(str(e.orig)) from e
+        raise
+
+
+# 领域模型中与 posts 表一一对应的字段
+_POST_COLUMNS = (
+    "author_id",
+    "title",
+    "content",
+    "slug",
+    "status",
+    "tags",
+    "created_at",
+    "updated_at",
+    "published_at",
+    "content_html",
+    "content_hash",
+)
+
+
+def _column_values(post: Post, names: Iterable[str]) -> Dict[str, Any]:
+    values = {}
+    for name in names:
+        value = getattr(post, name)
+        if name == "status":
+            value = value.value
+        elif name == "tags":
+            value = _tags_list_to_str(value)
+        values[name] = value
+    return values
+
 def _tags_str_to_list(tags_str: str) -> List[str]:
     if not tags_str:
         return []
@@ -184,8 +1066,27 @@ def _tags_str_to_list(tags_str: str) -> List[str]:
 def _tags_list_to_str(tags: List[str]) -> str:
     return ",".join(tags)
 
+
+def _normalize_tags(tags: List[str]) -> List[str]:
+    return list(dict.fromkeys(t.strip() for t in tags if t.strip()))
+
+
+def _sync_tag_rows(orm: PostORM, tags: List[str]) -> None:
+    """
+    让 post_tags 中的记录与 tags 保持一致, 只增删有变化的标签
+    """
+    wanted = _normalize_tags(tags)
+    rows = {row.tag: row for row in orm.tag_rows}
+    for tag in set(rows) - set(wanted):
+        orm.tag_rows.remove(rows[tag])
+    for tag in wanted:
+        if tag not in rows:
+            orm.tag_rows.append(PostTagORM(tag=tag))
+    for row in orm.tag_rows:
+        row.published_at = orm.published_at
+
 def orm_to_domain(orm: PostORM) -> Post:
-    return Post(
+    post = Post(
         id=orm.id,
         author_id=orm.author_id,
         title=orm.title,
@@ -196,6 +1097,49 @@ def orm_to_domain(orm: PostORM) -> Post:
         created_at=orm.created_at,
         updated_at=orm.updated_at,
         published_at=orm.published_at,
+        content_html=orm.content_html or "",
+        content_hash=orm.content_hash or "",
+    )
+    post.mark_clean()
+    return post
+
+
+def row_to_summary(row) -> PostSummary:
+    return PostSummary(
+        id=row.id,
+        author_id=row.author_id,
+        title=row.title,
+        slug=row.slug,
+        status=PostStatus(row.status),
+        tags=_tags_str_to_list(row.tags),
+        excerpt=make_excerpt(row.content_head or ""),
+        created_at=row.created_at,
+        updated_at=row.updated_at,
+        published_at=row.published_at,
+    )
+
+
+def _hit(post: Post, snippet: str, score: float) -> SearchHit:
+    return SearchHit(
+        id=post.id,
+        author_id=post.author_id,
+        title=post.title,
+        slug=post.slug,
+        tags=post.tags,
+        snippet=snippet,
+        score=score,
+        updated_at=post.updated_at,
+        published_at=post.published_at,
+    )
+
+
+def row_to_meta(row) -> PostMeta:
+    return PostMeta(
+        id=row.id,
+        slug=row.slug,
+        status=PostStatus(row.status),
+        updated_at=row.updated_at,
+        published_at=row.published_at,
     )
 
 
@@ -215,6 +1159,9 @@ def domain_to_orm(post: Post, orm: Optional[PostORM] = None) -> PostORM:
     orm.created_at = post.created_at
     orm.updated_at = post.updated_at
     orm.published_at = post.published_at
+    orm.content_html = post.content_html
+    orm.content_hash = post.content_hash
+    _sync_tag_rows(orm, post.tags)
 
     return orm
 
@@ -0,0 +1,552 @@
+"""
+多个 worker 共享的 Redis 缓存, 以及通过 pub/sub 广播的失效消息
+ - slug -> 文章, 列表查询(包括标签/归档计数) -> 结果, 以 JSON 保存在 REDIS_KEY_PREFIX 下
+ - 保存文章时删除受影响的 key, 然后在频道上广播, 其他 worker 收到后清掉自己的进程内缓存
+ - 每个 slug 和列表各有一个版本号: 失效时加一; 读数据库之前记下版本号, 写回缓存时版本号变了就不写,
+   避免读的同时有写入时把旧数据写回去(WATCH/MULTI, 所有 key 用同一个 hash tag, 集群中也在同一个 slot)
+ - Redis 不可用时记录日志后直接访问数据库, 不影响读写
+需要安装 redis (pip install redis), 测试时可以用 fakeredis 的客户端代替
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import uuid
+from dataclasses import fields
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Type
+
+from domains.posts import ArchiveMonth, Post, PostMeta, PostStatus, PostSummary, SearchHit, TagCount
+from infra.posts import AsyncBasePostRepo, BasePostRepo
+
+try:
+    import redis
+    import redis.asyncio as aioredis
+except ImportError:
+    redis = None
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+# 每个进程一个id, 收到自己发出的失效消息时跳过
+WORKER_ID = uuid.uuid4().hex
+# 失效时列表索引一直被并发写入修改的最多重试次数
+_INVALIDATE_RETRIES = 5
+
+_DATETIME_FIELDS = ("created_at", "updated_at", "published_at")
+_LIST_TYPES: Dict[str, Type] = {
+    "posts": Post,
+    "summaries": PostSummary,
+    "meta": PostMeta,
+    "tags": TagCount,
+    "archive": ArchiveMonth,
+}
+
+
+########################
+# 序列化
+########################
+def _encode(item) -> Dict[str, Any]:
+    data = {f.name: getattr(item, f.name) for f in fields(item) if f.init}
+    for name in _DATETIME_FIELDS:
+        if data.get(name) is not None:
+            data[name] = data[name].isoformat()
+    if "status" in data:
+        data["status"] = data["status"].value
+    return data
+
+
+def _decode(cls: Type, data: Dict[str, Any]):
+    for name in _DATETIME_FIELDS:
+        if data.get(name) is not None:
+            data[name] = datetime.fromisoformat(data[name])
+    if "status" in data:
+        data["status"] = PostStatus(data["status"])
+    item = cls(**data)
+    if isinstance(item, Post):
+        # 与从数据库加载的文章一样, 以当前值作为快照
+        item.mark_clean()
+    return item
+
+
+def dump_post(post: Post) -> str:
+    return json.dumps(_encode(post), ensure_ascii=False)
+
+
+def load_post(raw: str | bytes) -> Post:
+    return _decode(Post, json.loads(raw))
+
+
+def dump_list(items: list) -> str:
+    return json.dumps([_encode(item) for item in items], ensure_ascii=False)
+
+
+def load_list(kind: str, raw: str | bytes) -> list:
+    cls = _LIST_TYPES[kind]
+    return [_decode(cls, data) for data in json.loads(raw)]
+
+
+########################
+# 客户端
+########################
+def _sentinel_hosts(hosts: str, port: str) -> List[tuple[str, int]]:
+    return [(host.strip(), int(port)) for host in hosts.split(",") if host.strip()]
+
+
+def create_redis_client(
+        url: str,
+        *,
+        use_async: bool,
+        cluster: bool = False,
+        sentinel_hosts: str = "",
+        sentinel_port: str = "26379",
+        sentinel_max_retry: int = 2,
+        ):
+    """
+    根据 REDIS_* 配置创建客户端:
+     - 设置了 sentinel 时, URL 的主机名作为 master 名称, 例如 redis://:password@mymaster/0
+     - cluster 为 True 时使用 RedisCluster
+     - 否则按 URL 连接单机
+    """
+    if redis is None:
+        raise RuntimeError("REDIS_URL is set but the redis package is not installed (pip install redis).")
+    if sentinel_hosts:
+        from redis.backoff import ExponentialBackoff
+
+        if use_async:
+            from redis.asyncio.retry import Retry
+            from redis.asyncio.sentinel import Sentinel
+        else:
+            from redis.retry import Retry
+            from redis.sentinel import Sentinel
+        parsed = redis.connection.parse_url(url)
+        sentinel = Sentinel(
+                _sentinel_hosts(sentinel_hosts, sentinel_port),
+                password=parsed.get("password"),
+                )
+        return sentinel.master_for(
+                parsed.get("host") or "mymaster",
+                db=parsed.get("db", 0),
+                password=parsed.get("password"),
+                username=parsed.get("username"),
+                decode_responses=True,
+                retry=Retry(ExponentialBackoff(), sentinel_max_retry),
+                )
+    if cluster:
+        if use_async:
+            from redis.asyncio.cluster import RedisCluster
+        else:
+            from redis.cluster import RedisCluster
+        return RedisCluster.from_url(url, decode_responses=True)
+    module = aioredis if use_async else redis
+    return module.Redis.from_url(url, decode_responses=True)
+
+
+########################
+# 缓存repo
+########################
+class _RedisPostCache:
+    """
+    RedisCachedPostRepo / AsyncRedisCachedPostRepo 共用的 key 和失效消息
+    """
+    def __init__(self, client, *, prefix: str, ttl: int):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.channel = f"{prefix}:posts:invalidate"
+        # 同一个事务里的 key 必须在同一个 slot
+        self._base = f"{{{prefix}:posts}}"
+        self._list_index = f"{self._base}:lists"
+        self._lists_version = f"{self._base}:version:lists"
+
+    def _post_key(self, slug: str) -> str:
+        return f"{self._base}:slug:{slug}"
+
+    def _post_version(self, slug: str) -> str:
+        return f"{self._base}:version:slug:{slug}"
+
+    def _list_key(self, kind: str, kwargs: Dict[str, Any]) -> str:
+        digest = hashlib.sha1(repr(sorted(kwargs.items())).encode("utf-8")).hexdigest()
+        return f"{self._base}:list:{kind}:{digest}"
+
+    def _queue_invalidation(self, pipe, slugs: List[str], lists: bool, list_keys: Iterable[str]) -> None:
+        """
+        在 MULTI 中排队: 版本号加一(比缓存多保留一个 ttl), 删除缓存, 广播
+        """
+        for slug in slugs:
+            pipe.incr(self._post_version(slug))
+            pipe.expire(self._post_version(slug), self.ttl * 2)
+            pipe.delete(self._post_key(slug))
+        if lists:
+            pipe.incr(self._lists_version)
+            pipe.expire(self._lists_version, self.ttl * 2)
+            pipe.delete(self._list_index, *list_keys)
+        pipe.publish(self.channel, self._message(slugs, lists))
+
+    def _queue_fill(self, pipe, key: str, value: str, index: bool) -> None:
+        pipe.set(key, value, ex=self.ttl)
+        if index:
+            pipe.sadd(self._list_index, key)
+            pipe.expire(self._list_index, self.ttl)
+
+    @staticmethod
+    def _affected_slugs(post: Post, old_slug: Optional[str]) -> List[str]:
+        return list(dict.fromkeys(slug for slug in (old_slug, post.slug) if slug))
+
+    @staticmethod
+    def _affects_lists(post: Post, old_status: Optional[PostStatus]) -> bool:
+        # 草稿不会出现在列表中; 从已发布改为草稿也需要清空列表
+        return post.status != PostStatus.DRAFT or old_status not in (None, PostStatus.DRAFT)
+
+    def _message(self, slugs: List[str], lists: bool) -> str:
+        return json.dumps({"origin": WORKER_ID, "slugs": slugs, "lists": lists}, ensure_ascii=False)
+
+    def _plan(self, posts: List[tuple[Post, Optional[str], Optional[PostStatus]]]) -> tuple[List[str], bool]:
+        slugs: List[str] = []
+        lists = False
+        for post, old_slug, old_status in posts:
+            slugs.extend(self._affected_slugs(post, old_slug))
+            lists = lists or self._affects_lists(post, old_status)
+        return list(dict.fromkeys(slugs)), lists
+
+    @staticmethod
+    def _before_save(post: Post) -> tuple[Optional[str], Optional[PostStatus]]:
+        # 保存后快照会更新, 先记下旧的 slug 和状态
+        return post.snapshot_value("slug"), post.snapshot_value("status")
+
+
+class RedisCachedPostRepo(_RedisPostCache, BasePostRepo):
+    """
+    同步版本, 命令行导入/同步使用: 写入后同样删除 key 并广播, web worker 会清掉旧缓存
+    """
+    def __init__(self, repo: BasePostRepo, client, *, prefix: str, ttl: int = 300):
+        super().__init__(client, prefix=prefix, ttl=ttl)
+        self.repo = repo
+
+    ########################
+    # 写
+    ########################
+    def save(self, post: Post) -> Post:
+        before = self._before_save(post)
+        saved = self.repo.save(post)
+        self._invalidate([(saved, *before)])
+        return saved
+
+    def save_many(self, posts: List[Post]) -> List[Post]:
+        before = [self._before_save(post) for post in posts]
+        saved = self.repo.save_many(posts)
+        self._invalidate([(post, *b) for post, b in zip(saved, before)])
+        return saved
+
+    def _invalidate(self, posts) -> None:
+        slugs, lists = self._plan(posts)
+        if not slugs and not lists:
+            return
+        try:
+            with self.client.pipeline() as pipe:
+                for _ in range(_INVALIDATE_RETRIES):
+                    try:
+                        # 读取列表索引后到删除前有新的列表写入时 EXEC 失败, 重新读取
+                        pipe.watch(self._list_index)
+                        list_keys = pipe.smembers(self._list_index) if lists else ()
+                        pipe.multi()
+                        self._queue_invalidation(pipe, slugs, lists, list_keys)
+                        pipe.execute()
+                        return
+                    except redis.WatchError:
+                        continue
+            logger.warning("redis invalidation for %s kept conflicting, giving up", slugs)
+        except redis.RedisError as e:
+            logger.warning("redis invalidation failed for %s: %s", slugs, e)
+
+    ########################
+    # 读
+    ########################
+    def get_post_by_id(self, post_id: int) -> Optional[Post]:
+        return self.repo.get_post_by_id(post_id)
+
+    def get_posts_by_ids(self, post_ids: Iterable[int]) -> List[Post]:
+        return self.repo.get_posts_by_ids(post_ids)
+
+    def get_post_by_content_hash(self, author_id: int, content_hash: str) -> Optional[Post]:
+        return self.repo.get_post_by_content_hash(author_id, content_hash)
+
+    def find_slugs_with_prefix(self, base: str) -> set[str]:
+        return self.repo.find_slugs_with_prefix(base)
+
+    def find_slugs_with_prefixes(self, bases: Iterable[str]) -> set[str]:
+        return self.repo.find_slugs_with_prefixes(bases)
+
+    def get_post_by_slug(self, slug: str) -> Optional[Post]:
+        key = self._post_key(slug)
+        raw, version = self._get(key, self._post_version(slug))
+        if raw is not None:
+            return load_post(raw)
+        post = self.repo.get_post_by_slug(slug)
+        if post is not None:
+            self._fill(key, dump_post(post), self._post_version(slug), version, index=False)
+        return post
+
+    def get_post_meta_by_slug(self, slug: str) -> Optional[PostMeta]:
+        raw, _ = self._get(self._post_key(slug))
+        if raw is not None:
+            return PostMeta.from_post(load_post(raw))
+        return self.repo.get_post_meta_by_slug(slug)
+
+    def list_published(self, **kwargs) -> List[Post]:
+        return self._cached_list("posts", self.repo.list_published, kwargs)
+
+    def list_published_summaries(self, **kwargs) -> List[PostSummary]:
+        return self._cached_list("summaries", self.repo.list_published_summaries, kwargs)
+
+    def list_published_meta(self, **kwargs) -> List[PostMeta]:
+        return self._cached_list("meta", self.repo.list_published_meta, kwargs)
+
+    def list_tag_counts(self, **kwargs) -> List[TagCount]:
+        return self._cached_list("tags", self.repo.list_tag_counts, kwargs)
+
+    def list_archive_months(self) -> List[ArchiveMonth]:
+        return self._cached_list("archive", self.repo.list_archive_months, {})
+
+    def search(self, query: str, **kwargs) -> List[SearchHit]:
+        return self.repo.search(query, **kwargs)
+
+    def _cached_list(self, kind: str, load: Callable[..., list], kwargs: Dict[str, Any]) -> list:
+        key = self._list_key(kind, kwargs)
+        raw, version = self._get(key, self._lists_version)
+        if raw is not None:
+            return load_list(kind, raw)
+        result = load(**kwargs)
+        self._fill(key, dump_list(result), self._lists_version, version, index=True)
+        return result
+
+    def _get(self, key: str, version_key: Optional[str] = None) -> tuple[Optional[str], Optional[str]]:
+        """
+        返回 (缓存内容, 版本号); 同时读取版本号, 未命中时用来判断读数据库期间是否有写入
+        """
+        try:
+            if version_key is None:
+                return self.client.get(key), None
+            raw, version = self.client.mget(key, version_key)
+            return raw, version or "0"
+        except redis.RedisError as e:
+            logger.warning("redis read failed for %s: %s", key, e)
+            return None, None
+
+    def _fill(self, key: str, value: str, version_key: str, version: Optional[str], *, index: bool) -> None:
+        """
+        版本号与读数据库之前相同时才写入; 期间有失效(或者 WATCH 之后有失效)时放弃
+        """
+        if version is None:
+            return
+        try:
+            with self.client.pipeline() as pipe:
+                pipe.watch(version_key)
+                if (pipe.get(version_key) or "0") != version:
+                    return
+                pipe.multi()
+                self._queue_fill(pipe, key, value, index)
+                pipe.execute()
+        except redis.WatchError:
+            logger.debug("skip stale cache fill for %s", key)
+        except redis.RedisError as e:
+            logger.warning("redis write failed for %s: %s", key, e)
+
+
+class AsyncRedisCachedPostRepo(_RedisPostCache, AsyncBasePostRepo):
+    """
+    RedisCachedPostRepo 的异步版本, web 请求使用
+    """
+    def __init__(self, repo: AsyncBasePostRepo, client, *, prefix: str, ttl: int = 300):
+        super().__init__(client, prefix=prefix, ttl=ttl)
+        self.repo = repo
+
+    ########################
+    # 写
+    ########################
+    async def save(self, post: Post) -> Post:
+        before = self._before_save(post)
+        saved = await self.repo.save(post)
+        await self._invalidate([(saved, *before)])
+        return saved
+
+    async def save_many(self, posts: List[Post]) -> List[Post]:
+        before = [self._before_save(post) for post in posts]
+        saved = await self.repo.save_many(posts)
+        await self._invalidate([(post, *b) for post, b in zip(saved, before)])
+        return saved
+
+    async def _invalidate(self, posts) -> None:
+        slugs, lists = self._plan(posts)
+        if not slugs and not lists:
+            return
+        try:
+            async with self.client.pipeline() as pipe:
+                for _ in range(_INVALIDATE_RETRIES):
+                    try:
+                        await pipe.watch(self._list_index)
+                        list_keys = await pipe.smembers(self._list_index) if lists else ()
+                        pipe.multi()
+                        self._queue_invalidation(pipe, slugs, lists, list_keys)
+                        await pipe.execute()
+                        return
+                    except redis.WatchError:
+                        continue
+            logger.warning("redis invalidation for %s kept conflicting, giving up", slugs)
+        except redis.RedisError as e:
+            logger.warning("redis invalidation failed for %s: %s", slugs, e)
+
+    ########################
+    # 读
+    ########################
+    async def get_post_by_id(self, post_id: int) -> Optional[Post]:
+        return await self.repo.get_post_by_id(post_id)
+
+    async def get_posts_by_ids(self, post_ids: Iterable[int]) -> List[Post]:
+        return await self.repo.get_posts_by_ids(post_ids)
+
+    async def get_post_by_content_hash(self, author_id: int, content_hash: str) -> Optional[Post]:
+        return await self.repo.get_post_by_content_hash(author_id, content_hash)
+
+    async def find_slugs_with_prefix(self, base: str) -> set[str]:
+        return await self.repo.find_slugs_with_prefix(base)
+
+    async def find_slugs_with_prefixes(self, bases: Iterable[str]) -> set[str]:
+        return await self.repo.find_slugs_with_prefixes(bases)
+
+    async def get_post_by_slug(self, slug: str) -> Optional[Post]:
+        key = self._post_key(slug)
+        raw, version = await self._get(key, self._post_version(slug))
+        if raw is not None:
+            return load_post(raw)
+        post = await self.repo.get_post_by_slug(slug)
+        if post is not None:
+            await self._fill(key, dump_post(post), self._post_version(slug), version, index=False)
+        return post
+
+    async def get_post_meta_by_slug(self, slug: str) -> Optional[PostMeta]:
+        raw, _ = await self._get(self._post_key(slug))
+        if raw is not None:
+            return PostMeta.from_post(load_post(raw))
+        return await self.repo.get_post_meta_by_slug(slug)
+
+    async def list_published(self, **kwargs) -> List[Post]:
+        return await self._cached_list("posts", self.repo.list_published, kwargs)
+
+    async def list_published_summaries(self, **kwargs) -> List[PostSummary]:
+        return await self._cached_list("summaries", self.repo.list_published_summaries, kwargs)
+
+    async def list_published_meta(self, **kwargs) -> List[PostMeta]:
+        return await self._cached_list("meta", self.repo.list_published_meta, kwargs)
+
+    async def list_tag_counts(self, **kwargs) -> List[TagCount]:
+        return await self._cached_list("tags", self.repo.list_tag_counts, kwargs)
+
+    async def list_archive_months(self) -> List[ArchiveMonth]:
+        return await self._cached_list("archive", self.repo.list_archive_months, {})
+
+    async def search(self, query: str, **kwargs) -> List[SearchHit]:
+        return await self.repo.search(query, **kwargs)
+
+    async def _cached_list(self, kind: str, load: Callable[..., Awaitable[list]], kwargs: Dict[str, Any]) -> list:
+        key = self._list_key(kind, kwargs)
+        raw, version = await self._get(key, self._lists_version)
+        if raw is not None:
+            return load_list(kind, raw)
+        result = await load(**kwargs)
+        await self._fill(key, dump_list(result), self._lists_version, version, index=True)
+        return result
+
+    async def _get(self, key: str, version_key: Optional[str] = None) -> tuple[Optional[str], Optional[str]]:
+        try:
+            if version_key is None:
+                return await self.client.get(key), None
+            raw, version = await self.client.mget(key, version_key)
+            return raw, version or "0"
+        except redis.RedisError as e:
+            logger.warning("redis read failed for %s: %s", key, e)
+            return None, None
+
+    async def _fill(self, key: str, value: str, version_key: str, version: Optional[str], *, index: bool) -> None:
+        if version is None:
+            return
+        try:
+            async with self.client.pipeline() as pipe:
+                await pipe.watch(version_key)
+                if (await pipe.get(version_key) or "0") != version:
+                    return
+                pipe.multi()
+                self._queue_fill(pipe, key, value, index)
+                await pipe.execute()
+        except redis.WatchError:
+            logger.debug("skip stale cache fill for %s", key)
+        except redis.RedisError as e:
+            logger.warning("redis write failed for %s: %s", key, e)
+
+
+########################
+# 失效消息
+########################
+class InvalidationListener:
+    """
+    订阅失效频道, 把其他 worker 的写入同步到本进程的缓存(AsyncCachedPostRepo.apply_invalidation)
+    on_invalidate(slugs, lists): slugs 为 None 表示清空全部
+    连接断开后按 retry_seconds 重连; 重连前清空本地缓存, 断线期间可能错过消息
+    """
+    def __init__(self, client, channel: str, on_invalidate: Callable[[Optional[List[str]], bool], None], *, retry_seconds: float = 1.0):
+        self.client = client
+        self.channel = channel
+        self.on_invalidate = on_invalidate
+        self.retry_seconds = retry_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def handle(self, data: str) -> None:
+        """
+        格式不对的消息(例如其他程序发到同一个频道的)记录日志后忽略, 继续处理后面的消息
+        """
+        try:
+            message = json.loads(data)
+            if message.get("origin") == WORKER_ID:
+                return
+            slugs = message.get("slugs", [])
+            if slugs is not None and not (isinstance(slugs, list) and all(isinstance(slug, str) for slug in slugs)):
+                raise TypeError(f"slugs must be a list of strings, got {slugs!r}")
+            self.on_invalidate(slugs, bool(message.get("lists")))
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            logger.warning("ignoring malformed invalidation message %r: %s", data, e)
+
+    async def _listen(self) -> None:
+        pubsub = self.client.pubsub()
+        try:
+            await pubsub.subscribe(self.channel)
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    self.handle(message["data"])
+        finally:
+            await pubsub.aclose()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._listen()
+            except redis.RedisError as e:
+                logger.warning("redis invalidation channel lost, reconnecting in %.1fs: %s", self.retry_seconds, e)
+            except Exception:
+                # 其他异常也不能让监听退出, 否则这个 worker 再也收不到失效消息
+                logger.exception("redis invalidation listener failed, restarting in %.1fs", self.retry_seconds)
+            # 断线期间的消息收不到, 本地缓存全部作废
+            self.on_invalidate(None, True)
+            await asyncio.sleep(self.retry_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,200 @@
+"""
+基于 SQLite FTS5 的全文检索
+
+文章大多是中文, unicode61 分词器会把一整段中文当成一个词, 所以写入和查询前
+先在每个 CJK 字符两侧插入分隔符(单字切分), 查询时把连续的中文转成短语查询。
+只索引已发布的文章, rowid 即文章id。
+"""
+import html
+import re
+from typing import Iterable, List, Optional
+
+from sqlalchemy import DDL, DateTime, event, text
+from sqlalchemy.orm import Session
+
+from infra.db import Base
+
+FTS_TABLE = "posts_fts"
+
+_CREATE_FTS = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+    "USING fts5(title, content, tokenize = 'unicode61 remove_diacritics 2')"
+)
+
+# 建表时顺带创建虚拟表(只在sqlite上)
+event.listen(Base.metadata, "after_create", DDL(_CREATE_FTS).execute_if(dialect="sqlite"))
+
+_CJK = (
+    "\u3000-\u303f"   # CJK 标点
+    "\u3040-\u30ff"   # 日文假名
+    "\u3400-\u4dbf"   # CJK 扩展A
+    "\u4e00-\u9fff"   # CJK 基本
+    "\uac00-\ud7af"   # 韩文
+    "\uf900-\ufaff"   # CJK 兼容
+    "\uff00-\uffef"   # 全角字符
+)
+_CJK_CHAR = re.compile(f"([{_CJK}])")
+# 切分时插入的分隔符: unicode61 把控制字符当作分隔符, 正文里本来的空格不受影响,
+# snippet 中只需要去掉这个字符
+_SEP = "\x1f"
+
+# snippet 高亮先用控制字符占位, 转义后再换成 <mark>
+_HL_START, _HL_END = "\x02", "\x03"
+
+# bm25 权重: 标题命中比正文更重要
+_TITLE_WEIGHT, _CONTENT_WEIGHT = 5.0, 1.0
+
+
+def is_supported(db: Session) -> bool:
+    return db.get_bind().dialect.name == "sqlite"
+
+
+def segment(value: str, sep: str = _SEP) -> str:
+    """
+    在每个 CJK 字符两侧加分隔符, 让 unicode61 按单字切分
+    """
+    return _CJK_CHAR.sub(f"{sep}\\1{sep}", value)
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    用户输入 -> FTS5 MATCH 表达式: 每个词都作为短语加引号(同时避免注入FTS语法), 词之间为 AND
+    """
+    phrases = []
+    for word in query.split():
+        tokens = segment(word, " ").split()
+        if tokens:
+            phrase = " ".join(tokens).replace('"', '""')
+            phrases.append(f'"{phrase}"')
+    return " ".join(phrases) or None
+
+
+def clean_snippet(snippet: str) -> str:
+    """
+    去掉分词时插入的分隔符, 转义 HTML, 再把高亮占位换成 <mark>
+    """
+    # str.split() 也会按 \x1f 切分, 先去掉分隔符再合并空白
+    snippet = " ".join(snippet.replace(_SEP, "").split())
+    escaped = html.escape(snippet)
+    return escaped.replace(_HL_START, "<mark>").replace(_HL_END, "</mark>")
+
+
+def sync_posts(db: Session, posts: Iterable) -> None:
+    """
+    在写文章的同一个事务中维护索引: 已发布的文章写入索引, 其他状态从索引删除
+    posts 只需要有 id/status/title/content 属性 (PostORM 或 Post)
+    """
+    if not is_supported(db):
+        return
+    posts = list(posts)
+    if not posts:
+        return
+    db.execute(
+        text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"),
+        [{"id": post.id} for post in posts],
+    )
+    rows = [
+        {"id": post.id, "title": segment(post.title), "content": segment(post.content)}
+        for post in posts
+        if _status_value(post.status) == "published"
+    ]
+    if rows:
+        db.execute(
+            text(f"INSERT INTO {FTS_TABLE} (rowid, title, content) VALUES (:id, :title, :content)"),
+            rows,
+        )
+
+
+def _status_value(status) -> str:
+    return getattr(status, "value", status)
+
+
+def search(db: Session, query: str, *, limit: int, offset: int) -> List:
+    """
+    按相关度排序的命中, 每行包含文章的基本信息、snippet 和 bm25 rank(越小越相关)
+    """
+    match = build_match_query(query)
+    if match is None:
+        return []
+    stmt = text(
+        f"""
+        SELECT p.id, p.author_id, p.title, p.slug, p.tags, p.updated_at, p.published_at,
+               snippet({FTS_TABLE}, 1, :hl_start, :hl_end, '…', 24) AS snippet,
+               bm25({FTS_TABLE}, :title_weight, :content_weight) AS rank
+        FROM {FTS_TABLE}
+        JOIN posts p ON p.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH :match AND p.status = 'published'
+        ORDER BY rank
+        LIMIT :limit OFFSET :offset
+        """
+    ).columns(updated_at=DateTime, published_at=DateTime)  # 原生SQL, 需要声明类型才会转换为 datetime
+    return db.execute(stmt, {
+        "match": match,
+        "hl_start": _HL_START,
+        "hl_end": _HL_END,
+        "title_weight": _TITLE_WEIGHT,
+        "content_weight": _CONTENT_WEIGHT,
+        "limit": limit,
+        "offset": offset,
+    }).mappings().all()
+
+
+def is_outdated(db: Session) -> bool:
+    """
+    旧版本用空格切分 CJK 字符, snippet 无法区分原文中的空格; 有这样的行时需要重建
+    """
+    row = db.execute(
+        text(
+            f"SELECT 1 FROM {FTS_TABLE} "
+            "WHERE instr(title || content, :sep) = 0 AND (title || content) GLOB :cjk LIMIT 1"
+        ),
+        {"sep": _SEP, "cjk": f"*[{_CJK}]*"},
+    ).first()
+    return row is not None
+
+
+def rebuild_reason(db: Session) -> Optional[str]:
+    """
+    索引需要重建的原因, 不需要时返回 None:
+     - missing: 虚拟表还不存在
+     - incomplete: 行数与已发布文章数不同(例如已有数据库上刚建的空表)
+     - outdated: 旧格式
+    """
+    exists = db.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": FTS_TABLE},
+    ).first()
+    if exists is None:
+        return "missing"
+    indexed = db.execute(text(f"SELECT count(*) FROM {FTS_TABLE}")).scalar_one()
+    published = db.execute(text("SELECT count(*) FROM posts WHERE status = 'published'")).scalar_one()
+    if indexed != published:
+        return "incomplete"
+    if is_outdated(db):
+        return "outdated"
+    return None
+
+
+def rebuild(db: Session, batch_size: int = 500) -> int:
+    """
+    清空并重建索引, 返回索引的文章数
+    """
+    db.execute(text(_CREATE_FTS))
+    db.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    total = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            text(
+                "SELECT id, title, content, status FROM posts "
+                "WHERE status = 'published' AND id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": batch_size},
+        ).all()
+        if not rows:
+            break
+        sync_posts(db, rows)
+        total += len(rows)
+        last_id = rows[-1].id
+    db.commit()
+    return total
@@ -1,17 +1,24 @@
 # main.py
+"""
+应用入口: uvicorn main:app
+导入时只创建 FastAPI 应用和路由, 不连接数据库、不建表:
+ - engine 和 service 在 lifespan 中创建, 退出时关闭连接池
+ - 表结构由 python cli.py migrate 创建和升级, 部署新版本前先执行
+"""
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from routers import posts
-from infra.db import Base, engine
-app = FastAPI(
-        title="日志系统",
-        description="日志系统",
-        version="1.0.0",
-        )
-
-# 创建所有orm表
-Base.metadata.create_all(bind=engine)
+from config import LOG_LEVEL, UPLOAD_MAX_BYTES
+from routers import aggregates, feeds, metrics, posts, search
+from routers.dependencies import create_blog_services, start_blog_services, stop_blog_services
+from routers.metrics import MetricsMiddleware
+from routers.replicas import ReadRoutingMiddleware
+from routers.uploads import UploadSizeLimitMiddleware
+from infra.db import dispose_database, get_database
+from infra.metrics import instrument_engine
 
 # 允许的前端地址（开发环境）
 origins = [
@@ -19,12 +26,58 @@ origins = [
     "http://127.0.0.1:5173",
 ]
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,          # 或 ["*"] 先图省事，生产再收紧
-    allow_credentials=True,
-    allow_methods=["*"],            # 允许所有方法：GET/POST/PUT/OPTIONS...
-    allow_headers=["*"],            # 允许所有头
-)
 
-app.include_router(posts.router, tags=["posts"])
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # SQL 语句计时和每个请求的语句数
+    for engine in get_database().sync_engines():
+        instrument_engine(engine)
+
+    app.state.services = create_blog_services()
+    await start_blog_services(app.state.services)
+    yield
+    await stop_blog_services(app.state.services)
+    await dispose_database()
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(
+            title="日志系统",
+            description="日志系统",
+            version="1.0.0",
+            lifespan=lifespan,
+            )
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,          # 或 ["*"] 先图省事，生产再收紧
+        allow_credentials=True,
+        allow_methods=["*"],            # 允许所有方法：GET/POST/PUT/OPTIONS...
+        allow_headers=["*"],            # 允许所有头
+        expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],
+    )
+
+    # 上传接口在解析 multipart 之前先检查请求体大小
+    app.add_middleware(
+        UploadSizeLimitMiddleware,
+        max_bytes=UPLOAD_MAX_BYTES,
+        paths=["/posts/upload-markdown"],
+    )
+
+    # 读写分离: 每个请求单独判断是否已经写入过
+    app.add_middleware(ReadRoutingMiddleware)
+
+    app.include_router(posts.router, tags=["posts"])
+    app.include_router(search.router, tags=["search"])
+    app.include_router(aggregates.router, tags=["aggregates"])
+    app.include_router(feeds.router, tags=["feeds"])
+    app.include_router(metrics.router, tags=["metrics"])
+
+    # 最后添加的中间件在最外层, 计时包含其他中间件
+    app.add_middleware(MetricsMiddleware)
+    return app
+
+
+logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+app = create_app()
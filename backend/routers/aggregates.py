@@ -0,0 +1,49 @@
+# routers/aggregates.py
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, Request
+
+from routers.schemas.posts import ArchiveMonthResponse, TagCountResponse
+from routers.conditional import body_etag, is_not_modified, not_modified_response, set_validators
+from routers.dependencies import get_blog_service
+from routers.responses import DocumentResponse
+from services.blog_service import AsyncBlogService
+from services.serialization import archive_month_document, tag_count_document
+
+router = APIRouter()
+
+
+def _conditional(request: Request, documents: list):
+    """
+    计数没有更新时间, ETag 按响应内容计算; 内容没变时返回 304
+    """
+    response = DocumentResponse(documents)
+    etag = body_etag(response.body)
+    if is_not_modified(request, etag, None):
+        return not_modified_response(etag, None)
+    set_validators(response, etag, None)
+    return response
+
+
+@router.get("/tags", response_model=List[TagCountResponse])
+async def list_tags(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    service: AsyncBlogService = Depends(get_blog_service),
+):
+    """
+    标签云: 每个标签的已发布文章数, 按文章数倒序; 从计数表读取, 不遍历文章
+    """
+    counts = await service.list_tag_counts(limit=limit)
+    return _conditional(request, [tag_count_document(c) for c in counts])
+
+
+@router.get("/archive", response_model=List[ArchiveMonthResponse])
+async def list_archive(
+    request: Request,
+    service: AsyncBlogService = Depends(get_blog_service),
+):
+    """
+    按年/月归档的已发布文章数, 按时间倒序
+    """
+    months = await service.list_archive_months()
+    return _conditional(request, [archive_month_document(m) for m in months])
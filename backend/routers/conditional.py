@@ -0,0 +1,88 @@
+"""
+HTTP 条件请求: ETag / Last-Modified / 304
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional, Union
+
+from fastapi import Request, Response
+
+from domains.posts import Post, PostMeta, PostSummary
+
+Versioned = Union[Post, PostMeta, PostSummary]
+
+# 允许CDN/浏览器缓存, 但每次使用前必须用 ETag 重新验证
+CACHE_CONTROL = "no-cache"
+
+def _version(item: Versioned) -> str:
+    return f"{item.id}:{item.updated_at.isoformat()}"
+
+
+def post_etag(item: Versioned) -> str:
+    """
+    单篇文章的强ETag, 由 id + updated_at 决定
+    """
+    digest = hashlib.sha1(_version(item).encode("utf-8")).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def list_etag(items: Iterable[Versioned]) -> str:
+    """
+    列表的强ETag, 由列表中每篇文章的 id + updated_at 及顺序决定
+    """
+    h = hashlib.sha1(b"list")
+    for item in items:
+        h.update(_version(item).encode("utf-8"))
+        h.update(b"|")
+    return f'"{h.hexdigest()[:20]}"'
+
+
+def body_etag(body: bytes) -> str:
+    """
+    没有 updated_at 的响应(计数等)按响应内容计算强ETag
+    """
+    return f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+
+
+def last_modified(items: Iterable[Versioned]) -> Optional[datetime]:
+    return max((item.updated_at for item in items), default=None)
+
+
+def _http_date(dt: datetime) -> str:
+    # 数据库中保存的是 UTC 的 naive datetime
+    return format_datetime(dt.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def is_not_modified(request: Request, etag: str, modified: Optional[datetime]) -> bool:
+    """
+    有 If-None-Match 时只比较ETag, 否则比较 If-Modified-Since (秒级精度)
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in candidates or etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+
+def set_validators(response: Response, etag: str, modified: Optional[datetime]) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    if modified is not None:
+        response.headers["Last-Modified"] = _http_date(modified)
+
+
+def not_modified_response(etag: str, modified: Optional[datetime]) -> Response:
+    response = Response(status_code=304)
+    set_validators(response, etag, modified)
+    return response
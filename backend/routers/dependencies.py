@@ -1,8 +1,91 @@
-from infra.posts import PostRepo
-from services.blog_service import BlogService
+from dataclasses import dataclass
+from typing import Callable, List, Optional
 
-_repo = PostRepo()
-_service = BlogService(_repo)
+from fastapi import Request
 
-def get_blog_service() -> BlogService:
-    return _service
+from config import (
+    FEED_CACHE_TTL,
+    FEED_ITEMS,
+    POST_CACHE_SIZE,
+    POST_CACHE_TTL,
+    REDIS_CACHE_TTL,
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_MAX_RETRY_COUNT,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+    SITE_TITLE,
+    SITE_URL,
+)
+from infra.cache import AsyncCachedPostRepo
+from infra.metrics import REGISTRY, cache_collector
+from infra.posts import AsyncBasePostRepo, AsyncPostRepo
+from services.blog_service import AsyncBlogService
+from services.feeds import FeedCache, FeedSite
+
+
+@dataclass
+class BlogServices:
+    """
+    应用启动时创建, 保存在 app.state.services 上
+    """
+    service: AsyncBlogService
+    feeds: FeedCache
+    collector: Callable[[], List[str]]
+    # 配置了 REDIS_URL 时订阅其他 worker 的缓存失效消息
+    listener: Optional[object] = None
+
+
+def create_blog_services() -> BlogServices:
+    shared_repo: AsyncBasePostRepo = AsyncPostRepo()
+    redis_client = None
+    if REDIS_URL:
+        # 多个 worker 共享 Redis 缓存, 进程内缓存在前面, 通过失效消息与其他 worker 保持一致
+        from infra.redis_cache import AsyncRedisCachedPostRepo, create_redis_client
+
+        redis_client = create_redis_client(
+                REDIS_URL,
+                use_async=True,
+                cluster=REDIS_CLUSTER,
+                sentinel_hosts=REDIS_SENTINEL_HOSTS,
+                sentinel_port=REDIS_SENTINEL_PORT,
+                sentinel_max_retry=REDIS_SENTINEL_MAX_RETRY_COUNT,
+                )
+        shared_repo = AsyncRedisCachedPostRepo(shared_repo, redis_client, prefix=REDIS_KEY_PREFIX, ttl=REDIS_CACHE_TTL)
+
+    repo = AsyncCachedPostRepo(shared_repo, maxsize=POST_CACHE_SIZE, ttl=POST_CACHE_TTL)
+    service = AsyncBlogService(repo)
+    feeds = FeedCache(
+            service,
+            FeedSite(url=SITE_URL, title=SITE_TITLE, items=FEED_ITEMS),
+            version=lambda: repo.published_version,
+            max_age=FEED_CACHE_TTL,
+            )
+    services = BlogServices(service=service, feeds=feeds, collector=cache_collector("post_cache", repo.stats))
+    if redis_client is not None:
+        from infra.redis_cache import InvalidationListener
+
+        services.listener = InvalidationListener(redis_client, shared_repo.channel, repo.apply_invalidation)
+    return services
+
+
+async def start_blog_services(services: BlogServices) -> None:
+    REGISTRY.add_collector(services.collector)
+    if services.listener is not None:
+        services.listener.start()
+
+
+async def stop_blog_services(services: BlogServices) -> None:
+    if services.listener is not None:
+        await services.listener.stop()
+    REGISTRY.remove_collector(services.collector)
+
+
+async def get_blog_service(request: Request) -> AsyncBlogService:
+    # async 依赖直接在事件循环中执行, 不会占用线程池
+    return request.app.state.services.service
+
+
+async def get_feed_cache(request: Request) -> FeedCache:
+    return request.app.state.services.feeds
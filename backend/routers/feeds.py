@@ -0,0 +1,48 @@
+# routers/feeds.py
+from fastapi import APIRouter, Depends, Request, Response
+
+from routers.conditional import is_not_modified, not_modified_response, set_validators
+from routers.dependencies import get_feed_cache
+from services.feeds import FeedCache, FeedDocument
+
+router = APIRouter()
+
+
+def _feed_response(request: Request, document: FeedDocument) -> Response:
+    """
+    返回预先生成(并压缩)好的内容, 不同的 Accept-Encoding 对应不同的 ETag
+    """
+    encoding, body, etag = document.variant(request.headers.get("accept-encoding", ""))
+    if is_not_modified(request, etag, document.last_modified):
+        response = not_modified_response(etag, document.last_modified)
+    else:
+        response = Response(body, media_type=document.media_type)
+        if encoding is not None:
+            response.headers["Content-Encoding"] = encoding
+        set_validators(response, etag, document.last_modified)
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
+@router.get("/feed.xml", response_class=Response)
+async def rss_feed(request: Request, feeds: FeedCache = Depends(get_feed_cache)):
+    """
+    RSS 2.0, 最新发布的 FEED_ITEMS 篇文章
+    """
+    return _feed_response(request, await feeds.get("rss"))
+
+
+@router.get("/atom.xml", response_class=Response)
+async def atom_feed(request: Request, feeds: FeedCache = Depends(get_feed_cache)):
+    """
+    Atom, 内容与 /feed.xml 相同
+    """
+    return _feed_response(request, await feeds.get("atom"))
+
+
+@router.get("/sitemap.xml", response_class=Response)
+async def sitemap(request: Request, feeds: FeedCache = Depends(get_feed_cache)):
+    """
+    所有已发布文章的地址和最后修改时间
+    """
+    return _feed_response(request, await feeds.get("sitemap"))
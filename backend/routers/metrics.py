@@ -0,0 +1,60 @@
+# routers/metrics.py
+import time
+
+from fastapi import APIRouter, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from infra.metrics import (
+    DB_QUERIES_PER_REQUEST,
+    HTTP_LATENCY,
+    HTTP_REQUESTS,
+    REGISTRY,
+    start_request,
+)
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus 文本格式的指标
+    """
+    return Response(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+class MetricsMiddleware:
+    """
+    记录每个请求的耗时、状态码和执行的SQL条数
+    route 标签使用路由模板(/posts/{slug}), 没有匹配的路由记为 unmatched, 避免标签数量无限增长
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = start_request()
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method, route_label, str(status))
+            HTTP_LATENCY.observe(elapsed, method, route_label)
+            DB_QUERIES_PER_REQUEST.observe(stats.queries, method, route_label)
@@ -0,0 +1,34 @@
+"""
+列表接口的游标编码, 对客户端来说游标是不透明的字符串
+"""
+import base64
+import binascii
+from datetime import datetime
+from typing import List, Optional, Union
+
+from fastapi import HTTPException
+
+from domains.posts import Post, PostSummary
+from infra.posts import Cursor
+
+def encode_cursor(post: Union[Post, PostSummary]) -> str:
+    raw = f"{post.published_at.isoformat()}|{post.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        published_at, post_id = base64.urlsafe_b64decode(padded).decode("utf-8").split("|")
+        return datetime.fromisoformat(published_at), int(post_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def next_cursor(posts: List[Union[Post, PostSummary]], limit: int) -> Optional[str]:
+    """
+    取满一页时用最后一篇生成下一页的游标, 不满一页说明已经到底
+    """
+    if len(posts) < limit or posts[-1].published_at is None:
+        return None
+    return encode_cursor(posts[-1])
@@ -2,96 +2,138 @@
 import logging
 from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request
 from pydantic import BaseModel
 
-from routers.schemas.posts import PostCreate, PostPublishRequest, PostResponse, PostUpdate
+from config import UPLOAD_CHUNK_SIZE, UPLOAD_MAX_BYTES
+from routers.schemas.posts import (
+    BatchItemResponse,
+    PostBatchCreate,
+    PostCreate,
+    PostPublishBatchRequest,
+    PostPublishRequest,
+    PostResponse,
+    PostSummaryResponse,
+    PostUpdate,
+)
 from routers.dependencies import get_blog_service
-from services.blog_service import BlogService
+from routers.conditional import (
+    is_not_modified,
+    last_modified,
+    list_etag,
+    not_modified_response,
+    post_etag,
+    set_validators,
+)
+from routers.pagination import decode_cursor, next_cursor
+from routers.responses import DocumentResponse
+from routers.uploads import read_markdown_upload
+from services.blog_service import AsyncBlogService, InvalidTagError
+from services.serialization import batch_item_document, post_document, summary_document
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.get("/posts", response_model=List[PostResponse])
-def list_published_posts(
+@router.get("/posts", response_model=List[PostSummaryResponse])
+async def list_published_posts(
+    request: Request,
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="上一页响应头 X-Next-Cursor 的值"),
     tag: Optional[str] = None,
     author_id: Optional[int] = None,
-    service: BlogService = Depends(get_blog_service),
+    service: AsyncBlogService = Depends(get_blog_service),
 ):
-    posts = service.list_published_posts(
+    """
+    列表只返回摘要, 正文通过 /posts/{slug} 获取
+    客户端带着 ETag 再次请求时先查元信息, 没有变化直接返回 304
+    """
+    filters = dict(
         limit=limit,
         offset=offset,
         tag=tag,
         author_id=author_id,
+        cursor=decode_cursor(cursor) if cursor else None,
     )
-    # 直接返回领域模型，让 Pydantic 做转换
-    return [
-        PostResponse(
-            id=p.id,
-            author_id=p.author_id,
-            title=p.title,
-            content=p.content,
-            slug=p.slug,
-            status=p.status.value,
-            tags=p.tags,
-            created_at=p.created_at,
-            updated_at=p.updated_at,
-            published_at=p.published_at,
-        )
-        for p in posts
-    ]
+    if "if-none-match" in request.headers or "if-modified-since" in request.headers:
+        metas = await service.list_published_meta(**filters)
+        etag, modified = list_etag(metas), last_modified(metas)
+        if is_not_modified(request, etag, modified):
+            return not_modified_response(etag, modified)
+
+    posts = await service.list_published_summaries(**filters)
+    response = DocumentResponse([summary_document(p) for p in posts])
+    set_validators(response, list_etag(posts), last_modified(posts))
+    # 响应体保持为列表, 下一页游标放在响应头里
+    cursor_for_next = next_cursor(posts, limit)
+    if cursor_for_next:
+        response.headers["X-Next-Cursor"] = cursor_for_next
+    return response
 
 @router.get("/posts/{slug}", response_model=PostResponse)
-def get_post_by_slug(
+async def get_post_by_slug(
     slug: str,
-    service: BlogService = Depends(get_blog_service),
+    request: Request,
+    service: AsyncBlogService = Depends(get_blog_service),
 ):
     """
     通过构建的slug获取文章
+    条件请求先查元信息, 没有变化时不加载正文直接返回 304
     """
-    post = service.get_post_by_slug_for_reader(slug)
+    if "if-none-match" in request.headers or "if-modified-since" in request.headers:
+        meta = await service.get_post_meta_for_reader(slug)
+        if meta is None:
+            raise HTTPException(status_code=404, detail="Post not found")
+        if is_not_modified(request, post_etag(meta), meta.updated_at):
+            return not_modified_response(post_etag(meta), meta.updated_at)
+
+    post = await service.get_post_by_slug_for_reader(slug)
     if post is None:
         raise HTTPException(status_code=404, detail="Post not found")
-    return PostResponse(
-        id=post.id,
-        author_id=post.author_id,
-        title=post.title,
-        content=post.content,
-        slug=post.slug,
-        status=post.status.value,
-        tags=post.tags,
-        created_at=post.created_at,
-        updated_at=post.updated_at,
-        published_at=post.published_at,
-    )
+    response = DocumentResponse(post_document(post))
+    set_validators(response, post_etag(post), post.updated_at)
+    return response
 
 @router.post("/posts", response_model=PostResponse)
-def create_post(
+async def create_post(
     payload: PostCreate,
-    service: BlogService = Depends(get_blog_service),
+    service: AsyncBlogService = Depends(get_blog_service),
 ):
-    post = service.create_draft(
-        author_id=payload.author_id,
-        title=payload.title,
-        content=payload.content,
-        tags=payload.tags,
-    )
-    return PostResponse(
-        id=post.id,
-        author_id=post.author_id,
-        title=post.title,
-        content=post.content,
-        slug=post.slug,
-        status=post.status.value,
-        tags=post.tags,
-        created_at=post.created_at,
-        updated_at=post.updated_at,
-        published_at=post.published_at,
+    try:
+        post = await service.create_draft(
+            author_id=payload.author_id,
+            title=payload.title,
+            content=payload.content,
+            tags=payload.tags,
+        )
+    except InvalidTagError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return DocumentResponse(post_document(post))
+
+@router.post("/posts/batch", response_model=List[BatchItemResponse])
+async def create_posts_batch(
+    payload: PostBatchCreate,
+    service: AsyncBlogService = Depends(get_blog_service),
+):
+    """
+    批量创建草稿, 整批在一个事务中提交, 按请求顺序返回每一项的结果
+    """
+    results = await service.create_drafts(
+        [(item.author_id, item.title, item.content, item.tags) for item in payload.items]
     )
+    return DocumentResponse([batch_item_document(result) for result in results])
+
+@router.post("/posts/publish-batch", response_model=List[BatchItemResponse])
+async def publish_posts_batch(
+    payload: PostPublishBatchRequest,
+    service: AsyncBlogService = Depends(get_blog_service),
+):
+    """
+    批量发布, 一次提交; 不存在或不是作者的文章在结果中标记, 不影响其他文章
+    """
+    results = await service.publish_many(post_ids=payload.post_ids, author_id=payload.author_id)
+    return DocumentResponse([batch_item_document(result) for result in results])
 
 def parse_tags_str(tags_str: str | None):
     if not tags_str:
@@ -105,42 +147,34 @@ async def upload_markdown_post(
     author_id: int = Form(...),
     default_title: str = Form("Untitled"),
     default_tags: str = Form(""),
-    service: BlogService = Depends(get_blog_service),
+    service: AsyncBlogService = Depends(get_blog_service),
 ):
     if not file.filename.endswith(".md"):
         raise HTTPException(status_code=400, detail="Only .md files are allowed.")
 
-    content_bytes = await file.read()
-    markdown_content = content_bytes.decode("utf-8")
+    upload = await read_markdown_upload(file, max_bytes=UPLOAD_MAX_BYTES, chunk_size=UPLOAD_CHUNK_SIZE)
 
-    post = service.create_from_markdown(
-        author_id=author_id,
-        markdown_content=markdown_content,
-        default_title=default_title,
-        default_tags=parse_tags_str(default_tags),
-    )
+    try:
+        post = await service.create_from_markdown(
+            author_id=author_id,
+            markdown_content=upload.text,
+            default_title=default_title,
+            default_tags=parse_tags_str(default_tags),
+            dedup_hash=upload.sha256,
+        )
+    except InvalidTagError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
-    return PostResponse(
-        id=post.id,
-        author_id=post.author_id,
-        title=post.title,
-        content=post.content,
-        slug=post.slug,
-        status=post.status.value,
-        tags=post.tags,
-        created_at=post.created_at,
-        updated_at=post.updated_at,
-        published_at=post.published_at,
-    )
+    return DocumentResponse(post_document(post))
 
 @router.put("/posts/{post_id}", response_model=PostResponse)
-def update_post(
+async def update_post(
     post_id: int,
     payload: PostUpdate,
-    service: BlogService = Depends(get_blog_service),
+    service: AsyncBlogService = Depends(get_blog_service),
 ):
     try:
-        post = service.update_post(
+        post = await service.update_post(
             post_id=post_id,
             author_id=payload.author_id,
             title=payload.title,
@@ -149,32 +183,23 @@ def update_post(
         )
     except PermissionError:
         raise HTTPException(status_code=403, detail="Not allowed")
+    except InvalidTagError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except ValueError:
         raise HTTPException(status_code=404, detail="Post not found")
 
-    return PostResponse(
-        id=post.id,
-        author_id=post.author_id,
-        title=post.title,
-        content=post.content,
-        slug=post.slug,
-        status=post.status.value,
-        tags=post.tags,
-        created_at=post.created_at,
-        updated_at=post.updated_at,
-        published_at=post.published_at,
-    )
+    return DocumentResponse(post_document(post))
 
 
 @router.post("/posts/{post_id}/publish", response_model=PostResponse)
-def publish_post(
+async def publish_post(
     post_id: int,
     payload: PostPublishRequest,
-    service: BlogService = Depends(get_blog_service),
+    service: AsyncBlogService = Depends(get_blog_service),
 ):
     try:
-        logger.info(f"用户 {payload.author_id} 正在发布post {post_id} ")
-        post = service.publish_post(
+        logger.info("用户 %s 正在发布post %s", payload.author_id, post_id)
+        post = await service.publish_post(
             post_id=post_id,
             author_id=payload.author_id,
         )
@@ -183,17 +208,6 @@ def publish_post(
     except ValueError:
         raise HTTPException(status_code=404, detail="Post not found")
 
-    return PostResponse(
-        id=post.id,
-        author_id=post.author_id,
-        title=post.title,
-        content=post.content,
-        slug=post.slug,
-        status=post.status.value,
-        tags=post.tags,
-        created_at=post.created_at,
-        updated_at=post.updated_at,
-        published_at=post.published_at,
-    )
+    return DocumentResponse(post_document(post))
 
 
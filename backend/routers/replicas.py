@@ -0,0 +1,18 @@
+# routers/replicas.py
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from infra.db import start_routing_scope
+
+
+class ReadRoutingMiddleware:
+    """
+    每个请求使用新的 RoutingScope: 请求中提交过写入后, 同一请求后续的读取走写库
+    不同请求之间互不影响
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            start_routing_scope()
+        await self.app(scope, receive, send)
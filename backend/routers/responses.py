@@ -0,0 +1,18 @@
+"""
+直接输出 services.serialization 生成的 JSON
+
+路由返回 Response 对象时 FastAPI 跳过 response_model 的校验和序列化,
+response_model 仍然保留在路由上, 只用于生成 OpenAPI 文档
+"""
+from typing import Any
+
+from fastapi.responses import Response
+
+from services.serialization import dumps
+
+
+class DocumentResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
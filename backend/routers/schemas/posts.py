@@ -1,7 +1,10 @@
 # router/schemas/posts.py
 from datetime import datetime
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+# 批量接口每次最多处理的文章数
+BATCH_MAX_ITEMS = 1000
 
 
 class PostBase(BaseModel):
@@ -29,11 +32,21 @@ class PostArchiveRequest(BaseModel):
     author_id: int
 
 
+class PostBatchCreate(BaseModel):
+    items: List[PostCreate] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+
+
+class PostPublishBatchRequest(BaseModel):
+    author_id: int
+    post_ids: List[int] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+
+
 class PostResponse(BaseModel):
     id: int
     author_id: int
     title: str
     content: str
+    content_html: str = ""
     slug: str
     status: str
     tags: List[str]
@@ -43,3 +56,52 @@ class PostResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class BatchItemResponse(BaseModel):
+    """
+    批量接口中每一项的结果, index 对应请求中的位置
+    """
+    index: int
+    status: str
+    post: Optional[PostResponse] = None
+    error: Optional[str] = None
+
+
+class PostSummaryResponse(BaseModel):
+    """
+    列表接口使用, 不包含正文
+    """
+    id: int
+    author_id: int
+    title: str
+    slug: str
+    status: str
+    tags: List[str]
+    excerpt: str
+    created_at: datetime
+    updated_at: datetime
+    published_at: Optional[datetime] = None
+
+
+class SearchHitResponse(BaseModel):
+    id: int
+    author_id: int
+    title: str
+    slug: str
+    tags: List[str]
+    snippet: str
+    score: float
+    updated_at: datetime
+    published_at: Optional[datetime] = None
+
+
+class TagCountResponse(BaseModel):
+    tag: str
+    count: int
+
+
+class ArchiveMonthResponse(BaseModel):
+    year: int
+    month: int
+    count: int
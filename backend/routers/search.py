@@ -0,0 +1,24 @@
+# routers/search.py
+from typing import List
+from fastapi import APIRouter, Depends, Query
+
+from routers.schemas.posts import SearchHitResponse
+from routers.dependencies import get_blog_service
+from routers.responses import DocumentResponse
+from services.blog_service import AsyncBlogService
+from services.serialization import search_hit_document
+
+router = APIRouter()
+
+@router.get("/search", response_model=List[SearchHitResponse])
+async def search_posts(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50),
+    offset: int = Query(0, ge=0),
+    service: AsyncBlogService = Depends(get_blog_service),
+):
+    """
+    全文检索已发布文章, 按相关度排序, snippet 中的命中词用 <mark> 包裹
+    """
+    hits = await service.search_posts(q, limit=limit, offset=offset)
+    return DocumentResponse([search_hit_document(h) for h in hits])
@@ -0,0 +1,91 @@
+"""
+markdown 上传: 限制请求体大小, 分块读取, 边读边解码和计算hash
+"""
+import codecs
+import hashlib
+from dataclasses import dataclass
+from typing import Iterable
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# multipart 边界和表单字段(author_id/default_title/default_tags)允许额外占用的字节数
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+@dataclass
+class MarkdownUpload:
+    text: str
+    sha256: str
+    size: int
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"File too large, the limit is {max_bytes} bytes.")
+
+
+async def read_markdown_upload(file: UploadFile, *, max_bytes: int, chunk_size: int) -> MarkdownUpload:
+    """
+    分块读取上传文件, 内存中只保留解码后的文本:
+     - 超过 max_bytes 立即返回 413, 不再继续读取
+     - 增量 UTF-8 解码, 多字节字符跨块也能正确解码
+     - 同时计算原始字节的 sha256, 与 rendering.content_hash(text) 一致, 用于去重
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    digest = hashlib.sha256()
+    parts = []
+    size = 0
+    try:
+        while chunk := await file.read(chunk_size):
+            size += len(chunk)
+            if size > max_bytes:
+                raise _too_large(max_bytes)
+            digest.update(chunk)
+            parts.append(decoder.decode(chunk))
+        parts.append(decoder.decode(b"", final=True))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded.")
+    return MarkdownUpload(text="".join(parts), sha256=digest.hexdigest(), size=size)
+
+
+class UploadSizeLimitMiddleware:
+    """
+    在 multipart 解析之前限制上传接口的请求体大小:
+     - Content-Length 超过上限时直接返回 413, 不读取请求体
+     - 分块传输(没有 Content-Length)时边接收边计数, 超过上限立即中止
+    """
+    def __init__(self, app: ASGIApp, *, max_bytes: int, paths: Iterable[str]):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.max_body = max_bytes + MULTIPART_OVERHEAD
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_body:
+            error = _too_large(self.max_bytes)
+            response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body:
+                    # 在解析请求体时抛出, 由 FastAPI 转换为 413 响应
+                    raise _too_large(self.max_bytes)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -1,12 +1,22 @@
 import logging
+import re
 from datetime import datetime
-from typing import List, Optional
-from domains.posts import Post, PostStatus
-from infra.posts import BasePostRepo
+from typing import Dict, List, Optional
+from domains.posts import MAX_TAG_LENGTH, ArchiveMonth, BatchItemResult, Post, PostMeta, PostStatus, PostSummary, SearchHit, TagCount
+from infra.posts import AsyncBasePostRepo, BasePostRepo, Cursor, SlugConflictError
+from services.rendering import content_hash, parse_markdown_meta, render_markdown
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 并发创建同名文章时, slug冲突后重新分配的最大次数
+SLUG_MAX_RETRIES = 5
+
+
+class InvalidTagError(ValueError):
+    """
+    标签超过 MAX_TAG_LENGTH 个字符, post_tags / tag_counts 中存不下
+    """
+
 class BlogService:
     """
     博客应用服务层
@@ -25,17 +35,9 @@ class BlogService:
         """
         创建一篇草稿
         """
-        tags = tags or []
-        slug = self._generate_slug(title)
-        post = Post(
-                author_id=author_id,
-                title=title,
-                content=content,
-                slug=slug,
-                tags=tags,
-                status=PostStatus.DRAFT
-                )
-        return self.repo.save(post)
+        post = new_draft(author_id=author_id, title=title, content=content, tags=tags)
+        post.slug = self._generate_slug(title)
+        return self._save_with_unique_slug(post)
 
     def update_post(
             self,
@@ -49,33 +51,24 @@ class BlogService:
         """
         更新文章
         """
-        post = self.repo.get_post_by_id(post_id)
-        print(f"[services]正在更新文章, {post}")
-        if post is None:
-            raise ValueError("Post not found")
-        if post.author_id != author_id:
-            raise PermissionError("You are not the author of the post")
-
-        new_slug = None
-        if title is not None and title != post.title:
-            new_slug = self._generate_slug(title)
-
-        print(f"传入参数为title: {title}, content: {content}")
-        post.update_content(
-                title=title,
-                content=content,
-                tags=tags,
-                slug=new_slug,
-                )
-
-        return self.repo.save(post)
+        logger.debug("updating post %s", post_id)
+        post = check_author(self.repo.get_post_by_id(post_id), author_id)
+        if not apply_update(post, title=title, content=content, tags=tags):
+            return self.repo.save(post)
+        post.slug = self._generate_slug(post.title)
+        return self._save_with_unique_slug(post)
 
     def publish_post(self, *, post_id:int, author_id: int) -> Post:
         post = self.repo.get_post_by_id(post_id)
         if post is None:
-            logger.info(f"Post {post_id} not found")
+            logger.info("Post %s not found", post_id)
             raise ValueError("Post not Found")
-        post.publish()
+        publish_and_render(post)
+        return self.repo.save(post)
+
+    def archive_post(self, *, post_id: int, author_id: int) -> Post:
+        post = check_author(self.repo.get_post_by_id(post_id), author_id)
+        post.archive()
         return self.repo.save(post)
 
     def list_published_posts(
@@ -86,29 +79,87 @@ class BlogService:
             tag: Optional[str] = None,
             author_id: Optional[int] = None,
             published_before: Optional[datetime] = None,
+            cursor: Optional[Cursor] = None,
             ):
-        print(f"[service]: 正在查询列表")
         result = self.repo.list_published(
                 limit=limit,
                 offset=offset,
                 tag=tag,
                 author_id=author_id,
                 published_before=published_before,
+                cursor=cursor,
                 )
-        print(f"[service] Result : {result}")
+        logger.debug("listed %d published posts", len(result))
         return result
 
+    def list_published_summaries(
+            self,
+            *,
+            limit: int = 10,
+            offset: int = 0,
+            tag: Optional[str] = None,
+            author_id: Optional[int] = None,
+            published_before: Optional[datetime] = None,
+            cursor: Optional[Cursor] = None,
+            ) -> List[PostSummary]:
+        """
+        列表页使用, 只返回摘要不返回正文
+        """
+        return self.repo.list_published_summaries(
+                limit=limit,
+                offset=offset,
+                tag=tag,
+                author_id=author_id,
+                published_before=published_before,
+                cursor=cursor,
+                )
+
+    def list_published_meta(self, **filters) -> List[PostMeta]:
+        """
+        与 list_published_summaries 相同的筛选, 只返回元信息
+        """
+        return self.repo.list_published_meta(**filters)
+
+    def search_posts(self, query: str, *, limit: int = 10, offset: int = 0) -> List[SearchHit]:
+        """
+        全文检索已发布的文章
+        """
+        return self.repo.search(query, limit=limit, offset=offset)
+
+    def list_tag_counts(self, *, limit: Optional[int] = None) -> List[TagCount]:
+        """
+        标签云: 每个标签的已发布文章数
+        """
+        return self.repo.list_tag_counts(limit=limit)
+
+    def list_archive_months(self) -> List[ArchiveMonth]:
+        """
+        按年/月归档的已发布文章数
+        """
+        return self.repo.list_archive_months()
+
+    def get_post_meta_for_reader(self, slug: str) -> Optional[PostMeta]:
+        meta = self.repo.get_post_meta_by_slug(slug)
+        if meta is None or meta.status != PostStatus.PUBLISHED:
+            return None
+        return meta
+
     def get_post_by_slug_for_reader(self, slug: str) -> Optional[Post]:
         post = self.repo.get_post_by_slug(slug)
         if post is None:
-            print("该post为空")
+            logger.debug("post %s not found", slug)
             return None
         if post.status != PostStatus.PUBLISHED:
-            print(f"该post未发布")
+            logger.debug("post %s is not published", slug)
             return None
-        print(f"查询结果为: {post}")
         return post
 
+    def get_published_posts_by_ids(self, post_ids: List[int]) -> List[Post]:
+        """
+        按id批量读取, 忽略不存在和未发布的文章
+        """
+        return [post for post in self.repo.get_posts_by_ids(post_ids) if post.status == PostStatus.PUBLISHED]
+
     def create_from_markdown(
             self,
             *,
@@ -116,52 +167,407 @@ class BlogService:
             markdown_content: str,
             default_title: str = "Untitled",
             default_tags: Optional[List[str]] = None,
+            dedup_hash: Optional[str] = None,
             ) -> Post:
         """
         从markdown内容创建文章:
          - content先保存完整markdown
          - title/tags 使用解析
          - 如果解析失败就使用default_title / default_tags
+         - 传入 dedup_hash(正文的sha256) 时先去重: 该作者已有相同正文的文章则直接返回它
         """
-        default_tags = default_tags or []
-
+        if dedup_hash is not None:
+            existing = self.repo.get_post_by_content_hash(author_id, dedup_hash)
+            if existing is not None:
+                logger.info("post %s has the same content, skip creating", existing.id)
+                return existing
 
         # 2.使用parsing从markdown中解析元信息
-        title, tags = self._parsing_md(markdown_content)
-        if not title:
-            title = default_title
-        if not tags:
-            tags = default_tags
+        title, tags = prepare_markdown(
+                markdown_content,
+                default_title=default_title,
+                default_tags=default_tags,
+                )
+        post = new_draft(author_id=author_id, title=title, content=markdown_content, tags=tags)
+        post.slug = self._generate_slug(title)
+        return self._save_with_unique_slug(post)
 
-        slug = self._generate_slug(title)
+    def find_post_by_content(self, *, author_id: int, markdown_content: str) -> Optional[Post]:
+        """
+        该作者正文完全相同的文章(任意状态), 例如用 import --dir 导入过的文件
+        """
+        return self.repo.get_post_by_content_hash(author_id, content_hash(markdown_content))
 
-        post = Post(
-                author_id=author_id,
-                title=title,
-                content=markdown_content,
-                slug=slug,
-                tags=tags,
-                status=PostStatus.DRAFT,
-                )
+    def create_many_from_markdown(
+            self,
+            *,
+            author_id: int,
+            items: List[tuple[str, str, List[str]]],
+            ) -> List[Post]:
+        """
+        批量从markdown创建草稿, 整批在一个事务中写入:
+         - items 为 (markdown_content, title, tags), title/tags 已经通过 prepare_markdown 解析
+         - 同一批次内的slug也不能重复
+        """
+        posts = [
+                new_draft(author_id=author_id, title=title, content=markdown_content, tags=tags)
+                for markdown_content, title, tags in items
+                ]
+        return self._save_many_with_unique_slugs(posts)
 
-        return self.repo.save(post)
+    def create_drafts(self, items: List[tuple[int, str, str, List[str]]]) -> List[BatchItemResult]:
+        """
+        批量创建草稿, items 为 (author_id, title, content, tags)
+        整批一个事务: slug一次分配, 一次提交; 标签不合法的项返回 invalid, 不影响其他项
+        """
+        results, posts = plan_drafts(items)
+        saved = self._save_many_with_unique_slugs(posts) if posts else []
+        return fill_saved(results, "created", saved)
 
-    def _parsing_md(self, markdown_content: str) -> tuple[Optional[str], Optional[List[str]]]:
+    def publish_many(self, *, post_ids: List[int], author_id: int) -> List[BatchItemResult]:
         """
-        解析markdown中的title/tags:
+        批量发布: 一次查询取出所有文章, 逐项检查后一次提交
+        每个id返回一项结果, 不存在/不是作者的文章不影响其他文章
         """
-        return None, None
+        found = {post.id: post for post in self.repo.get_posts_by_ids(post_ids)}
+        results, to_save = plan_publish(found, post_ids, author_id)
+        saved = self.repo.save_many(to_save) if to_save else []
+        return fill_saved(results, "published", saved)
 
+    def _save_with_unique_slug(self, post: Post) -> Post:
+        """
+        保存文章; 如果并发写入导致slug冲突, 重新分配slug后重试
+        """
+        for attempt in range(SLUG_MAX_RETRIES):
+            try:
+                return self.repo.save(post)
+            except SlugConflictError:
+                logger.info("slug %s already taken, retrying (%s)", post.slug, attempt + 1)
+                post.slug = self._generate_slug(post.title)
+        raise SlugConflictError(post.slug)
+
+    def _save_many_with_unique_slugs(self, posts: List[Post]) -> List[Post]:
+        """
+        为整批文章分配slug后一次保存; 并发写入导致冲突时整批重新分配
+        """
+        for attempt in range(SLUG_MAX_RETRIES):
+            taken = self.repo.find_slugs_with_prefixes({slug_base(post.title) for post in posts})
+            assign_slugs(posts, taken)
+            try:
+                return self.repo.save_many(posts)
+            except SlugConflictError:
+                logger.info("slug conflict in batch, retrying (%s)", attempt + 1)
+        raise SlugConflictError("could not allocate unique slugs for batch")
 
     def _generate_slug(self, title: str) -> str:
-        base = "-".join(title.strip().lower().split())
-        if not base:
-            base = "post"
-        slug = base
-        index = 1
+        """
+        一次前缀查询拿到所有 base / base-N, 在内存中找第一个空闲的后缀
+        """
+        base = slug_base(title)
+        return first_free_slug(base, self.repo.find_slugs_with_prefix(base))
+
+
+# slug 会作为 URL 路径和静态导出的文件名: 只保留文字、数字、"_"、"-" 和 "."
+_SLUG_UNSAFE = re.compile(r"[^\w.-]+")
+_SLUG_DOTS = re.compile(r"\.{2,}")
+_SLUG_DASHES = re.compile(r"-{2,}")
+
+
+def slug_base(title: str) -> str:
+    """
+    空白和 "/" "\\" 等字符替换为 "-", 连续的 "." 合并, 首尾的 "-" "." 去掉, 不会出现 ".."
+    """
+    base = _SLUG_UNSAFE.sub("-", title.strip().lower())
+    base = _SLUG_DASHES.sub("-", _SLUG_DOTS.sub(".", base)).strip("-.")
+    return base or "post"
+
+
+def assign_slugs(posts: List[Post], taken: set[str]) -> None:
+    """
+    taken 为数据库中已有的slug; 分配出去的slug加入 taken, 同一批次内也不会重复
+    """
+    for post in posts:
+        post.slug = first_free_slug(slug_base(post.title), taken)
+        taken.add(post.slug)
+
+
+########################
+# 不依赖repo的部分, BlogService 和 AsyncBlogService 共用
+########################
+
+def prepare_markdown(
+        markdown_content: str,
+        *,
+        default_title: str = "Untitled",
+        default_tags: Optional[List[str]] = None,
+        ) -> tuple[str, List[str]]:
+    """
+    解析markdown得到最终的title/tags, 解析失败时使用默认值
+    不依赖repo, 可以在子进程中调用
+    """
+    title, tags = parse_markdown_meta(markdown_content)
+    return title or default_title, tags or (default_tags or [])
+
+
+def render_post(post: Post) -> None:
+    """
+    保存前渲染HTML; 正文hash没有变化时跳过, 读取时不再渲染
+    """
+    new_hash = content_hash(post.content)
+    if new_hash == post.content_hash:
+        return
+    post.content_html = render_markdown(post.content)
+    post.content_hash = new_hash
+
+
+def new_draft(*, author_id: int, title: str, content: str, tags: Optional[List[str]]) -> Post:
+    """
+    检查标签后创建并渲染一篇草稿, slug 由调用方查询repo后分配
+    """
+    post = Post(
+            author_id=author_id,
+            title=title,
+            content=content,
+            tags=check_tags(tags or []),
+            status=PostStatus.DRAFT,
+            )
+    render_post(post)
+    return post
+
+
+def check_author(post: Optional[Post], author_id: int) -> Post:
+    if post is None:
+        raise ValueError("Post not found")
+    if post.author_id != author_id:
+        raise PermissionError("You are not the author of the post")
+    return post
+
+
+def apply_update(
+        post: Post,
+        *,
+        title: Optional[str],
+        content: Optional[str],
+        tags: Optional[List[str]],
+        ) -> bool:
+    """
+    修改文章并重新渲染, 为 None 的字段不修改; 返回标题是否变化(需要重新分配slug)
+    """
+    if tags is not None:
+        check_tags(tags)
+    title_changed = title is not None and title != post.title
+    post.update_content(title=title, content=content, tags=tags)
+    render_post(post)
+    return title_changed
+
+
+def publish_and_render(post: Post) -> None:
+    post.publish()
+    render_post(post)
+
+
+def check_tags(tags: List[str]) -> List[str]:
+    """
+    标签去掉首尾空白后不能超过 MAX_TAG_LENGTH 个字符, 否则抛出 InvalidTagError
+    """
+    for tag in tags:
+        if len(tag.strip()) > MAX_TAG_LENGTH:
+            raise InvalidTagError(f"tag is longer than {MAX_TAG_LENGTH} characters: {tag.strip()[:MAX_TAG_LENGTH]}...")
+    return tags
+
+
+def plan_drafts(items: List[tuple[int, str, str, List[str]]]) -> tuple[List[BatchItemResult], List[Post]]:
+    """
+    批量创建的逐项检查, 返回 (每项的结果, 需要保存的文章)
+    """
+    results = []
+    posts = []
+    for index, (author_id, title, content, tags) in enumerate(items):
+        try:
+            post = new_draft(author_id=author_id, title=title, content=content, tags=tags)
+        except InvalidTagError as e:
+            results.append(BatchItemResult(index=index, status="invalid", error=str(e)))
+            continue
+        posts.append(post)
+        results.append(BatchItemResult(index=index, status="created", post=post))
+    return results, posts
+
+
+def fill_saved(results: List[BatchItemResult], status: str, saved: List[Post]) -> List[BatchItemResult]:
+    """
+    用保存后的文章替换 status 项中的文章, saved 与这些项的顺序相同
+    """
+    for result, post in zip([result for result in results if result.status == status], saved):
+        result.post = post
+    return results
+
+
+def plan_publish(found: Dict[int, Post], post_ids: List[int], author_id: int) -> tuple[List[BatchItemResult], List[Post]]:
+    """
+    批量发布的逐项检查, 返回 (每个id的结果, 需要保存的文章)
+    """
+    results = []
+    to_save: Dict[int, Post] = {}
+    for index, post_id in enumerate(post_ids):
+        post = found.get(post_id)
+        if post is None:
+            results.append(BatchItemResult(index=index, status="not_found", error="Post not found"))
+        elif post.author_id != author_id:
+            results.append(BatchItemResult(index=index, status="forbidden", error="You are not the author of the post"))
+        elif post.status == PostStatus.PUBLISHED or post_id in to_save:
+            results.append(BatchItemResult(index=index, status="unchanged", post=post))
+        else:
+            publish_and_render(post)
+            to_save[post_id] = post
+            results.append(BatchItemResult(index=index, status="published", post=post))
+    return results, list(to_save.values())
+
+
+def first_free_slug(base: str, taken: set[str]) -> str:
+    """
+    taken 为已有的 base / base-N
+    """
+    slug = base
+    index = 1
+
+    while slug in taken:
+        slug = f"{base}-{index}"
+        index += 1
+    return slug
+
+
+class AsyncBlogService:
+    """
+    BlogService 的异步版本, 供 web 路由使用; 规则与 BlogService 一致
+    两个类共用下面不依赖repo的函数, 这里只有读写repo的部分
+    """
+    def __init__(self, repo: AsyncBasePostRepo):
+        self.repo = repo
+
+    async def create_draft(
+            self,
+            *,
+            author_id: int,
+            title: str,
+            content: str,
+            tags: Optional[List[str]] = None,
+            ) -> Post:
+        post = new_draft(author_id=author_id, title=title, content=content, tags=tags)
+        post.slug = await self._generate_slug(title)
+        return await self._save_with_unique_slug(post)
+
+    async def update_post(
+            self,
+            *,
+            post_id: int,
+            author_id: int,
+            title: Optional[str] = None,
+            content: Optional[str] = None,
+            tags: Optional[List[str]] = None,
+            ) -> Post:
+        post = check_author(await self.repo.get_post_by_id(post_id), author_id)
+        if not apply_update(post, title=title, content=content, tags=tags):
+            return await self.repo.save(post)
+        post.slug = await self._generate_slug(post.title)
+        return await self._save_with_unique_slug(post)
+
+    async def publish_post(self, *, post_id: int, author_id: int) -> Post:
+        post = await self.repo.get_post_by_id(post_id)
+        if post is None:
+            logger.info("Post %s not found", post_id)
+            raise ValueError("Post not Found")
+        publish_and_render(post)
+        return await self.repo.save(post)
+
+    async def archive_post(self, *, post_id: int, author_id: int) -> Post:
+        post = check_author(await self.repo.get_post_by_id(post_id), author_id)
+        post.archive()
+        return await self.repo.save(post)
+
+    async def list_published_posts(self, **filters) -> List[Post]:
+        return await self.repo.list_published(**filters)
+
+    async def list_published_summaries(self, **filters) -> List[PostSummary]:
+        return await self.repo.list_published_summaries(**filters)
+
+    async def list_published_meta(self, **filters) -> List[PostMeta]:
+        return await self.repo.list_published_meta(**filters)
+
+    async def search_posts(self, query: str, *, limit: int = 10, offset: int = 0) -> List[SearchHit]:
+        return await self.repo.search(query, limit=limit, offset=offset)
+
+    async def list_tag_counts(self, *, limit: Optional[int] = None) -> List[TagCount]:
+        return await self.repo.list_tag_counts(limit=limit)
+
+    async def list_archive_months(self) -> List[ArchiveMonth]:
+        return await self.repo.list_archive_months()
+
+    async def get_post_meta_for_reader(self, slug: str) -> Optional[PostMeta]:
+        meta = await self.repo.get_post_meta_by_slug(slug)
+        if meta is None or meta.status != PostStatus.PUBLISHED:
+            return None
+        return meta
+
+    async def get_post_by_slug_for_reader(self, slug: str) -> Optional[Post]:
+        post = await self.repo.get_post_by_slug(slug)
+        if post is None or post.status != PostStatus.PUBLISHED:
+            return None
+        return post
+
+    async def create_from_markdown(
+            self,
+            *,
+            author_id: int,
+            markdown_content: str,
+            default_title: str = "Untitled",
+            default_tags: Optional[List[str]] = None,
+            dedup_hash: Optional[str] = None,
+            ) -> Post:
+        if dedup_hash is not None:
+            existing = await self.repo.get_post_by_content_hash(author_id, dedup_hash)
+            if existing is not None:
+                logger.info("post %s has the same content, skip creating", existing.id)
+                return existing
+
+        title, tags = prepare_markdown(
+                markdown_content,
+                default_title=default_title,
+                default_tags=default_tags,
+                )
+        post = new_draft(author_id=author_id, title=title, content=markdown_content, tags=tags)
+        post.slug = await self._generate_slug(title)
+        return await self._save_with_unique_slug(post)
+
+    async def create_drafts(self, items: List[tuple[int, str, str, List[str]]]) -> List[BatchItemResult]:
+        results, posts = plan_drafts(items)
+        saved = await self._save_many_with_unique_slugs(posts) if posts else []
+        return fill_saved(results, "created", saved)
+
+    async def publish_many(self, *, post_ids: List[int], author_id: int) -> List[BatchItemResult]:
+        found = {post.id: post for post in await self.repo.get_posts_by_ids(post_ids)}
+        results, to_save = plan_publish(found, post_ids, author_id)
+        saved = await self.repo.save_many(to_save) if to_save else []
+        return fill_saved(results, "published", saved)
+
+    async def _save_many_with_unique_slugs(self, posts: List[Post]) -> List[Post]:
+        for attempt in range(SLUG_MAX_RETRIES):
+            taken = await self.repo.find_slugs_with_prefixes({slug_base(post.title) for post in posts})
+            assign_slugs(posts, taken)
+            try:
+                return await self.repo.save_many(posts)
+            except SlugConflictError:
+                logger.info("slug conflict in batch, retrying (%s)", attempt + 1)
+        raise SlugConflictError("could not allocate unique slugs for batch")
 
-        while self.repo.get_post_by_slug(slug) is not None:
-            slug = f"{base}-{index}"
-            index += 1
-        return slug
+    async def _save_with_unique_slug(self, post: Post) -> Post:
+        for attempt in range(SLUG_MAX_RETRIES):
+            try:
+                return await self.repo.save(post)
+            except SlugConflictError:
+                logger.info("slug %s already taken, retrying (%s)", post.slug, attempt + 1)
+                post.slug = await self._generate_slug(post.title)
+        raise SlugConflictError(post.slug)
 
+    async def _generate_slug(self, title: str) -> str:
+        base = slug_base(title)
+        return first_free_slug(base, await self.repo.find_slugs_with_prefix(base))
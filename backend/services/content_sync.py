@@ -0,0 +1,213 @@
+"""
+content/ 目录增量同步:
+ - manifest 记录 源文件路径 -> 内容hash -> post id
+ - 未变化的文件直接跳过(mtime+size 相同时连文件都不读)
+ - 内容变化的文件通过 BlogService.update_post 原地更新
+ - 新文件先按正文匹配该作者已有的文章(例如 import --dir 导入过的), 匹配不到的批量创建草稿
+ - 不是该作者的文章、读取失败或者不是 UTF-8 的文件记录在 report.errors 中, 其他文件照常同步
+ - 可选: 源文件被删除时归档对应文章
+"""
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from domains.posts import Post
+from services.blog_service import BlogService, InvalidTagError, check_tags, prepare_markdown
+
+@dataclass
+class ManifestEntry:
+    content_hash: str
+    post_id: int
+    mtime_ns: int
+    size: int
+
+
+@dataclass
+class SyncReport:
+    created: List[str] = field(default_factory=list)
+    # 与数据库中已有文章匹配上的新文件
+    matched: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    archived: List[str] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+    # "路径: 原因", 这些文件的 manifest 记录保持不变, 下次同步会再试
+    errors: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    elapsed: float = 0.0
+
+
+class ContentManifest:
+    """
+    sidecar json 文件, 形如 {"2025/Aug/26/a.md": {"content_hash": ..., "post_id": ...}}
+    """
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries: Dict[str, ManifestEntry] = {}
+
+    def load(self) -> "ContentManifest":
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            self.entries = {key: ManifestEntry(**value) for key, value in raw.items()}
+        return self
+
+    def save(self) -> None:
+        # 先写临时文件再替换, 中途失败不会留下半个manifest
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {key: vars(entry) for key, entry in sorted(self.entries.items())},
+                f,
+                ensure_ascii=False,
+                indent=2,
+                )
+        os.replace(tmp_path, self.path)
+
+
+def hash_content(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _find_existing(service: BlogService, author_id: int, markdown_content: str, claimed: set) -> Optional[Post]:
+    """
+    import --dir 以文本模式读取文件, 换行符已经统一为 LF, 原样和统一换行后各试一次
+    """
+    candidates = dict.fromkeys([markdown_content, markdown_content.replace("\r\n", "\n").replace("\r", "\n")])
+    for content in candidates:
+        post = service.find_post_by_content(author_id=author_id, markdown_content=content)
+        if post is not None and post.id not in claimed:
+            return post
+    return None
+
+
+def sync_content_dir(
+        service: BlogService,
+        directory: Path,
+        manifest: ContentManifest,
+        *,
+        author_id: int,
+        default_tags: Optional[List[str]] = None,
+        archive_missing: bool = False,
+        ) -> SyncReport:
+    """
+    将 directory 下的markdown与数据库同步, 返回同步结果
+    """
+    start = time.perf_counter()
+    directory = Path(directory)
+    report = SyncReport()
+    seen = set()
+    # manifest 中已经对应了文件的文章, 不再匹配给其他文件
+    claimed = {entry.post_id for entry in manifest.entries.values()}
+    pending_new = []
+    dirty = False
+
+    try:
+        for path in sorted(directory.rglob("*.md")):
+            key = path.relative_to(directory).as_posix()
+            seen.add(key)
+            try:
+                stat = path.stat()
+            except OSError as e:
+                report.errors.append(f"{key}: {e}")
+                continue
+            entry = manifest.entries.get(key)
+
+            # 1. mtime 和 size 都没变, 认为内容未变化
+            if entry is not None and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+                report.unchanged += 1
+                continue
+
+            try:
+                data = path.read_bytes()
+            except OSError as e:
+                report.errors.append(f"{key}: {e}")
+                continue
+            content_hash = hash_content(data)
+            if entry is not None and entry.content_hash == content_hash:
+                # 只是被touch过, 刷新stat即可
+                entry.mtime_ns, entry.size = stat.st_mtime_ns, stat.st_size
+                report.unchanged += 1
+                dirty = True
+                continue
+
+            try:
+                markdown_content = data.decode("utf-8")
+            except UnicodeDecodeError as e:
+                report.errors.append(f"{key}: not valid UTF-8 ({e})")
+                continue
+            title, tags = prepare_markdown(
+                    markdown_content,
+                    default_title=path.stem,
+                    default_tags=default_tags,
+                    )
+            try:
+                check_tags(tags)
+            except InvalidTagError as e:
+                report.errors.append(f"{key}: {e}")
+                continue
+
+            # 2. 内容有变化, 原地更新
+            if entry is not None:
+                try:
+                    service.update_post(
+                            post_id=entry.post_id,
+                            author_id=author_id,
+                            title=title,
+                            content=markdown_content,
+                            tags=tags,
+                            )
+                    manifest.entries[key] = ManifestEntry(content_hash, entry.post_id, stat.st_mtime_ns, stat.st_size)
+                    report.updated.append(key)
+                    continue
+                except ValueError:
+                    # 文章已经被删除, 当作新文件处理
+                    pass
+                except PermissionError as e:
+                    report.errors.append(f"{key}: {e}")
+                    continue
+
+            # 3. 新文件: 数据库中已经有相同正文的文章时直接记录, 不重复创建
+            existing = _find_existing(service, author_id, markdown_content, claimed)
+            if existing is not None:
+                claimed.add(existing.id)
+                manifest.entries[key] = ManifestEntry(content_hash, existing.id, stat.st_mtime_ns, stat.st_size)
+                report.matched.append(key)
+                continue
+
+            pending_new.append((key, content_hash, stat, (markdown_content, title, tags)))
+
+        # 4. 其余新文件在一个事务中批量创建
+        if pending_new:
+            posts = service.create_many_from_markdown(
+                    author_id=author_id,
+                    items=[item for *_, item in pending_new],
+                    )
+            for (key, content_hash, stat, _), post in zip(pending_new, posts):
+                manifest.entries[key] = ManifestEntry(content_hash, post.id, stat.st_mtime_ns, stat.st_size)
+                report.created.append(key)
+
+        # 5. 源文件已删除, 不归档时保留manifest记录, 文件恢复后不会重复创建
+        for key in sorted(set(manifest.entries) - seen):
+            if not archive_missing:
+                report.missing.append(key)
+                continue
+            try:
+                service.archive_post(post_id=manifest.entries[key].post_id, author_id=author_id)
+            except ValueError:
+                pass
+            except PermissionError as e:
+                report.errors.append(f"{key}: {e}")
+                continue
+            del manifest.entries[key]
+            report.archived.append(key)
+    finally:
+        # 中途出错时也保存已经同步的文件, 下次不会重复处理
+        if dirty or report.created or report.matched or report.updated or report.archived:
+            manifest.save()
+        report.elapsed = time.perf_counter() - start
+    return report
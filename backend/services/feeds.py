@@ -0,0 +1,253 @@
+"""
+RSS / Atom / sitemap.xml
+ - 由已发布文章生成一次后缓存在进程内, 同时保存 gzip (安装了 brotli 时还有 br) 的压缩版本
+ - 发布/修改/归档改变已发布文章后(包括其他 worker 通过 Redis 广播的失效消息), 下一次请求时重新生成
+ - 收不到失效消息的写入(没有配置 Redis 时其他进程的写入)最多 max_age 秒后生效
+"""
+import asyncio
+import gzip
+import hashlib
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+from urllib.parse import quote
+from xml.etree import ElementTree as ET
+
+from domains.posts import PostMeta, PostSummary
+from services.blog_service import AsyncBlogService
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ATOM_NS = "http://www.w3.org/2005/Atom"
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+# 单个 sitemap 文件最多 50000 个 URL
+SITEMAP_MAX_URLS = 50_000
+# 生成 sitemap 时每次读取的文章数
+FETCH_BATCH = 500
+# 没有文章时 Atom 的 updated
+EPOCH = datetime(1970, 1, 1)
+
+
+@dataclass
+class FeedSite:
+    url: str
+    title: str
+    # RSS/Atom 中的文章数
+    items: int = 20
+
+    def post_url(self, slug: str) -> str:
+        # 与前端路由 /posts/[slug] 一致
+        return f"{self.url}/posts/{quote(slug, safe='')}"
+
+
+@dataclass
+class FeedDocument:
+    media_type: str
+    body: bytes
+    last_modified: Optional[datetime]
+    digest: str = field(init=False, default="")
+    # 预压缩版本: Content-Encoding -> 内容
+    encoded: Dict[str, bytes] = field(init=False, default_factory=dict)
+
+    def __post_init__(self):
+        self.digest = hashlib.sha1(self.body).hexdigest()[:20]
+        self.encoded["gzip"] = gzip.compress(self.body, compresslevel=9, mtime=0)
+        if brotli is not None:
+            self.encoded["br"] = brotli.compress(self.body)
+
+    def variant(self, accept_encoding: str) -> tuple[Optional[str], bytes, str]:
+        """
+        按 Accept-Encoding 选择版本, 返回 (Content-Encoding, 内容, ETag)
+        不同编码的内容不同, ETag 也不同
+        """
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding in self.encoded and accepted.get(encoding, accepted.get("*", 0)) > 0:
+                return encoding, self.encoded[encoding], f'"{self.digest}-{encoding}"'
+        return None, self.body, f'"{self.digest}"'
+
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
+
+
+def _rfc3339(dt: datetime) -> str:
+    # 数据库中保存的是 UTC 的 naive datetime
+    return dt.replace(microsecond=0).isoformat() + "Z"
+
+
+def _rfc822(dt: datetime) -> str:
+    return format_datetime(dt.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def _text(parent: ET.Element, tag: str, text: str, **attrib) -> ET.Element:
+    element = ET.SubElement(parent, tag, attrib)
+    element.text = text
+    return element
+
+
+def _published(item: PostSummary) -> datetime:
+    return item.published_at or item.created_at
+
+
+def render_rss(site: FeedSite, summaries: List[PostSummary]) -> bytes:
+    rss = ET.Element("rss", version="2.0")
+    channel = ET.SubElement(rss, "channel")
+    _text(channel, "title", site.title)
+    _text(channel, "link", f"{site.url}/")
+    _text(channel, "description", site.title)
+    if summaries:
+        _text(channel, "lastBuildDate", _rfc822(max(s.updated_at for s in summaries)))
+    for summary in summaries:
+        url = site.post_url(summary.slug)
+        item = ET.SubElement(channel, "item")
+        _text(item, "title", summary.title)
+        _text(item, "link", url)
+        _text(item, "guid", url, isPermaLink="true")
+        _text(item, "pubDate", _rfc822(_published(summary)))
+        _text(item, "description", summary.excerpt)
+        for tag in summary.tags:
+            _text(item, "category", tag)
+    return ET.tostring(rss, encoding="utf-8", xml_declaration=True)
+
+
+def render_atom(site: FeedSite, summaries: List[PostSummary]) -> bytes:
+    feed = ET.Element("feed", xmlns=ATOM_NS)
+    _text(feed, "id", f"{site.url}/")
+    _text(feed, "title", site.title)
+    _text(feed, "updated", _rfc3339(max((s.updated_at for s in summaries), default=EPOCH)))
+    ET.SubElement(feed, "link", href=f"{site.url}/")
+    author = ET.SubElement(feed, "author")
+    _text(author, "name", site.title)
+    for summary in summaries:
+        url = site.post_url(summary.slug)
+        entry = ET.SubElement(feed, "entry")
+        _text(entry, "id", url)
+        _text(entry, "title", summary.title)
+        ET.SubElement(entry, "link", href=url)
+        _text(entry, "published", _rfc3339(_published(summary)))
+        _text(entry, "updated", _rfc3339(summary.updated_at))
+        _text(entry, "summary", summary.excerpt)
+        for tag in summary.tags:
+            ET.SubElement(entry, "category", term=tag)
+    return ET.tostring(feed, encoding="utf-8", xml_declaration=True)
+
+
+def render_sitemap(site: FeedSite, metas: List[PostMeta]) -> bytes:
+    urlset = ET.Element("urlset", xmlns=SITEMAP_NS)
+    home = ET.SubElement(urlset, "url")
+    _text(home, "loc", f"{site.url}/")
+    if metas:
+        _text(home, "lastmod", _rfc3339(max(m.updated_at for m in metas)))
+    for meta in metas[:SITEMAP_MAX_URLS - 1]:
+        url = ET.SubElement(urlset, "url")
+        _text(url, "loc", site.post_url(meta.slug))
+        _text(url, "lastmod", _rfc3339(meta.updated_at))
+    return ET.tostring(urlset, encoding="utf-8", xml_declaration=True)
+
+
+class FeedCache:
+    """
+    生成好的 feed/sitemap, 按 version() 判断是否过期
+    version 由 AsyncCachedPostRepo.published_version 提供, 已发布文章变化(本进程写入或收到失效消息)时增加
+    同一时间只有一个请求重新生成, 其他请求等待后直接使用结果
+    """
+    def __init__(
+            self,
+            service: AsyncBlogService,
+            site: FeedSite,
+            *,
+            version: Callable[[], int],
+            max_age: float = 300.0,
+            clock: Callable[[], float] = time.monotonic,
+            ):
+        self.service = service
+        self.site = site
+        self.version = version
+        self.max_age = max_age
+        self._clock = clock
+        self._documents: Dict[str, tuple[int, float, FeedDocument]] = {}
+        self._lock = asyncio.Lock()
+        self._builders: Dict[str, Callable[[], Awaitable[FeedDocument]]] = {
+            "rss": self._build_rss,
+            "atom": self._build_atom,
+            "sitemap": self._build_sitemap,
+        }
+        self.builds = 0
+
+    def _fresh(self, name: str) -> Optional[FeedDocument]:
+        cached = self._documents.get(name)
+        if cached is None:
+            return None
+        version, expires_at, document = cached
+        if version != self.version() or expires_at <= self._clock():
+            return None
+        return document
+
+    async def get(self, name: str) -> FeedDocument:
+        document = self._fresh(name)
+        if document is not None:
+            return document
+        async with self._lock:
+            document = self._fresh(name)
+            if document is not None:
+                return document
+            # 先记下版本: 生成期间有新的写入时, 下一次请求会再生成一次
+            version = self.version()
+            document = await self._builders[name]()
+            self._documents[name] = (version, self._clock() + self.max_age, document)
+            self.builds += 1
+            return document
+
+    async def _latest(self) -> List[PostSummary]:
+        return await self.service.list_published_summaries(limit=self.site.items)
+
+    async def _build_rss(self) -> FeedDocument:
+        summaries = await self._latest()
+        return FeedDocument(
+                media_type="application/rss+xml; charset=utf-8",
+                body=render_rss(self.site, summaries),
+                last_modified=max((s.updated_at for s in summaries), default=None),
+                )
+
+    async def _build_atom(self) -> FeedDocument:
+        summaries = await self._latest()
+        return FeedDocument(
+                media_type="application/atom+xml; charset=utf-8",
+                body=render_atom(self.site, summaries),
+                last_modified=max((s.updated_at for s in summaries), default=None),
+                )
+
+    async def _build_sitemap(self) -> FeedDocument:
+        metas: List[PostMeta] = []
+        cursor = None
+        while len(metas) < SITEMAP_MAX_URLS:
+            batch = await self.service.list_published_meta(limit=FETCH_BATCH, cursor=cursor)
+            metas.extend(batch)
+            if len(batch) < FETCH_BATCH:
+                break
+            last = batch[-1]
+            cursor = (last.published_at, last.id)
+        return FeedDocument(
+                media_type="application/xml; charset=utf-8",
+                body=render_sitemap(self.site, metas),
+                last_modified=max((m.updated_at for m in metas), default=None),
+                )
@@ -0,0 +1,124 @@
+"""
+markdown 处理:
+ - 解析 YAML front matter 和标题
+ - 渲染为经过清洗的 HTML, 保存时渲染一次, 读取时不再渲染
+ - markdown / yaml 导入较慢, 只在写入时才用到, 第一次调用时再导入, 不计入启动时间
+"""
+import hashlib
+import re
+from typing import Any, Dict, List, Optional
+
+import nh3
+
+_FRONT_MATTER = re.compile(r"\A---[ \t]*\r?\n(.*?)\r?\n---[ \t]*(?:\r?\n|\Z)", re.DOTALL)
+_ATX_HEADING = re.compile(r"^#{1,6}[ \t]+(.+?)[ \t#]*$")
+_BOLD_LINE = re.compile(r"^\*\*(.+)\*\*$")
+
+# 这些标题只是一个"标题"标签, 真正的标题在下一行, 例如 "### 标题" / "**标题**"
+_TITLE_LABELS = {"标题", "title"}
+# 通用章节名不适合作为文章标题
+_GENERIC_HEADINGS = {"introduction", "引言", "简介", "前言", "目录"}
+
+_MARKDOWN_EXTENSIONS = ["extra", "sane_lists", "toc"]
+
+# 在 nh3 默认白名单的基础上允许代码高亮和标题锚点需要的属性
+_ALLOWED_ATTRIBUTES = {
+    **{tag: set(attrs) for tag, attrs in nh3.ALLOWED_ATTRIBUTES.items()},
+    "code": {"class"},
+    "div": {"class"},
+    "span": {"class"},
+    **{f"h{i}": {"id"} for i in range(1, 7)},
+}
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def split_front_matter(markdown_content: str) -> tuple[Dict[str, Any], str]:
+    """
+    拆分 front matter 和正文; 没有 front matter 或者 YAML 不合法时返回空字典
+    """
+    match = _FRONT_MATTER.match(markdown_content)
+    if match is None:
+        return {}, markdown_content
+    import yaml
+
+    try:
+        meta = yaml.safe_load(match.group(1))
+    except yaml.YAMLError:
+        return {}, markdown_content
+    if not isinstance(meta, dict):
+        return {}, markdown_content
+    return meta, markdown_content[match.end():]
+
+
+def _clean_heading(text: str) -> str:
+    text = text.strip().strip("*_").strip()
+    # 去掉 "标题：" 这类前缀中的标点
+    return text.rstrip(":：").strip()
+
+
+def _is_title_label(text: str) -> bool:
+    text = _clean_heading(text)
+    # 例如 "标题（吸引且准确，包含关键词）"
+    text = re.split(r"[（(]", text, maxsplit=1)[0].strip()
+    words = text.split()
+    return text.lower() in _TITLE_LABELS or (bool(words) and words[-1].lower() in _TITLE_LABELS)
+
+
+def extract_title(body: str) -> Optional[str]:
+    """
+    从正文开头找标题:
+     - 第一个 ATX 标题 (# xxx)
+     - 如果它只是 "标题" 标签, 使用下一段非空文本
+    """
+    lines = [line.strip() for line in body.splitlines()]
+    for i, line in enumerate(lines):
+        if not line:
+            continue
+        heading = _ATX_HEADING.match(line)
+        bold = _BOLD_LINE.match(line)
+        text = heading.group(1) if heading else bold.group(1) if bold else None
+        if text is None:
+            return None
+        if _is_title_label(text):
+            following = next((l for l in lines[i + 1:] if l and l != "---"), None)
+            if following is None:
+                return None
+            following = _ATX_HEADING.sub(r"\1", following)
+            return _clean_heading(following) or None
+        title = _clean_heading(text)
+        if not title or title.lower() in _GENERIC_HEADINGS:
+            return None
+        return title
+    return None
+
+
+def _normalize_tags(value: Any) -> List[str]:
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, list):
+        return []
+    return [str(tag).strip() for tag in value if str(tag).strip()]
+
+
+def parse_markdown_meta(markdown_content: str) -> tuple[Optional[str], Optional[List[str]]]:
+    """
+    front matter 中的 title/tags 优先, 没有 title 时从标题中解析
+    """
+    meta, body = split_front_matter(markdown_content)
+    title = meta.get("title")
+    title = str(title).strip() if title else extract_title(body)
+    tags = _normalize_tags(meta.get("tags", meta.get("categories")))
+    return title or None, tags or None
+
+
+def render_markdown(markdown_content: str) -> str:
+    """
+    markdown -> 清洗过的 HTML, front matter 不参与渲染
+    """
+    import markdown
+
+    _, body = split_front_matter(markdown_content)
+    html = markdown.markdown(body, extensions=_MARKDOWN_EXTENSIONS, output_format="html")
+    return nh3.clean(html, attributes=_ALLOWED_ATTRIBUTES)
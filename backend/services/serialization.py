@@ -0,0 +1,107 @@
+"""
+文章的 JSON 序列化: dataclass -> dict -> bytes
+ - 字段与 routers/schemas 中的响应模型一致, 路由直接返回 bytes, 不再构造 pydantic 模型再校验一遍
+ - 静态导出也使用同一份转换, 保证和接口返回相同
+ - 安装了 orjson 时使用 orjson, 否则使用 pydantic_core.to_json (pydantic 自带), 两者输出的字节相同
+"""
+from typing import Any, Callable, Dict
+
+from pydantic_core import to_json
+
+from domains.posts import ArchiveMonth, BatchItemResult, Post, PostSummary, SearchHit, TagCount
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def post_document(post: Post) -> Dict[str, Any]:
+    """
+    与 PostResponse 字段一致
+    """
+    return {
+        "id": post.id,
+        "author_id": post.author_id,
+        "title": post.title,
+        "content": post.content,
+        "content_html": post.content_html,
+        "slug": post.slug,
+        "status": post.status.value,
+        "tags": post.tags,
+        "created_at": post.created_at,
+        "updated_at": post.updated_at,
+        "published_at": post.published_at,
+    }
+
+
+def summary_document(summary: PostSummary) -> Dict[str, Any]:
+    """
+    与 PostSummaryResponse 字段一致
+    """
+    return {
+        "id": summary.id,
+        "author_id": summary.author_id,
+        "title": summary.title,
+        "slug": summary.slug,
+        "status": summary.status.value,
+        "tags": summary.tags,
+        "excerpt": summary.excerpt,
+        "created_at": summary.created_at,
+        "updated_at": summary.updated_at,
+        "published_at": summary.published_at,
+    }
+
+
+def search_hit_document(hit: SearchHit) -> Dict[str, Any]:
+    """
+    与 SearchHitResponse 字段一致
+    """
+    return {
+        "id": hit.id,
+        "author_id": hit.author_id,
+        "title": hit.title,
+        "slug": hit.slug,
+        "tags": hit.tags,
+        "snippet": hit.snippet,
+        "score": hit.score,
+        "updated_at": hit.updated_at,
+        "published_at": hit.published_at,
+    }
+
+
+def batch_item_document(result: BatchItemResult) -> Dict[str, Any]:
+    """
+    与 BatchItemResponse 字段一致
+    """
+    return {
+        "index": result.index,
+        "status": result.status,
+        "post": post_document(result.post) if result.post else None,
+        "error": result.error,
+    }
+
+
+def tag_count_document(item: TagCount) -> Dict[str, Any]:
+    """
+    与 TagCountResponse 字段一致
+    """
+    return {"tag": item.tag, "count": item.count}
+
+
+def archive_month_document(item: ArchiveMonth) -> Dict[str, Any]:
+    """
+    与 ArchiveMonthResponse 字段一致
+    """
+    return {"year": item.year, "month": item.month, "count": item.count}
+
+
+def _dumps_pydantic(document: Any) -> bytes:
+    return to_json(document)
+
+
+def _dumps_orjson(document: Any) -> bytes:
+    return orjson.dumps(document)
+
+
+dumps: Callable[[Any], bytes] = _dumps_orjson if orjson is not None else _dumps_pydantic
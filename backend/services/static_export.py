@@ -0,0 +1,293 @@
+"""
+静态导出: 把已发布文章预渲染成静态文件, 由前端或 nginx 直接读取
+ - posts/{slug}.json, posts/{slug}.html: 单篇文章, json 与 GET /posts/{slug} 的响应相同
+ - posts/page/{n}.json: 已发布文章列表, 与 GET /posts 的响应相同
+ - tags/index.json, tags/{tag}/page/{n}.json: 标签及各标签下的文章列表
+增量: manifest 记录每个文件的内容hash, 单篇文章额外记录 updated_at,
+updated_at 没变的文章不会重新加载正文, 内容hash没变的文件不会重写; 不再需要的文件会被删除
+所有文件先写临时文件再替换, 读取方不会读到写了一半的文件
+不在导出目录内的路径(slug 中有 "/" 或 ".." 的旧文章, 被改过的 manifest)一律拒绝
+"""
+import hashlib
+import html
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import quote
+
+from domains.posts import Post, PostSummary
+from services.blog_service import BlogService
+from services.serialization import dumps, post_document, summary_document
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = ".export-manifest.json"
+# 每次从数据库读取的摘要/文章数
+FETCH_BATCH = 500
+# 标签作为目录名时需要转义的字符
+UNSAFE_PATH_CHARS = frozenset('/\\%?#\0')
+
+HTML_TEMPLATE = """<!doctype html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+</head>
+<body>
+<article>
+<h1>{title}</h1>
+<p><time datetime="{published}">{published}</time> {tags}</p>
+{body}
+</article>
+</body>
+</html>
+"""
+
+
+@dataclass
+class ExportEntry:
+    digest: str
+    # 只有单篇文章的文件记录, 用来跳过未修改的文章
+    updated_at: Optional[str] = None
+
+
+@dataclass
+class ExportReport:
+    written: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    # slug 不能作为文件名而跳过的文章
+    skipped: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    posts_rendered: int = 0
+    elapsed: float = 0.0
+
+
+class ExportManifest:
+    """
+    导出目录中的 .export-manifest.json, 形如 {"posts/hello.json": {"digest": ..., "updated_at": ...}}
+    """
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries: Dict[str, ExportEntry] = {}
+
+    def load(self) -> "ExportManifest":
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            self.entries = {key: ExportEntry(**value) for key, value in raw.items()}
+        return self
+
+    def save(self) -> None:
+        data = json.dumps(
+                {key: vars(entry) for key, entry in sorted(self.entries.items())},
+                ensure_ascii=False,
+                indent=2,
+                )
+        write_atomic(self.path, data.encode("utf-8"))
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """
+    写入同目录下的临时文件再 os.replace, 替换是原子的
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def post_html(post: Post) -> bytes:
+    tags = " ".join(f"#{html.escape(tag)}" for tag in post.tags)
+    return HTML_TEMPLATE.format(
+            title=html.escape(post.title),
+            published=_isoformat(post.published_at) or "",
+            tags=tags,
+            body=post.content_html,
+            ).encode("utf-8")
+
+
+def tag_dir(tag: str) -> str:
+    # 中文和空格保持原样(nginx 会先解码URL再找文件), 只转义不能出现在目录名里的字符
+    name = "".join(quote(c, safe="") if c in UNSAFE_PATH_CHARS else c for c in tag)
+    if name.startswith("."):
+        name = "%2E" + name[1:]
+    return f"tags/{name}"
+
+
+def is_safe_slug(slug: str) -> bool:
+    """
+    slug 必须是单独一段文件名; 新的 slug 由 slug_base 生成, 总是满足, 旧数据不一定
+    """
+    return bool(slug) and not slug.startswith(".") and "/" not in slug and "\\" not in slug and "\0" not in slug
+
+
+def iter_published_summaries(service: BlogService) -> Iterator[PostSummary]:
+    """
+    按发布时间倒序遍历所有已发布文章的摘要, 用游标分批读取
+    """
+    cursor = None
+    while True:
+        batch = service.list_published_summaries(limit=FETCH_BATCH, cursor=cursor)
+        yield from batch
+        if len(batch) < FETCH_BATCH:
+            return
+        last = batch[-1]
+        cursor = (last.published_at or last.created_at, last.id)
+
+
+def paginate(items: List[dict], page_size: int) -> Iterator[tuple[int, List[dict]]]:
+    """
+    页码从1开始; 没有文章时也输出空的第一页
+    """
+    if not items:
+        yield 1, []
+        return
+    for start in range(0, len(items), page_size):
+        yield start // page_size + 1, items[start:start + page_size]
+
+
+class StaticExporter:
+    def __init__(self, service: BlogService, out_dir: Path, *, page_size: int = 10, force: bool = False):
+        self.service = service
+        self.out_dir = Path(out_dir)
+        self.page_size = page_size
+        # 忽略 manifest 重新生成所有文件, 例如修改了 HTML 模板之后
+        self.force = force
+        self._root = self.out_dir.resolve()
+        self.manifest = ExportManifest(self.out_dir / MANIFEST_NAME).load()
+        self.report = ExportReport()
+        self._produced: set[str] = set()
+        self._manifest_dirty = False
+
+    def _target(self, key: str) -> Optional[Path]:
+        """
+        key 对应的文件, 解析后不在导出目录内时返回 None
+        """
+        path = (self.out_dir / key).resolve()
+        if path == self._root or not path.is_relative_to(self._root):
+            return None
+        return path
+
+    def _unchanged(self, key: str, digest: str) -> bool:
+        entry = self.manifest.entries.get(key)
+        return not self.force and entry is not None and entry.digest == digest and (self.out_dir / key).exists()
+
+    def emit(self, key: str, data: bytes, *, updated_at: Optional[str] = None) -> None:
+        """
+        内容hash与上次相同且文件还在时跳过, 否则原子写入
+        """
+        target = self._target(key)
+        if target is None:
+            raise ValueError(f"export path {key!r} is outside {self.out_dir}")
+        self._produced.add(key)
+        digest = hashlib.sha256(data).hexdigest()
+        if self._unchanged(key, digest):
+            entry = self.manifest.entries[key]
+            if entry.updated_at != updated_at:
+                # 文章被保存过但输出没变, 记下新的 updated_at, 下次不再加载
+                entry.updated_at = updated_at
+                self._manifest_dirty = True
+            self.report.unchanged += 1
+            return
+        write_atomic(target, data)
+        self.manifest.entries[key] = ExportEntry(digest=digest, updated_at=updated_at)
+        self.report.written.append(key)
+
+    def _post_is_fresh(self, keys: List[str], updated_at: str) -> bool:
+        if self.force:
+            return False
+        for key in keys:
+            entry = self.manifest.entries.get(key)
+            if entry is None or entry.updated_at != updated_at or not (self.out_dir / key).exists():
+                return False
+        return True
+
+    def export_posts(self, summaries: List[PostSummary]) -> None:
+        stale = []
+        for summary in summaries:
+            if not is_safe_slug(summary.slug):
+                logger.warning("skip post %s: slug %r cannot be used as a file name", summary.id, summary.slug)
+                self.report.skipped.append(summary.slug)
+                continue
+            keys = [f"posts/{summary.slug}.json", f"posts/{summary.slug}.html"]
+            if self._post_is_fresh(keys, _isoformat(summary.updated_at)):
+                self._produced.update(keys)
+                self.report.unchanged += len(keys)
+            else:
+                stale.append(summary.id)
+
+        # 只加载 updated_at 变化过的文章正文
+        for start in range(0, len(stale), FETCH_BATCH):
+            for post in self.service.get_published_posts_by_ids(stale[start:start + FETCH_BATCH]):
+                updated_at = _isoformat(post.updated_at)
+                self.emit(f"posts/{post.slug}.json", dumps(post_document(post)), updated_at=updated_at)
+                self.emit(f"posts/{post.slug}.html", post_html(post), updated_at=updated_at)
+                self.report.posts_rendered += 1
+
+    def export_listing(self, prefix: str, documents: List[dict]) -> None:
+        for page, items in paginate(documents, self.page_size):
+            self.emit(f"{prefix}/page/{page}.json", dumps(items))
+
+    def export_tags(self, documents: List[dict]) -> None:
+        by_tag: Dict[str, List[dict]] = {}
+        for document in documents:
+            for tag in document["tags"]:
+                by_tag.setdefault(tag, []).append(document)
+        index = [
+            {"tag": tag, "count": len(items), "path": tag_dir(tag)}
+            for tag, items in sorted(by_tag.items(), key=lambda item: (-len(item[1]), item[0]))
+        ]
+        self.emit("tags/index.json", dumps(index))
+        for tag, items in by_tag.items():
+            self.export_listing(tag_dir(tag), items)
+
+    def remove_stale(self) -> None:
+        for key in sorted(set(self.manifest.entries) - self._produced):
+            path = self._target(key)
+            del self.manifest.entries[key]
+            if path is None:
+                # 不删除导出目录以外的文件, 只从 manifest 中去掉
+                logger.warning("refuse to remove %r: outside %s", key, self.out_dir)
+                self._manifest_dirty = True
+                continue
+            path.unlink(missing_ok=True)
+            self.report.removed.append(key)
+            # 删除变空的目录, 例如不再使用的标签
+            for parent in path.parents:
+                if parent == self._root or any(parent.iterdir()):
+                    break
+                parent.rmdir()
+
+    def run(self) -> ExportReport:
+        start = time.perf_counter()
+        summaries = list(iter_published_summaries(self.service))
+        documents = [summary_document(summary) for summary in summaries]
+
+        self.export_posts(summaries)
+        self.export_listing("posts", documents)
+        self.export_tags(documents)
+        self.remove_stale()
+
+        if self.report.written or self.report.removed or self._manifest_dirty:
+            self.manifest.save()
+        self.report.elapsed = time.perf_counter() - start
+        return self.report
+
+
+def export_site(service: BlogService, out_dir: Path, *, page_size: int = 10, force: bool = False) -> ExportReport:
+    return StaticExporter(service, out_dir, page_size=page_size, force=force).run()
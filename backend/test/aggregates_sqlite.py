@@ -0,0 +1,150 @@
+"""
+标签/归档计数的一致性检查: 随机创建、发布、修改标签、归档文章后,
+计数表的结果必须与遍历全部已发布文章统计的结果相同, reconcile 也不应该发现偏差;
+基于过期加载的并发写入也不能让计数产生偏差
+
+PYTHONPATH=. python test/aggregates_sqlite.py
+PYTHONPATH=. python test/aggregates_sqlite.py --steps 2000 --seed 7
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+# 必须在导入 infra.db 之前指定数据库
+_tmp_dir = tempfile.mkdtemp()
+os.environ["SQLITE_URL"] = f"sqlite:///{_tmp_dir}/aggregates.db"
+
+from domains.posts import MAX_TAG_LENGTH
+from infra.db import engine
+from infra.migrations import migrate, reconcile_counts
+from infra.posts import PostRepo, testPostRepo
+from services.blog_service import BlogService, InvalidTagError
+
+TAGS = ["python", "fastapi", "sqlite", "svelte", "随笔", "读书", "性能", "redis"]
+
+
+def brute_force(service: BlogService) -> tuple[Counter, Counter]:
+    posts = service.list_published_posts(limit=1_000_000)
+    tags = Counter(tag for post in posts for tag in dict.fromkeys(post.tags))
+    months = Counter((post.published_at.year, post.published_at.month) for post in posts)
+    return tags, months
+
+
+def counters(service: BlogService) -> tuple[Counter, Counter]:
+    tags = Counter({item.tag: item.count for item in service.list_tag_counts()})
+    months = Counter({(item.year, item.month): item.count for item in service.list_archive_months()})
+    return tags, months
+
+
+def mutate(service: BlogService, rng: random.Random, post_ids: list, steps: int) -> None:
+    start = datetime(2024, 1, 1)
+    for step in range(steps):
+        action = rng.random()
+        if action < 0.3 or not post_ids:
+            post = service.create_draft(
+                    author_id=1,
+                    title=f"post {step}",
+                    content=f"content {step}",
+                    tags=rng.sample(TAGS, rng.randint(0, 3)),
+                    )
+            post_ids.append(post.id)
+        elif action < 0.55:
+            post_id = rng.choice(post_ids)
+            post = service.repo.get_post_by_id(post_id)
+            # 发布时间分散到不同月份
+            post.publish(now=start + timedelta(days=rng.randint(0, 730)))
+            service.repo.save(post)
+        elif action < 0.8:
+            service.update_post(post_id=rng.choice(post_ids), author_id=1, tags=rng.sample(TAGS, rng.randint(0, 3)))
+        elif action < 0.9:
+            service.archive_post(post_id=rng.choice(post_ids), author_id=1)
+        else:
+            created = service.create_drafts([(1, f"batch {step}-{i}", "body", rng.sample(TAGS, 2)) for i in range(3)])
+            ids = [item.post.id for item in created]
+            post_ids.extend(ids)
+            service.publish_many(post_ids=ids, author_id=1)
+
+
+def stale_writers(service: BlogService, rng: random.Random, rounds: int) -> None:
+    """
+    两个写入方基于同一次加载修改同一篇文章(一个发布、一个改标签),
+    计数必须按写入时数据库中的当前行计算, 不能按加载时的快照
+    """
+    for i in range(rounds):
+        post = service.create_draft(author_id=1, title=f"stale {i}", content="body", tags=rng.sample(TAGS, 2))
+        first = service.repo.get_post_by_id(post.id)
+        second = service.repo.get_post_by_id(post.id)
+        first.publish(now=datetime(2023, rng.randint(1, 12), 1))
+        service.repo.save(first)
+        second.update_content(title=None, content=None, tags=rng.sample(TAGS, 3), slug=None)
+        service.repo.save(second)
+        if i % 2:
+            # 基于发布之前的加载再归档一次
+            third = service.repo.get_post_by_id(post.id)
+            stale = service.repo.get_post_by_id(post.id)
+            third.archive()
+            service.repo.save(third)
+            stale.update_content(title=None, content=None, tags=rng.sample(TAGS, 1), slug=None)
+            service.repo.save(stale)
+
+
+def check(name: str, service: BlogService) -> bool:
+    expected = brute_force(service)
+    actual = counters(service)
+    ok = expected == actual
+    print(f"{name:<8} tags={len(actual[0])} months={len(actual[1])} consistent={ok}")
+    if not ok:
+        print(f"  expected {expected}")
+        print(f"  actual   {actual}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check tag/archive counters against a full recount.")
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    migrate(engine)
+    ok = True
+    for name, repo in (("memory", testPostRepo()), ("sqlite", PostRepo())):
+        service = BlogService(repo)
+        mutate(service, random.Random(args.seed), [], args.steps)
+        stale_writers(service, random.Random(args.seed), 20)
+        ok = check(name, service) and ok
+
+    # 最长的标签可以计数, 更长的标签在写入之前被拒绝, 计数不变
+    service = BlogService(PostRepo())
+    longest = "t" * MAX_TAG_LENGTH
+    post = service.create_draft(author_id=1, title="longest tag", content="x", tags=[longest])
+    service.publish_post(post_id=post.id, author_id=1)
+    before = counters(service)
+    try:
+        service.update_post(post_id=post.id, author_id=1, tags=[longest + "t"])
+        rejected = False
+    except InvalidTagError:
+        rejected = True
+    print(f"tag of {MAX_TAG_LENGTH} chars counted={before[0][longest] == 1}, longer tag rejected={rejected}")
+    ok = ok and before[0][longest] == 1 and rejected and counters(service) == before
+
+    tag_diff, month_diff = reconcile_counts()
+    print(f"reconcile: {len(tag_diff)} tags and {len(month_diff)} months corrected")
+    ok = ok and not tag_diff and not month_diff
+
+    # 计数表读取的耗时与文章数无关
+    service = BlogService(PostRepo())
+    for label, fn in (("counters", counters), ("recount", brute_force)):
+        t = time.perf_counter()
+        for _ in range(20):
+            fn(service)
+        print(f"{label:<8} {(time.perf_counter() - t) / 20 * 1000:.2f} ms")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+批量接口检查(/posts/batch, /posts/publish-batch):
+ 1. 批量创建: 同一批次内、以及与数据库中已有文章同名时 slug 不重复, 结果按请求顺序返回
+ 2. 标签不合法的项返回 invalid, 同一批次的其他项照常创建
+ 3. 批量发布: 不存在 / 不是作者 / 重复的 id 逐项标记, 不影响其他文章; 再发布一次全部为 unchanged
+ 4. 超过 BATCH_MAX_ITEMS 返回 422
+
+PYTHONPATH=. python test/batch_sqlite.py
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+# 必须在导入 infra.db 之前指定数据库
+_tmp_dir = tempfile.mkdtemp()
+os.environ["SQLITE_URL"] = f"sqlite:///{_tmp_dir}/batch.db"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from fastapi.testclient import TestClient
+
+from domains.posts import MAX_TAG_LENGTH
+from infra.db import engine
+from infra.migrations import migrate
+from main import create_app
+from routers.schemas.posts import BATCH_MAX_ITEMS
+
+
+def check(label: str, ok: bool) -> bool:
+    print(f"{label:<48} {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check batch create/publish results.")
+    parser.add_argument("--copies", type=int, default=5, help="Posts with the same title in one batch.")
+    args = parser.parse_args()
+
+    migrate(engine)
+    ok = True
+    with TestClient(create_app()) as client:
+        # 1. slug: 数据库中已有 "weekly-notes", 批次内还有同名的文章
+        client.post("/posts", json={"author_id": 1, "title": "Weekly Notes", "content": "x"})
+        items = [{"author_id": 1, "title": "Weekly Notes", "content": f"copy {i}"} for i in range(args.copies)]
+        items.append({"author_id": 2, "title": "Other Author", "content": "y"})
+        results = client.post("/posts/batch", json={"items": items}).json()
+        slugs = [r["post"]["slug"] for r in results]
+        print(f"slugs: {slugs}")
+        ok = check("results follow request order", [r["index"] for r in results] == list(range(len(items)))) and ok
+        ok = check("every item is created", all(r["status"] == "created" for r in results)) and ok
+        ok = check("slugs are unique within the batch", len(set(slugs)) == len(slugs)) and ok
+        ok = check("  and do not reuse the existing slug", "weekly-notes" not in slugs) and ok
+
+        # 2. 标签不合法的项
+        long_tag = "t" * (MAX_TAG_LENGTH + 1)
+        mixed = client.post("/posts/batch", json={"items": [
+            {"author_id": 1, "title": "valid", "content": "a"},
+            {"author_id": 1, "title": "too long tag", "content": "b", "tags": [long_tag]},
+            {"author_id": 1, "title": "valid", "content": "c"},
+            ]}).json()
+        statuses = [r["status"] for r in mixed]
+        print(f"statuses: {statuses}")
+        ok = check("invalid tag is reported per item", statuses == ["created", "invalid", "created"]) and ok
+        ok = check("  and the others keep distinct slugs", mixed[0]["post"]["slug"] != mixed[2]["post"]["slug"]) and ok
+
+        # 3. 批量发布: 自己的两篇、不存在、重复、别人的
+        mine = [r["post"]["id"] for r in results[:2]]
+        others = results[-1]["post"]["id"]
+        post_ids = [mine[0], 999999, mine[1], mine[0], others]
+        published = client.post("/posts/publish-batch", json={"author_id": 1, "post_ids": post_ids}).json()
+        statuses = [r["status"] for r in published]
+        print(f"statuses: {statuses}")
+        ok = check("publish marks each id", statuses == ["published", "not_found", "published", "unchanged", "forbidden"]) and ok
+        ok = check("  published posts carry published_at", all(r["post"]["published_at"] for r in published[:3:2])) and ok
+        readable = [client.get(f"/posts/{slugs[i]}").status_code for i in range(2)]
+        ok = check("  and are readable by slug", readable == [200, 200]) and ok
+        hidden = client.get(f"/posts/{results[-1]['post']['slug']}").status_code
+        ok = check("  other author's post stays a draft", hidden == 404) and ok
+
+        again = client.post("/posts/publish-batch", json={"author_id": 1, "post_ids": mine}).json()
+        ok = check("publishing again is unchanged", [r["status"] for r in again] == ["unchanged", "unchanged"]) and ok
+
+        # 4. 批次大小限制
+        too_many = [{"author_id": 1, "title": "t", "content": "c"}] * (BATCH_MAX_ITEMS + 1)
+        ok = check("oversized batch -> 422", client.post("/posts/batch", json={"items": too_many}).status_code == 422) and ok
+        ok = check("empty publish batch -> 422", client.post("/posts/publish-batch", json={"author_id": 1, "post_ids": []}).status_code == 422) and ok
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
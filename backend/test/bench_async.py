@@ -0,0 +1,144 @@
+"""
+并发压测: 异步路由(main:app) 对比 同步路由(本文件的 sync_app, def 路由 + 同步 PostRepo)
+
+同步路由每个请求要占用 Starlette 线程池中的一个线程(默认40个), 并发超过线程数后请求排队;
+异步路由等待数据库时让出事件循环。两个应用都关闭进程内缓存, 每个请求都访问数据库。
+
+PYTHONPATH=. SQLITE_URL=sqlite:////tmp/bench.db python test/bench_async.py --concurrency 1 10 40 100 200
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# 压测时每个请求都要访问数据库
+os.environ.setdefault("POST_CACHE_SIZE", "0")
+
+from fastapi import Depends, FastAPI, HTTPException
+
+from infra.posts import PostRepo
+from services.blog_service import BlogService
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+_sync_service = BlogService(PostRepo())
+
+def get_sync_service() -> BlogService:
+    return _sync_service
+
+
+# 对照组: 与 routers/posts.py 相同的读路径, 但使用 def 路由
+sync_app = FastAPI()
+
+@sync_app.get("/posts")
+def sync_list_posts(limit: int = 10, service: BlogService = Depends(get_sync_service)):
+    return [p.slug for p in service.list_published_summaries(limit=limit)]
+
+@sync_app.get("/posts/{slug}")
+def sync_get_post(slug: str, service: BlogService = Depends(get_sync_service)):
+    post = service.get_post_by_slug_for_reader(slug)
+    if post is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    return {"slug": post.slug, "content_html": post.content_html}
+
+
+def start_server(app_path: str, port: int) -> subprocess.Popen:
+    env = {**os.environ, "PYTHONPATH": f"{BACKEND_DIR}:{BACKEND_DIR / 'test'}"}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app_path, "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+async def wait_ready(client, base_url: str, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            await client.get(f"{base_url}/posts", params={"limit": 1})
+            return
+        except Exception:
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not start")
+
+
+async def run_level(client, base_url: str, paths: list[str], concurrency: int, total: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            t = time.perf_counter()
+            try:
+                response = await client.get(f"{base_url}{paths[i % len(paths)]}")
+                if response.status_code >= 500:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - t) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "errors": errors,
+    }
+
+
+async def bench(args) -> None:
+    import httpx
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    servers = {
+        "async": ("main:app", args.port),
+        "sync": ("bench_async:sync_app", args.port + 1),
+    }
+    procs = [start_server(app_path, port) for app_path, port in servers.values()]
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    try:
+        async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+            for _, port in servers.values():
+                await wait_ready(client, f"http://127.0.0.1:{port}")
+
+            listing = await client.get(f"http://127.0.0.1:{args.port}/posts", params={"limit": 50})
+            slugs = [p["slug"] for p in listing.json()]
+            paths = ["/posts?limit=10"] + [f"/posts/{slug}" for slug in slugs]
+            print(f"paths={len(paths)} requests/level={args.requests}")
+            print(f"{'mode':<6} {'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+            for concurrency in args.concurrency:
+                for mode, (_, port) in servers.items():
+                    result = await run_level(client, f"http://127.0.0.1:{port}", paths, concurrency, args.requests)
+                    print(
+                        f"{mode:<6} {concurrency:>5} {result['rps']:>9.1f} "
+                        f"{result['p50']:>9.2f} {result['p99']:>9.2f} {result['errors']:>7}"
+                    )
+    finally:
+        for proc in procs:
+            proc.terminate()
+            proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test async vs sync route handlers.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 40, 100, 200])
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per concurrency level.")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
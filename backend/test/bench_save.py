@@ -0,0 +1,100 @@
+"""
+PostRepo.save 写路径对比: ORM 加载后整行回写(_save_orm) vs 只写变化字段的 RETURNING 语句(_save_returning)
+
+统计每次保存执行的SQL语句数和耗时, 使用临时目录中的新 SQLite 数据库。
+
+PYTHONPATH=. python test/bench_save.py -n 2000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+# 必须在导入 infra.db 之前指定数据库
+_tmp_dir = tempfile.mkdtemp()
+os.environ["SQLITE_URL"] = f"sqlite:///{_tmp_dir}/bench_save.db"
+
+from sqlalchemy import event
+
+from domains.posts import Post
+from infra.db import Base, engine, get_db
+from infra.posts import _get_post_by_id, _save_orm, _save_returning
+
+statements = 0
+
+@event.listens_for(engine, "before_cursor_execute")
+def count_statement(*args) -> None:
+    global statements
+    statements += 1
+
+
+def percentile(samples: list[float], p: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def timed(save, make_post, n: int) -> tuple[list[float], float]:
+    """
+    返回 (每次保存的毫秒数, 平均语句数), 加载文章不计入
+    """
+    global statements
+    samples = []
+    total_statements = 0
+    for i in range(n):
+        with get_db() as db:
+            post = make_post(db, i)
+            statements = 0
+            t = time.perf_counter()
+            save(db, post)
+            samples.append((time.perf_counter() - t) * 1000)
+            total_statements += statements
+    return samples, total_statements / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PostRepo.save write paths.")
+    parser.add_argument("-n", type=int, default=2000, help="Saves per scenario.")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    paths = {"orm": _save_orm, "returning": _save_returning}
+    created: dict[str, list[int]] = {}
+
+    def new_post(name):
+        def make(db, i):
+            return Post(author_id=1, title=f"{name} {i}", content="正文 " * 300, slug=f"{name}-{i}", tags=["a", "b"])
+        return make
+
+    def edit_title(name):
+        def make(db, i):
+            post = _get_post_by_id(db, created[name][i])
+            post.update_content(title=f"{post.title} edited", content=None, tags=None)
+            return post
+        return make
+
+    def publish(name):
+        def make(db, i):
+            post = _get_post_by_id(db, created[name][i])
+            post.publish()
+            return post
+        return make
+
+    print(f"{'scenario':<10} {'path':<10} {'stmts':>6} {'p50 ms':>8} {'p99 ms':>8}")
+    for scenario, factory in (("insert", new_post), ("edit", edit_title), ("publish", publish)):
+        for name, save in paths.items():
+            if scenario == "insert":
+                created[name] = []
+                original = save
+                def save(db, post, original=original, name=name):
+                    original(db, post)
+                    created[name].append(post.id)
+            samples, stmts = timed(save, factory(name), args.n)
+            print(
+                f"{scenario:<10} {name:<10} {stmts:>6.1f} "
+                f"{statistics.median(samples):>8.3f} {percentile(samples, 0.99):>8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+全文检索基准测试: 生成 N 篇已发布的中文文章, 重建 FTS5 索引, 统计查询延迟
+
+PYTHONPATH=. python test/bench_search.py -n 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# 必须在导入 infra.db 之前指定数据库
+_tmp_dir = tempfile.mkdtemp()
+os.environ["SQLITE_URL"] = f"sqlite:///{_tmp_dir}/bench_search.db"
+
+from sqlalchemy import insert
+
+from domains.posts import Post, PostStatus
+from infra import search
+from infra.db import Base, engine, get_db
+from infra.posts import PostORM, PostRepo
+
+WORDS = [
+    "数据库", "索引", "缓存", "异步", "接口", "部署", "日志", "追踪", "性能", "测试",
+    "分页", "事务", "连接池", "前端", "后端", "容器", "网络", "安全", "模型", "推理",
+    "FastAPI", "SQLite", "Python", "Redis", "Docker", "Git", "nginx", "Svelte",
+]
+QUERIES = ["数据库", "连接池 性能", "FastAPI", "异步 接口", "Redis 缓存", "不存在的词"]
+
+
+def make_vocabulary(rng: random.Random, size: int = 5000) -> tuple[list[str], list[float]]:
+    """
+    主题词 + 随机生成的双字词, 按 Zipf 分布取词, 让命中率接近真实语料
+    """
+    filler = ["".join(chr(rng.randint(0x4E00, 0x9FA5)) for _ in range(2)) for _ in range(size)]
+    vocabulary = filler[:50] + WORDS + filler[50:]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    return vocabulary, weights
+
+
+def fake_text(rng: random.Random, vocabulary: tuple[list[str], list[float]], n_words: int) -> str:
+    words, weights = vocabulary
+    return "，".join(
+        "".join(rng.choices(words, weights, k=4)) for _ in range(n_words // 4)
+    ) + "。"
+
+
+def populate(n: int, batch_size: int = 5000) -> None:
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(rng)
+    now = datetime.utcnow()
+    with get_db() as db:
+        for start in range(0, n, batch_size):
+            rows = []
+            for i in range(start, min(n, start + batch_size)):
+                published_at = now - timedelta(minutes=i)
+                rows.append({
+                    "author_id": 1,
+                    "title": fake_text(rng, vocabulary, 8),
+                    "content": fake_text(rng, vocabulary, 120),
+                    "slug": f"post-{i}",
+                    "status": PostStatus.PUBLISHED.value,
+                    "tags": "",
+                    "created_at": published_at,
+                    "updated_at": published_at,
+                    "published_at": published_at,
+                })
+            db.execute(insert(PostORM), rows)
+        db.commit()
+
+
+def percentile(samples: list[float], p: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FTS5 search.")
+    parser.add_argument("-n", type=int, default=100_000, help="Number of published posts.")
+    parser.add_argument("--repeat", type=int, default=50, help="Runs per query.")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+
+    start = time.perf_counter()
+    populate(args.n)
+    print(f"populate  n={args.n} {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    with get_db() as db:
+        total = search.rebuild(db)
+    print(f"rebuild   indexed={total} {time.perf_counter() - start:.2f}s")
+
+    repo = PostRepo()
+    for query in QUERIES:
+        samples = []
+        for _ in range(args.repeat):
+            t = time.perf_counter()
+            hits = repo.search(query, limit=10)
+            samples.append((time.perf_counter() - t) * 1000)
+        print(
+            f"search    q={query!r:<12} hits={len(hits):<3} "
+            f"p50={statistics.median(samples):.2f}ms p99={percentile(samples, 0.99):.2f}ms"
+        )
+
+    # 增量维护: 单篇保存包含索引更新
+    samples = []
+    for i in range(args.repeat):
+        post = Post(author_id=1, title=f"新文章 {i}", content="异步 数据库 连接池", slug=f"new-{i}")
+        post.publish()
+        t = time.perf_counter()
+        repo.save(post)
+        samples.append((time.perf_counter() - t) * 1000)
+    print(f"save      p50={statistics.median(samples):.2f}ms p99={percentile(samples, 0.99):.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
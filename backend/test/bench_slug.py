@@ -0,0 +1,78 @@
+"""
+slug分配基准测试: 创建大量同名文章, 对比逐个探测(旧实现)和一次前缀查询(新实现)
+
+PYTHONPATH=. python test/bench_slug.py -n 2000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+# 必须在导入 infra.db 之前指定数据库
+_tmp_dir = tempfile.mkdtemp()
+os.environ["SQLITE_URL"] = f"sqlite:///{_tmp_dir}/bench_slug.db"
+
+from sqlalchemy import event
+
+from domains.posts import Post
+from infra.db import Base, engine
+from infra.posts import PostRepo
+from services.blog_service import BlogService
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+
+def probe_slug(repo: PostRepo, title: str) -> str:
+    """
+    旧实现: 每个候选后缀一次 get_post_by_slug
+    """
+    base = "-".join(title.strip().lower().split()) or "post"
+    slug = base
+    index = 1
+    while repo.get_post_by_slug(slug) is not None:
+        slug = f"{base}-{index}"
+        index += 1
+    return slug
+
+
+def run(label: str, n: int, title: str, allocate, repo: PostRepo, counter: QueryCounter) -> None:
+    counter.count = 0
+    start = time.perf_counter()
+    for _ in range(n):
+        slug = allocate(title)
+        repo.save(Post(author_id=1, title=title, content="", slug=slug))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<8} n={n} total={elapsed:.3f}s "
+        f"per_post={elapsed / n * 1000:.3f}ms queries={counter.count}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark slug allocation with colliding titles.")
+    parser.add_argument("-n", type=int, default=2000, help="Number of posts with the same title.")
+    parser.add_argument(
+            "--probe-n",
+            type=int,
+            default=300,
+            help="Posts for the old probe loop, which is quadratic in round trips.",
+            )
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    counter = QueryCounter()
+    repo = PostRepo()
+    service = BlogService(repo)
+
+    run("probe", min(args.n, args.probe_n), "weekly notes", lambda t: probe_slug(repo, t), repo, counter)
+    run("prefix", args.n, "weekly notes again", service._generate_slug, repo, counter)
+
+
+if __name__ == "__main__":
+    main()
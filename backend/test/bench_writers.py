@@ -0,0 +1,119 @@
+"""
+并发写入基准测试: 多个线程同时 创建草稿 + 发布, 对比 SQLite 默认设置和 config.py 中的引擎配置
+
+每个配置在单独的子进程中运行(配置在导入 infra.db 时读取), 使用临时目录中的新数据库。
+
+PYTHONPATH=. python test/bench_writers.py --writers 16 --posts 50
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# 调整前的行为: rollback journal, synchronous=FULL, pysqlite 默认的 5 秒锁等待
+PROFILES = {
+    "default": {
+        "SQLITE_JOURNAL_MODE": "DELETE",
+        "SQLITE_SYNCHRONOUS": "FULL",
+        "SQLITE_BUSY_TIMEOUT": "5000",
+        "SQLITE_CACHE_SIZE": "-2000",
+        "SQLITE_MMAP_SIZE": "0",
+    },
+    # 使用 config.py 的默认值
+    "tuned": {},
+}
+
+
+def run_writers(writers: int, posts: int) -> dict:
+    from infra.db import Base, engine
+    from infra.posts import PostRepo
+    from services.blog_service import BlogService
+
+    Base.metadata.create_all(bind=engine)
+    service = BlogService(PostRepo())
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+    lock = threading.Lock()
+    barrier = threading.Barrier(writers)
+
+    def writer(n: int) -> None:
+        barrier.wait()
+        for i in range(posts):
+            t = time.perf_counter()
+            try:
+                post = service.create_draft(author_id=n, title=f"writer {n} post {i}", content="正文 " * 200)
+                service.publish_post(post_id=post.id, author_id=n)
+            except Exception as e:
+                with lock:
+                    key = str(getattr(e, "orig", e)).splitlines()[0]
+                    errors[key] = errors.get(key, 0) + 1
+                continue
+            with lock:
+                latencies.append((time.perf_counter() - t) * 1000)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "ok": len(latencies),
+        "errors": errors,
+        "elapsed": elapsed,
+        "publishes_per_sec": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) if latencies else 0.0,
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent writers against SQLite.")
+    parser.add_argument("--writers", type=int, default=16, help="Concurrent writer threads.")
+    parser.add_argument("--posts", type=int, default=50, help="Posts created and published per writer.")
+    parser.add_argument("--profile", choices=sorted(PROFILES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        # 子进程: 环境变量已经设置好, 输出一行JSON
+        print(json.dumps(run_writers(args.writers, args.posts)))
+        return
+
+    backend_dir = Path(__file__).resolve().parent.parent
+    print(f"writers={args.writers} posts/writer={args.posts}")
+    for name, overrides in PROFILES.items():
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            env = {
+                **os.environ,
+                **overrides,
+                "PYTHONPATH": str(backend_dir),
+                "SQLITE_URL": f"sqlite:///{tmp_dir}/writers.db",
+            }
+            output = subprocess.run(
+                [sys.executable, __file__, "--profile", name, "--writers", str(args.writers), "--posts", str(args.posts)],
+                env=env,
+                cwd=backend_dir,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{name:<8} ok={result['ok']:<6} failed={sum(result['errors'].values()):<6} "
+            f"{result['publishes_per_sec']:.1f} posts/s p50={result['p50']:.2f}ms p99={result['p99']:.2f}ms"
+        )
+        for message, count in result["errors"].items():
+            print(f"         {count} x {message}")
+
+
+if __name__ == "__main__":
+    main()
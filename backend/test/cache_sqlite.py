@@ -0,0 +1,139 @@
+"""
+进程内文章缓存(CachedPostRepo)的检查:
+ 1. 命中/未命中计数, 命中时不访问数据库
+ 2. 写入后失效: 文章本身和列表缓存
+ 3. 超过容量时淘汰, 过期后重新读取; slug 索引(_slug_by_id)随条目一起删除, 不会无限增长
+ 4. 读数据库期间有写入时, 读到的旧数据不写回缓存
+
+PYTHONPATH=. python test/cache_sqlite.py
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+# 必须在导入 infra.db 之前指定数据库
+_tmp_dir = tempfile.mkdtemp()
+os.environ["SQLITE_URL"] = f"sqlite:///{_tmp_dir}/cache.db"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from infra.cache import CachedPostRepo
+from infra.db import engine
+from infra.migrations import migrate
+from infra.posts import PostRepo
+from services.blog_service import BlogService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingRepo(PostRepo):
+    """
+    记录读取数据库的次数; before_read 在读取之前执行一次, 用来模拟读的同时另一个请求写入
+    """
+    def __init__(self):
+        self.slug_reads = 0
+        self.list_reads = 0
+        self.before_read = None
+
+    def _hook(self):
+        hook, self.before_read = self.before_read, None
+        if hook is not None:
+            hook()
+
+    def get_post_by_slug(self, slug: str):
+        self.slug_reads += 1
+        post = super().get_post_by_slug(slug)
+        self._hook()
+        return post
+
+    def list_published_summaries(self, **filters):
+        self.list_reads += 1
+        result = super().list_published_summaries(**filters)
+        self._hook()
+        return result
+
+
+def check(label: str, ok: bool) -> bool:
+    print(f"{label:<48} {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the in-process post cache.")
+    parser.add_argument("--posts", type=int, default=8)
+    args = parser.parse_args()
+
+    migrate(engine)
+    clock = FakeClock()
+    db_repo = CountingRepo()
+    cache = CachedPostRepo(db_repo, maxsize=3, ttl=60, clock=clock)
+    service = BlogService(cache)
+    slugs = []
+    for i in range(args.posts):
+        post = service.create_draft(author_id=1, title=f"cache {i}", content=f"v1 {i}", tags=["cache"])
+        slugs.append(service.publish_post(post_id=post.id, author_id=1).slug)
+    ok = True
+
+    # 1. 命中/未命中
+    cache.invalidate_all()
+    before = db_repo.slug_reads
+    cache.get_post_by_slug(slugs[0])
+    cache.get_post_by_slug(slugs[0])
+    stats = cache.stats()["posts"]
+    ok = check("second read is a hit", db_repo.slug_reads - before == 1 and stats["hits"] >= 1) and ok
+
+    # 2. 写入后失效
+    post = db_repo.get_post_by_slug(slugs[0])
+    service.update_post(post_id=post.id, author_id=1, content="v2")
+    ok = check("update invalidates the post", cache.get_post_by_slug(slugs[0]).content == "v2") and ok
+    cache.list_published_summaries(limit=50)
+    reads = db_repo.list_reads
+    cache.list_published_summaries(limit=50)
+    ok = check("list is cached", db_repo.list_reads == reads) and ok
+    service.update_post(post_id=post.id, author_id=1, tags=["cache", "new"])
+    summaries = cache.list_published_summaries(limit=50)
+    ok = check("publish/update clears lists", db_repo.list_reads == reads + 1) and ok
+    ok = check("  and the list has the new tags", "new" in next(s for s in summaries if s.id == post.id).tags) and ok
+
+    # 3. 淘汰和过期
+    evictions = cache.stats()["posts"]["evictions"]
+    for slug in slugs:
+        cache.get_post_by_slug(slug)
+    stats = cache.stats()["posts"]
+    print(f"posts cache: {stats}, slug index size={len(cache._slug_by_id)}")
+    ok = check("LRU evicts beyond maxsize", stats["size"] == 3 and stats["evictions"] > evictions) and ok
+    ok = check("slug index only tracks cached posts", len(cache._slug_by_id) == stats["size"]) and ok
+
+    clock.now += 61
+    before = db_repo.slug_reads
+    cache.get_post_by_slug(slugs[-1])
+    ok = check("expired entry is read again", db_repo.slug_reads == before + 1) and ok
+    ok = check("  and stale slug index entries are pruned", len(cache._slug_by_id) <= cache.stats()["posts"]["size"]) and ok
+
+    # 4. 读的同时有写入: 读到的旧数据不写回缓存
+    cache.invalidate_all()
+    target = db_repo.get_post_by_slug(slugs[1])
+    db_repo.before_read = lambda: service.update_post(post_id=target.id, author_id=1, content="written during read")
+    stale = cache.get_post_by_slug(slugs[1])
+    fresh = cache.get_post_by_slug(slugs[1])
+    print(f"read during write returned {stale.content!r}, next read {fresh.content!r}")
+    ok = check("stale post is not cached", fresh.content == "written during read") and ok
+
+    cache.list_published_summaries(limit=50)
+    cache.invalidate_all()
+    db_repo.before_read = lambda: service.archive_post(post_id=target.id, author_id=1)
+    cache.list_published_summaries(limit=50)
+    listed = {s.id for s in cache.list_published_summaries(limit=50)}
+    ok = check("stale list is not cached", target.id not in listed) and ok
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
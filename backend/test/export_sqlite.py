@@ -0,0 +1,124 @@
+"""
+静态导出检查(services/static_export.py):
+ 1. manifest 与导出目录中的文件一一对应, 单篇文章的 json 与 GET /posts/{slug} 相同
+ 2. 再导出一次不写任何文件; 修改一篇文章只重新加载这一篇
+ 3. 归档文章后删除它的文件, 以及变空的标签目录
+ 4. 路径限制在导出目录内: slug 不能作为文件名的旧文章被跳过, 被改过的 manifest 不会删除目录外的文件
+
+PYTHONPATH=. python test/export_sqlite.py
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# 必须在导入 infra.db 之前指定数据库
+_tmp_dir = tempfile.mkdtemp()
+os.environ["SQLITE_URL"] = f"sqlite:///{_tmp_dir}/export.db"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from sqlalchemy import text
+
+from infra.db import engine, get_db
+from infra.migrations import migrate
+from infra.posts import PostRepo
+from services.blog_service import BlogService
+from services.serialization import dumps, post_document
+from services.static_export import MANIFEST_NAME, ExportEntry, StaticExporter, export_site
+
+
+def check(label: str, ok: bool) -> bool:
+    print(f"{label:<48} {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+def exported_files(out_dir: Path) -> set[str]:
+    return {p.relative_to(out_dir).as_posix() for p in out_dir.rglob("*") if p.is_file() and p.name != MANIFEST_NAME}
+
+
+def manifest_keys(out_dir: Path) -> set[str]:
+    return set(json.loads((out_dir / MANIFEST_NAME).read_text(encoding="utf-8")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the incremental static export.")
+    parser.add_argument("--posts", type=int, default=25)
+    parser.add_argument("--page-size", type=int, default=10)
+    args = parser.parse_args()
+
+    migrate(engine)
+    service = BlogService(PostRepo())
+    posts = []
+    for i in range(args.posts):
+        post = service.create_draft(author_id=1, title=f"export {i}", content=f"# export {i}\n\nbody", tags=["export", f"t{i % 3}"])
+        posts.append(service.publish_post(post_id=post.id, author_id=1))
+    only = service.create_draft(author_id=1, title="lonely", content="x", tags=["lonely", "a/b"])
+    only = service.publish_post(post_id=only.id, author_id=1)
+
+    root = Path(_tmp_dir)
+    out_dir = root / "site"
+    ok = True
+
+    # 1. 第一次导出
+    report = export_site(service, out_dir, page_size=args.page_size)
+    print(f"first export: {len(report.written)} written, {report.posts_rendered} posts rendered")
+    ok = check("manifest matches the files on disk", manifest_keys(out_dir) == exported_files(out_dir)) and ok
+    sample = posts[0]
+    exported = json.loads((out_dir / f"posts/{sample.slug}.json").read_text(encoding="utf-8"))
+    expected = json.loads(dumps(post_document(service.get_post_by_slug_for_reader(sample.slug))))
+    ok = check("post json matches the API document", exported == expected) and ok
+    pages = len(list((out_dir / "posts/page").glob("*.json")))
+    ok = check("listing is paginated", pages == -(-(args.posts + 1) // args.page_size)) and ok
+    ok = check("'/' in a tag is escaped in the path", (out_dir / "tags/a%2Fb/page/1.json").exists()) and ok
+
+    # 2. 增量
+    report = export_site(service, out_dir, page_size=args.page_size)
+    ok = check("second export writes nothing", not report.written and not report.posts_rendered) and ok
+    service.update_post(post_id=posts[1].id, author_id=1, content="# export 1\n\nchanged")
+    report = export_site(service, out_dir, page_size=args.page_size)
+    print(f"after one update: written={report.written}")
+    ok = check("update reloads only that post", report.posts_rendered == 1) and ok
+    ok = check("  and rewrites its files", {f"posts/{posts[1].slug}.json", f"posts/{posts[1].slug}.html"} <= set(report.written)) and ok
+
+    # 3. 归档后删除
+    service.archive_post(post_id=only.id, author_id=1)
+    report = export_site(service, out_dir, page_size=args.page_size)
+    print(f"after archive: removed={report.removed}")
+    ok = check("archived post files are removed", not (out_dir / f"posts/{only.slug}.json").exists()) and ok
+    ok = check("  and its empty tag directories", not (out_dir / "tags/lonely").exists()) and ok
+    ok = check("manifest still matches the files", manifest_keys(out_dir) == exported_files(out_dir)) and ok
+
+    # 4. 路径限制
+    # 旧版本生成的 slug 可能带 "/" 或 ".."
+    legacy = service.create_draft(author_id=1, title="legacy", content="x")
+    service.publish_post(post_id=legacy.id, author_id=1)
+    with get_db() as db:
+        db.execute(text("UPDATE posts SET slug = :slug WHERE id = :id"), {"slug": "../escaped", "id": legacy.id})
+        db.commit()
+    report = export_site(service, out_dir, page_size=args.page_size)
+    ok = check("unsafe slug is skipped", report.skipped == ["../escaped"]) and ok
+    ok = check("  and nothing is written outside", not (root / "escaped.json").exists()) and ok
+
+    victim = root / "keep-me.txt"
+    victim.write_text("outside the export directory", encoding="utf-8")
+    manifest_path = out_dir / MANIFEST_NAME
+    raw = json.loads(manifest_path.read_text(encoding="utf-8"))
+    raw["../keep-me.txt"] = vars(ExportEntry(digest="0" * 64))
+    manifest_path.write_text(json.dumps(raw), encoding="utf-8")
+    export_site(service, out_dir, page_size=args.page_size)
+    ok = check("tampered manifest cannot delete outside files", victim.exists()) and ok
+    ok = check("  and the bad key is dropped", "../keep-me.txt" not in manifest_keys(out_dir)) and ok
+
+    try:
+        StaticExporter(service, out_dir).emit("../written.json", b"{}")
+        refused = False
+    except ValueError:
+        refused = True
+    ok = check("emit refuses paths outside the directory", refused and not (root / "written.json").exists()) and ok
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+RSS/Atom/sitemap 缓存演示:
+ 1. 连续请求只生成一次, 带 If-None-Match 返回 304, gzip 版本解压后与原文相同
+ 2. 发布/修改/归档文章后下一次请求重新生成, ETag 改变; 草稿的写入不触发重新生成
+ 3. 比较命中缓存和每次重新生成的耗时
+
+PYTHONPATH=. python test/feeds_sqlite.py
+PYTHONPATH=. python test/feeds_sqlite.py --posts 2000 --requests 200
+"""
+import argparse
+import gzip
+import os
+import sys
+import tempfile
+import time
+
+# 必须在导入 infra.db 之前指定数据库
+_tmp_dir = tempfile.mkdtemp()
+os.environ["SQLITE_URL"] = f"sqlite:///{_tmp_dir}/feeds.db"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from fastapi.testclient import TestClient
+
+from infra.db import engine
+from infra.migrations import migrate
+from main import create_app
+
+PATHS = ("/feed.xml", "/atom.xml", "/sitemap.xml")
+
+
+def seed(client: TestClient, count: int) -> None:
+    items = [{"author_id": 1, "title": f"post {i}", "content": f"content {i}", "tags": ["feed"]} for i in range(count)]
+    for start in range(0, count, 500):
+        created = client.post("/posts/batch", json={"items": items[start:start + 500]}).json()
+        ids = [item["post"]["id"] for item in created]
+        client.post("/posts/publish-batch", json={"author_id": 1, "post_ids": ids})
+
+
+def check(label: str, ok: bool) -> bool:
+    print(f"{label:<40} {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show feed/sitemap caching and regeneration.")
+    parser.add_argument("--posts", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=100)
+    args = parser.parse_args()
+
+    migrate(engine)
+    ok = True
+    with TestClient(create_app()) as client:
+        feeds = client.app.state.services.feeds
+        seed(client, args.posts)
+
+        etags = {path: client.get(path).headers["etag"] for path in PATHS}
+        builds = feeds.builds
+        for _ in range(5):
+            for path in PATHS:
+                client.get(path)
+        ok = check("repeated requests reuse the document", feeds.builds == builds) and ok
+        response = client.get("/feed.xml", headers={"If-None-Match": etags["/feed.xml"]})
+        ok = check("If-None-Match -> 304", response.status_code == 304) and ok
+
+        with client.stream("GET", "/sitemap.xml", headers={"Accept-Encoding": "gzip"}) as response:
+            raw = b"".join(response.iter_raw())
+        identity = client.get("/sitemap.xml", headers={"Accept-Encoding": "identity"}).content
+        print(f"sitemap identity={len(identity)} bytes gzip={len(raw)} bytes")
+        ok = check("gzip variant matches identity", gzip.decompress(raw) == identity) and ok
+
+        draft = client.post("/posts", json={"author_id": 1, "title": "draft", "content": "x"}).json()
+        for path in PATHS:
+            client.get(path)
+        ok = check("draft does not rebuild", feeds.builds == builds) and ok
+
+        client.post(f"/posts/{draft['id']}/publish", json={"author_id": 1})
+        changed = all(client.get(path).headers["etag"] != etags[path] for path in PATHS)
+        ok = check("publish rebuilds every document", changed and feeds.builds == builds + len(PATHS)) and ok
+
+        service = client.app.state.services.service
+        client.portal.call(lambda: service.archive_post(post_id=draft["id"], author_id=1))
+        # 归档后 feed 回到发布之前的内容, ETag 也相同
+        etag = client.get("/feed.xml").headers["etag"]
+        ok = check("archive rebuilds", etag == etags["/feed.xml"] and feeds.builds == builds + len(PATHS) + 1) and ok
+
+        for label, invalidate in (("cached", lambda: None), ("rebuild", lambda: feeds._documents.clear())):
+            t = time.perf_counter()
+            for _ in range(args.requests):
+                invalidate()
+                client.get("/sitemap.xml")
+            print(f"{label:<8} {(time.perf_counter() - t) / args.requests * 1000:.2f} ms/request")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
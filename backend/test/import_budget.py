@@ -0,0 +1,101 @@
+"""
+启动时间预算: 在新的子进程中导入 main.app 和 cli, 检查耗时和副作用
+ - cold: 从空的解释器开始导入的总耗时(包括 fastapi / sqlalchemy 本身)
+ - own:  预先导入框架后再导入, 只计项目自己的模块; 取多次中最快的一次和预算比较, 机器负载造成的波动不会导致失败
+ - 导入时不能创建 engine、不能创建数据库文件; cli 导入时不能加载 sqlalchemy
+
+PYTHONPATH=. python test/import_budget.py
+PYTHONPATH=. python test/import_budget.py --runs 9 --main-budget 250 --cli-budget 60
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# 框架模块, own 模式下在计时前导入; 定义第一个带模型参数的路由时 fastapi 会导入 pydantic.v1, 也算框架
+FRAMEWORK = "import fastapi, fastapi.responses, pydantic, pydantic.v1, sqlalchemy.orm, sqlalchemy.ext.asyncio, dotenv"
+
+TARGETS = {
+    "main": "from main import app",
+    "cli": "import cli",
+}
+
+PROBE = """
+import json, os, sys, time
+{preload}
+start = time.perf_counter()
+{target}
+elapsed = (time.perf_counter() - start) * 1000
+db = sys.modules.get("infra.db")
+print(json.dumps({{
+    "ms": elapsed,
+    "engine_created": bool(db is not None and db._database is not None),
+    "sqlalchemy_loaded": "sqlalchemy" in sys.modules,
+}}))
+"""
+
+
+def probe(target: str, *, preload: bool, db_path: Path) -> dict:
+    code = PROBE.format(preload=FRAMEWORK if preload else "", target=TARGETS[target])
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(BACKEND_DIR),
+        "SQLITE_URL": f"sqlite:///{db_path}",
+        "LOG_LEVEL": "WARNING",
+    }
+    # 不从 .env 读取 DATABASE_URL / REDIS_URL 等, 只使用上面的临时数据库
+    for name in ("DATABASE_URL", "DATABASE_READ_URLS", "REDIS_URL"):
+        env[name] = ""
+    result = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", code],
+            env=env,
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+            )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check cold-start import time of main.app and cli.py.")
+    parser.add_argument("--runs", type=int, default=7, help="Subprocesses per measurement (median and best are reported).")
+    parser.add_argument("--main-budget", type=float, default=250.0, help="Budget in ms for importing main.app after the framework.")
+    parser.add_argument("--cli-budget", type=float, default=60.0, help="Budget in ms for importing cli.py after the framework.")
+    args = parser.parse_args()
+
+    budgets = {"main": args.main_budget, "cli": args.cli_budget}
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = Path(tmp_dir) / "never-created.db"
+        print(f"{'target':<8} {'cold ms':>9} {'own ms':>9} {'own best':>9} {'budget':>8}")
+        for target, budget in budgets.items():
+            cold = [probe(target, preload=False, db_path=db_path) for _ in range(args.runs)]
+            own = [probe(target, preload=True, db_path=db_path) for _ in range(args.runs)]
+            cold_ms = statistics.median(r["ms"] for r in cold)
+            own_ms = statistics.median(r["ms"] for r in own)
+            best_ms = min(r["ms"] for r in own)
+            print(f"{target:<8} {cold_ms:>9.1f} {own_ms:>9.1f} {best_ms:>9.1f} {budget:>8.0f}")
+
+            if best_ms > budget:
+                failures.append(f"{target}: importing took at least {best_ms:.1f}ms, budget {budget:.0f}ms")
+            if any(r["engine_created"] for r in cold + own):
+                failures.append(f"{target}: a database engine was created at import time")
+            if target == "cli" and any(r["sqlalchemy_loaded"] for r in cold):
+                failures.append("cli: sqlalchemy was imported before any command ran")
+        if db_path.exists():
+            failures.append("the database file was created at import time")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+/metrics 检查: 每个请求记一次, 标签为 method / 路由模板 / 状态码
+ 1. 按路由模板计数(/posts/{slug}), 200 和 404 分开; 请求次数与计数的增量相同
+ 2. 没有匹配的路由都记为 unmatched, 请求不同的路径不会增加标签
+ 3. 耗时和SQL条数的直方图每个请求记一次; 命中进程内缓存的读取不执行SQL
+ 4. 缓存命中/未命中由 collector 导出
+
+PYTHONPATH=. python test/metrics_sqlite.py
+"""
+import argparse
+import os
+import sys
+import tempfile
+from typing import Dict
+
+# 必须在导入 infra.db 之前指定数据库
+_tmp_dir = tempfile.mkdtemp()
+os.environ["SQLITE_URL"] = f"sqlite:///{_tmp_dir}/metrics.db"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from fastapi.testclient import TestClient
+
+from infra.db import engine
+from infra.migrations import migrate
+from main import create_app
+
+
+def scrape(client: TestClient) -> Dict[str, float]:
+    """
+    /metrics 的文本解析为 {'name{labels}': value}
+    """
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = {}
+    for line in response.text.splitlines():
+        if line and not line.startswith("#"):
+            key, value = line.rsplit(" ", 1)
+            samples[key] = float(value)
+    return samples
+
+
+def delta(before: Dict[str, float], after: Dict[str, float], key: str) -> float:
+    return after.get(key, 0.0) - before.get(key, 0.0)
+
+
+def check(label: str, ok: bool) -> bool:
+    print(f"{label:<48} {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check request metrics labels and counts.")
+    parser.add_argument("--requests", type=int, default=7)
+    args = parser.parse_args()
+
+    migrate(engine)
+    ok = True
+    with TestClient(create_app()) as client:
+        created = client.post("/posts", json={"author_id": 1, "title": "labelled post", "content": "x", "tags": ["m"]}).json()
+        client.post(f"/posts/{created['id']}/publish", json={"author_id": 1})
+        slug = created["slug"]
+
+        # 1. 路由模板 + 状态码
+        before = scrape(client)
+        for _ in range(args.requests):
+            client.get(f"/posts/{slug}")
+        for i in range(args.requests):
+            client.get(f"/posts/missing-{i}")
+        after = scrape(client)
+        route = 'method="GET",route="/posts/{slug}"'
+        ok = check("200s counted under the route template",
+                   delta(before, after, f'http_requests_total{{{route},status="200"}}') == args.requests) and ok
+        ok = check("404s counted separately",
+                   delta(before, after, f'http_requests_total{{{route},status="404"}}') == args.requests) and ok
+        ok = check("no label per concrete slug", not any(slug in key for key in after)) and ok
+        ok = check("latency observed once per request",
+                   delta(before, after, f"http_request_duration_seconds_count{{{route}}}") == 2 * args.requests) and ok
+        ok = check("query count observed once per request",
+                   delta(before, after, f"db_queries_per_request_count{{{route}}}") == 2 * args.requests) and ok
+        ok = check("the scrape itself is counted",
+                   delta(before, after, 'http_requests_total{method="GET",route="/metrics",status="200"}') == 1) and ok
+
+        post_route = 'method="POST",route="/posts"'
+        before = scrape(client)
+        client.post("/posts", json={"author_id": 1, "title": "another", "content": "y"})
+        after = scrape(client)
+        ok = check("method label", delta(before, after, f'http_requests_total{{{post_route},status="200"}}') == 1) and ok
+        ok = check("  and the write executed SQL", delta(before, after, f"db_queries_per_request_sum{{{post_route}}}") > 0) and ok
+
+        # 2. 没有匹配的路由; 第一次请求产生 unmatched 的序列, 之后不再增加
+        client.get("/no-such-page")
+        before = scrape(client)
+        for i in range(args.requests):
+            client.get(f"/no-such-page/{i}")
+        after = scrape(client)
+        ok = check("unmatched paths share one label",
+                   delta(before, after, 'http_requests_total{method="GET",route="unmatched",status="404"}') == args.requests) and ok
+        ok = check("  and add no new series", len(after) == len(before)) and ok
+
+        # 3. 缓存命中时不执行SQL
+        client.get(f"/posts/{slug}")
+        before = scrape(client)
+        client.get(f"/posts/{slug}")
+        after = scrape(client)
+        queries = delta(before, after, f"db_queries_per_request_sum{{{route}}}")
+        print(f"queries for a cached read: {queries:.0f}")
+        ok = check("cached read executes no SQL", queries == 0) and ok
+
+        # 4. 缓存 collector
+        ok = check("cache hits are exported", delta(before, after, 'post_cache_hits_total{cache="posts"}') >= 1) and ok
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+迁移检查: 复制一份已有的数据库(默认 data/test.db)执行 migrate
+ 1. 全文索引的行数与已发布文章数相同, 检索能查到文章
+ 2. 再执行一次 migrate 不会重建索引
+ 3. 索引被清空或者是旧格式时, migrate 会重建
+
+PYTHONPATH=. python test/migrate_sqlite.py
+PYTHONPATH=. python test/migrate_sqlite.py --db path/to/blog.db
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from config import DATA_PATH
+
+# 必须在导入 infra.db 之前指定数据库
+_tmp_dir = tempfile.mkdtemp()
+_tmp_db = Path(_tmp_dir) / "migrate.db"
+os.environ["SQLITE_URL"] = f"sqlite:///{_tmp_db}"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from sqlalchemy import text
+
+from infra import search
+from infra.db import engine, get_db
+from infra.migrations import migrate, rebuild_search_index_if_needed
+
+
+def check(label: str, ok: bool) -> bool:
+    print(f"{label:<48} {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+def counts() -> tuple[int, int]:
+    with get_db() as db:
+        indexed = db.execute(text(f"SELECT count(*) FROM {search.FTS_TABLE}")).scalar_one()
+        published = db.execute(text("SELECT count(*) FROM posts WHERE status = 'published'")).scalar_one()
+    return indexed, published
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate a copy of an existing database and check the search index.")
+    parser.add_argument("--db", default=str(DATA_PATH / "test.db"))
+    args = parser.parse_args()
+
+    shutil.copyfile(args.db, _tmp_db)
+    migrate(engine)
+    ok = True
+
+    indexed, published = counts()
+    print(f"published={published} indexed={indexed}")
+    ok = check("index has every published post", indexed == published) and ok
+    with get_db() as db:
+        title = db.execute(text("SELECT title FROM posts WHERE status = 'published' LIMIT 1")).scalar()
+        if title is not None:
+            word = title.split()[0] if title.split() else title
+            ok = check(f"search finds {word!r}", bool(search.search(db, word, limit=5, offset=0))) and ok
+
+    ok = check("second migrate does not rebuild", rebuild_search_index_if_needed() is None) and ok
+
+    with get_db() as db:
+        db.execute(text(f"DELETE FROM {search.FTS_TABLE}"))
+        db.commit()
+    ok = check("emptied index is rebuilt", rebuild_search_index_if_needed() == "incomplete") and ok
+    ok = check("  and complete again", counts()[0] == published) and ok
+
+    if published:
+        # 模拟旧版本用空格切分的索引
+        with get_db() as db:
+            rows = db.execute(text("SELECT id, title, content FROM posts WHERE status = 'published'")).all()
+            db.execute(text(f"DELETE FROM {search.FTS_TABLE}"))
+            db.execute(
+                text(f"INSERT INTO {search.FTS_TABLE} (rowid, title, content) VALUES (:id, :title, :content)"),
+                [{"id": r.id, "title": search.segment(r.title, " "), "content": search.segment(r.content, " ")} for r in rows],
+            )
+            db.commit()
+            outdated = search.is_outdated(db)
+        if outdated:
+            ok = check("old-format index is rebuilt", rebuild_search_index_if_needed() == "outdated") and ok
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
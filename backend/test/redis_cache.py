@@ -0,0 +1,147 @@
+"""
+共享缓存演示: 两个 "worker" 各有自己的进程内缓存, 共用一个 Redis 和同一个 SQLite 数据库
+
+ 1. worker A 读取文章, 写入 Redis; worker B 再读取时命中 Redis, 不访问数据库
+ 2. worker A 修改文章, 广播失效消息; worker B 清掉本地缓存, 读到新内容
+ 3. 读数据库的同时另一个 worker 修改了文章: 读到的旧内容不写入 Redis
+ 4. Redis 不可用时直接访问数据库
+ 频道中格式不对的消息不会让 worker B 停止接收失效消息
+
+默认使用 fakeredis(pip install fakeredis), 也可以连接本地 redis-server:
+PYTHONPATH=. python test/redis_cache.py
+PYTHONPATH=. python test/redis_cache.py --redis-url redis://localhost:6379/15
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+# 必须在导入 infra.db 之前指定数据库
+_tmp_dir = tempfile.mkdtemp()
+os.environ["SQLITE_URL"] = f"sqlite:///{_tmp_dir}/redis_cache.db"
+
+from infra.cache import AsyncCachedPostRepo
+from infra.db import Base, engine
+from infra.posts import AsyncPostRepo
+from infra.redis_cache import AsyncRedisCachedPostRepo, InvalidationListener, create_redis_client
+from services.blog_service import AsyncBlogService
+
+
+class CountingRepo(AsyncPostRepo):
+    """
+    记录按slug读取数据库的次数; before_read 在读取之后、返回之前执行一次, 模拟读的同时另一个请求写入
+    """
+    def __init__(self):
+        self.slug_reads = 0
+        self.before_read = None
+
+    async def _hook(self):
+        hook, self.before_read = self.before_read, None
+        if hook is not None:
+            await hook()
+
+    async def get_post_by_slug(self, slug: str):
+        self.slug_reads += 1
+        post = await super().get_post_by_slug(slug)
+        await self._hook()
+        return post
+
+    async def list_published_summaries(self, **filters):
+        result = await super().list_published_summaries(**filters)
+        await self._hook()
+        return result
+
+
+def check(label: str, ok: bool) -> bool:
+    print(f"{label:<48} {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+def make_worker(name: str, client, db_repo: CountingRepo):
+    shared = AsyncRedisCachedPostRepo(db_repo, client, prefix="blog-demo", ttl=60)
+    local = AsyncCachedPostRepo(shared, maxsize=100, ttl=60)
+    listener = InvalidationListener(client, shared.channel, local.apply_invalidation)
+    return AsyncBlogService(local), listener
+
+
+async def run(make_client) -> bool:
+    Base.metadata.create_all(bind=engine)
+    db_repo = CountingRepo()
+    service_a, listener_a = make_worker("a", make_client(), db_repo)
+    service_b, listener_b = make_worker("b", make_client(), db_repo)
+    # 两个 worker 的进程id相同, 演示时让 A 忽略自己、B 接收所有消息
+    listener_b.handle = lambda data, handle=listener_b.handle: handle(data.replace('"origin"', '"from"'))
+    listener_b.start()
+    await asyncio.sleep(0.1)
+
+    post = await service_a.create_draft(author_id=1, title="缓存演示", content="第一版")
+    post = await service_a.publish_post(post_id=post.id, author_id=1)
+
+    await service_a.get_post_by_slug_for_reader(post.slug)
+    before = db_repo.slug_reads
+    cached = await service_b.get_post_by_slug_for_reader(post.slug)
+    print(f"worker b read {cached.title!r}, database reads: {db_repo.slug_reads - before}")
+
+    # 格式不对的消息只记录日志, 监听继续工作
+    publisher = make_client()
+    for payload in ("not json", "[1, 2]", '{"slugs": 1}', '{"slugs": [1], "lists": true}'):
+        await publisher.publish(listener_b.channel, payload)
+    await service_a.update_post(post_id=post.id, author_id=1, content="第二版")
+    await asyncio.sleep(0.1)
+    updated = await service_b.get_post_by_slug_for_reader(post.slug)
+    print(f"worker b after update: {updated.content!r}")
+
+    await listener_b.stop()
+
+    # 读数据库期间 worker A 修改了文章, worker B 读到的旧内容不能留在 Redis 中
+    ok = True
+    client = make_client()
+    shared_b = AsyncRedisCachedPostRepo(db_repo, client, prefix="blog-demo", ttl=60)
+    await client.delete(shared_b._post_key(post.slug))
+    db_repo.before_read = lambda: service_a.update_post(post_id=post.id, author_id=1, content="第三版")
+    stale = await shared_b.get_post_by_slug(post.slug)
+    fresh = await shared_b.get_post_by_slug(post.slug)
+    print(f"read during write returned {stale.content!r}, next read {fresh.content!r}")
+    ok = check("stale post is not written to redis", fresh.content == "第三版") and ok
+
+    await client.delete(shared_b._list_index, *await client.smembers(shared_b._list_index))
+    db_repo.before_read = lambda: service_a.archive_post(post_id=post.id, author_id=1)
+    await shared_b.list_published_summaries(limit=50)
+    listed = {p.id for p in await shared_b.list_published_summaries(limit=50)}
+    ok = check("stale list is not written to redis", post.id not in listed) and ok
+    return ok
+
+
+async def run_without_redis() -> None:
+    import fakeredis
+
+    db_repo = CountingRepo()
+    service, _ = make_worker("c", fakeredis.FakeAsyncRedis(connected=False, decode_responses=True), db_repo)
+    posts = await service.list_published_summaries(limit=5)
+    print(f"redis down: listed {len(posts)} posts from the database")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Demonstrate the shared Redis post cache.")
+    parser.add_argument("--redis-url", help="Use a real Redis server instead of fakeredis.")
+    args = parser.parse_args()
+
+    if args.redis_url:
+        def make_client():
+            return create_redis_client(args.redis_url, use_async=True)
+    else:
+        import fakeredis
+
+        server = fakeredis.FakeServer()
+
+        def make_client():
+            return fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+
+    ok = asyncio.run(run(make_client))
+    asyncio.run(run_without_redis())
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+读写分离演示: 复制一份 SQLite 文件作为只读副本(复制后不再同步, 相当于一个延迟很大的副本)
+
+ 1. 新的 scope 中按slug读取刚发布的文章: 走副本, 读不到
+ 2. 同一个 scope 中写入之后再读: 走写库, 能读到 (read-your-writes)
+ 3. 副本不可用: 连接失败后改用写库
+ 4. ASGI: 每个请求单独判断, 发布请求之后的下一个请求又回到副本
+
+PYTHONPATH=. python test/replica_sqlite.py
+"""
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def scenario() -> None:
+    # 子进程: 环境变量已经设置好
+    from fastapi.testclient import TestClient
+
+    from infra import db
+    from infra.posts import PostRepo
+    from services.blog_service import BlogService
+
+    service = BlogService(PostRepo())
+
+    db.start_routing_scope()
+    post = service.create_draft(author_id=1, title="只写到主库", content="副本里没有这篇文章")
+    service.publish_post(post_id=post.id, author_id=1)
+    print("same scope after write:", service.get_post_by_slug_for_reader(post.slug) is not None)
+
+    db.start_routing_scope()
+    print("new scope (replica):   ", service.get_post_by_slug_for_reader(post.slug) is not None)
+
+    from main import app
+
+    with TestClient(app) as client:
+        created = client.post("/posts", json={"author_id": 1, "title": "接口写入", "content": "正文", "tags": []}).json()
+        published = client.post(f"/posts/{created['id']}/publish", json={"author_id": 1})
+        print("publish response:      ", published.status_code)
+        print("next request (replica):", client.get(f"/posts/{created['slug']}").status_code)
+
+
+def run(env: dict) -> None:
+    subprocess.run(
+            [sys.executable, __file__, "--scenario"],
+            env={**os.environ, **env, "PYTHONPATH": str(BACKEND_DIR), "LOG_LEVEL": "WARNING"},
+            cwd=BACKEND_DIR,
+            check=True,
+            )
+
+
+def main():
+    if sys.argv[1:] == ["--scenario"]:
+        scenario()
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        writer = Path(tmp_dir) / "writer.db"
+        replica = Path(tmp_dir) / "replica.db"
+        # 先建表, 再用 sqlite 的 backup 复制出副本(WAL 中未合并的页也会复制)
+        subprocess.run(
+                [sys.executable, "-c", "from infra.migrations import migrate; from infra.db import engine; migrate(engine)"],
+                env={**os.environ, "PYTHONPATH": str(BACKEND_DIR), "DATABASE_URL": f"sqlite:///{writer}", "LOG_LEVEL": "WARNING"},
+                cwd=BACKEND_DIR,
+                check=True,
+                )
+        with sqlite3.connect(writer) as source, sqlite3.connect(replica) as target:
+            source.backup(target)
+
+        print("== replica available")
+        run({"DATABASE_URL": f"sqlite:///{writer}", "DATABASE_READ_URLS": f"sqlite:///{replica}"})
+
+        print("== replica unavailable, reads fall back to the writer")
+        missing = Path(tmp_dir) / "missing" / "replica.db"
+        run({"DATABASE_URL": f"sqlite:///{writer}", "DATABASE_READ_URLS": f"sqlite:///{missing}"})
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
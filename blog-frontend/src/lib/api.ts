@@ -1,9 +1,12 @@
 // src/lib/api.ts
 import type {
+  ArchiveMonth,
   PostCreate,
   PostResponse,
+  PostSummary,
   PostUpdate,
-  PostPublishRequest
+  PostPublishRequest,
+  TagCount
 } from './types';
 
 const BASE_URL = 'http://localhost:8000';
@@ -30,7 +33,7 @@ export async function listPublishedPosts(params?: {
   offset?: number;
   tag?: string;
   author_id?: number;
-}): Promise<PostResponse[]> {
+}): Promise<PostSummary[]> {
   const search = new URLSearchParams();
   if (params?.limit) search.set('limit', String(params.limit));
   if (params?.offset) search.set('offset', String(params.offset));
@@ -38,7 +41,7 @@ export async function listPublishedPosts(params?: {
   if (params?.author_id != null) search.set('author_id', String(params.author_id));
 
   const query = search.toString();
-  return api<PostResponse[]>(`/posts${query ? `?${query}` : ''}`);
+  return api<PostSummary[]>(`/posts${query ? `?${query}` : ''}`);
 }
 
 // 根据 slug 获取文章
@@ -46,6 +49,16 @@ export async function getPostBySlug(slug: string): Promise<PostResponse> {
   return api<PostResponse>(`/posts/${encodeURIComponent(slug)}`);
 }
 
+// 标签云, 按文章数倒序
+export async function listTagCounts(limit?: number): Promise<TagCount[]> {
+  return api<TagCount[]>(`/tags${limit ? `?limit=${limit}` : ''}`);
+}
+
+// 按年/月归档, 按时间倒序
+export async function listArchiveMonths(): Promise<ArchiveMonth[]> {
+  return api<ArchiveMonth[]>('/archive');
+}
+
 // 创建草稿
 export async function createPost(payload: PostCreate): Promise<PostResponse> {
   return api<PostResponse>('/posts', {
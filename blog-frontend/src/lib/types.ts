@@ -4,6 +4,7 @@ export interface PostResponse {
   author_id: number;
   title: string;
   content: string;
+  content_html: string; // 后端保存时渲染并清洗过的 HTML
   slug: string;
   status: string; // "draft" | "published" | "archived"
   tags: string[];
@@ -12,6 +13,33 @@ export interface PostResponse {
   published_at: string | null;
 }
 
+// 列表接口返回的摘要, 不包含正文
+export interface PostSummary {
+  id: number;
+  author_id: number;
+  title: string;
+  slug: string;
+  status: string;
+  tags: string[];
+  excerpt: string;
+  created_at: string;
+  updated_at: string;
+  published_at: string | null;
+}
+
+// 标签云: 每个标签的已发布文章数
+export interface TagCount {
+  tag: string;
+  count: number;
+}
+
+// 按年/月归档的已发布文章数
+export interface ArchiveMonth {
+  year: number;
+  month: number;
+  count: number;
+}
+
 export interface PostCreate {
   title: string;
   content: string;
@@ -1,10 +1,10 @@
 // src/routes/+page.ts
 import type { PageLoad } from './$types';
 import { listPublishedPosts } from '$lib/api';
-import type { PostResponse } from '$lib/types';
+import type { PostSummary } from '$lib/types';
 
 export const load: PageLoad = async () => {
-  const posts: PostResponse[] = await listPublishedPosts({ limit: 20 });
+  const posts: PostSummary[] = await listPublishedPosts({ limit: 20 });
   return { posts };
 };
 